@@ -47,7 +47,7 @@ def serialize_gpt2() -> Tuple[bytes, float]:
 
     # Calculate size
     space = _flatten(tensor_dict)
-    bytes_used = sum(len(v["data"]) for _, v in space.items())
+    bytes_used = sum(t.numel() * t.element_size() for t in tensor_dict.values())
     logger.info(f"{bytes_used * 1e-6:.2f} MB allocated (not including metadata)")
 
     t0 = time.perf_counter()
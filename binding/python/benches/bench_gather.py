@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+import os
+import tempfile
+import logging
+
+import numpy as np
+import pyperf
+
+from bintensors.numpy import save_file, safe_open
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+py_runner = pyperf.Runner()
+
+N_ROWS = 50_000
+HIDDEN = 768
+N_GATHER = 4_000
+
+
+def gather_rows(filename: str, rows: np.ndarray) -> np.ndarray:
+    """Gather `rows` of the embedding directly from the file."""
+    with safe_open(filename, framework="np") as f:
+        return f.get_slice("embedding")[rows]
+
+
+def full_load_then_index(filename: str, rows: np.ndarray) -> np.ndarray:
+    """Load the whole embedding then index it with numpy."""
+    with safe_open(filename, framework="np") as f:
+        return f.get_tensor("embedding")[rows]
+
+
+def per_row_slices(filename: str, rows: np.ndarray) -> np.ndarray:
+    """Issue one Python-level slice per row."""
+    with safe_open(filename, framework="np") as f:
+        embedding = f.get_slice("embedding")
+        return np.concatenate([embedding[int(row) : int(row) + 1] for row in rows])
+
+
+def main():
+    tmpdir = tempfile.mkdtemp()
+    filename = os.path.join(tmpdir, "embedding.bintensors")
+    embedding = np.random.random((N_ROWS, HIDDEN)).astype(np.float32)
+    save_file({"embedding": embedding}, filename)
+    logger.info(f"Embedding of {embedding.nbytes * 1e-6:.2f} MB, gathering {N_GATHER} rows")
+
+    rows = np.random.randint(0, N_ROWS, size=N_GATHER)
+    assert np.array_equal(gather_rows(filename, rows), embedding[rows])
+
+    py_runner.bench_func("gather_rows", gather_rows, filename, rows)
+    py_runner.bench_func("full_load_then_index", full_load_then_index, filename, rows)
+    py_runner.bench_func("per_row_slices", per_row_slices, filename, rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+import os
+import time
+import tempfile
+import threading
+import logging
+
+import torch
+
+from bintensors.torch import save_file, load
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+def create_checkpoint(n_layers: int = 40):
+    tensors = {}
+    for i in range(n_layers):
+        tensors[f"h.{i}.mlp.c_fc.weight"] = torch.zeros((768, 3072))
+        tensors[f"h.{i}.mlp.c_proj.weight"] = torch.zeros((3072, 768))
+    return tensors
+
+
+class Ticker(threading.Thread):
+    """Counts how often it gets scheduled while the main thread is saving."""
+
+    def __init__(self, interval: float = 0.001):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.ticks = 0
+        self.stop = threading.Event()
+
+    def run(self):
+        while not self.stop.is_set():
+            self.ticks += 1
+            time.sleep(self.interval)
+
+
+def save_while_ticking(tensors, filename: str):
+    """Run `save_file` on the main thread with a second Python thread ticking."""
+    ticker = Ticker()
+    ticker.start()
+    # Let the ticker get going before the save starts.
+    time.sleep(0.05)
+    start = ticker.ticks
+
+    t0 = time.perf_counter()
+    save_file(tensors, filename)
+    elapsed = time.perf_counter() - t0
+
+    during = ticker.ticks - start
+    ticker.stop.set()
+    ticker.join()
+    return elapsed, during
+
+
+def main():
+    tensors = create_checkpoint()
+    nbytes = sum(t.numel() * t.element_size() for t in tensors.values())
+    logger.info(f"{nbytes * 1e-6:.2f} MB allocated (not including metadata)")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = os.path.join(tmpdir, "checkpoint.bintensors")
+        elapsed, ticks = save_while_ticking(tensors, filename)
+        logger.info(f"save_file took {elapsed:.4f} seconds")
+        logger.info(f"Background thread ticked {ticks} times during the save ({ticks / elapsed:.0f} ticks/s)")
+
+        with open(filename, "rb") as f:
+            data = f.read()
+
+    ticker = Ticker()
+    ticker.start()
+    time.sleep(0.05)
+    start = ticker.ticks
+    t0 = time.perf_counter()
+    load(data)
+    elapsed = time.perf_counter() - t0
+    ticks = ticker.ticks - start
+    ticker.stop.set()
+    ticker.join()
+    logger.info(f"load took {elapsed:.4f} seconds")
+    logger.info(f"Background thread ticked {ticks} times during the load ({ticks / elapsed:.0f} ticks/s)")
+
+
+if __name__ == "__main__":
+    main()
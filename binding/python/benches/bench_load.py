@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+import os
+import time
+import tempfile
+import logging
+
+import numpy as np
+import pyperf
+
+from bintensors.numpy import save_file, load_file
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+py_runner = pyperf.Runner()
+
+N_LAYERS = 24
+HIDDEN = 1024
+
+
+def create_checkpoint(n_layers: int = N_LAYERS):
+    tensors = {}
+    for i in range(n_layers):
+        tensors[f"h.{i}.mlp.c_fc.weight"] = np.random.random((HIDDEN, 4 * HIDDEN)).astype(np.float32)
+        tensors[f"h.{i}.mlp.c_proj.weight"] = np.random.random((4 * HIDDEN, HIDDEN)).astype(np.float32)
+        tensors[f"h.{i}.ln.bias"] = np.random.random((HIDDEN,)).astype(np.float32)
+    return tensors
+
+
+def evict(filename: str):
+    """Drop the file from the page cache so the next load faults every page in."""
+    fd = os.open(filename, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def time_load(loops: int, filename: str, num_threads, cold: bool) -> float:
+    """Time `loops` full loads, only the `load_file` calls are measured."""
+    total = 0.0
+    for _ in range(loops):
+        if cold:
+            evict(filename)
+        t0 = time.perf_counter()
+        load_file(filename, num_threads=num_threads)
+        total += time.perf_counter() - t0
+    return total
+
+
+def main():
+    tmpdir = tempfile.mkdtemp()
+    filename = os.path.join(tmpdir, "checkpoint.bintensors")
+    tensors = create_checkpoint()
+    save_file(tensors, filename)
+    nbytes = sum(t.nbytes for t in tensors.values())
+    logger.info(f"{nbytes * 1e-6:.2f} MB checkpoint, {os.cpu_count()} cores")
+
+    loaded = load_file(filename, num_threads=0)
+    assert all(np.array_equal(loaded[k], v) for k, v in tensors.items())
+
+    # `num_threads=1` is the single-threaded copy baseline.
+    for num_threads in [1, 4, 0]:
+        for cold in [True, False]:
+            name = f"load_file_{'cold' if cold else 'warm'}_threads_{num_threads}"
+            py_runner.bench_time_func(name, time_load, filename, num_threads, cold)
+
+
+if __name__ == "__main__":
+    main()
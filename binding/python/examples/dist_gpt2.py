@@ -1,14 +1,12 @@
 import os
-import re
-import warnings
 import logging
-from itertools import islice
 
 import torch
 
-from typing import Dict, Set, List, Union
+from typing import Dict
 
-from bintensors.torch import save_file, load_file
+from bintensors import sharded_open
+from bintensors.torch import save_sharded, load_sharded
 
 logging.basicConfig(level=logging.DEBUG,
                     format='%(asctime)s - %(levelname)s - %(message)s')
@@ -40,53 +38,17 @@ def create_gpt2(n_layers: int) -> Dict[str, torch.Tensor]:
     return tensors
 
 
-def save_file_chunk(filename: str, tensor_dict: Dict[str, torch.Tensor], metadata: Dict[str, str] = None):
-    save_file(tensor_dict, filename, metadata)
-
-def load_file_chunks(files : List[Union[os.PathLike, str]], device : Union[int,str] = "cpu") -> Dict[str, torch.Tensor]:
-    result = {}
-    for file in files:
-        result |= load_file(file, device)
-    
-    return result
-
-def chunk_model(model: Dict[str, torch.Tensor], n_chunks: int, dir_out : os.PathLike) -> Set[Dict[str, torch.Tensor]]:
-    offset_chunks = len(model) % n_chunks
-    if offset_chunks != 0:
-        warnings.warn(f"model archetecture is mod of {n_chunks}")
-
-
-    try:
-        total = int(len(model)/n_chunks)
-        if offset_chunks > 0:
-            total += int(n_chunks / offset_chunks)
-        offest = 0
-        items = model.items()
-        files = []
-        while len(model) > offest:
-            # convert modle into chunk
-            chunk = dict(islice(items, offest, offest + n_chunks))
-            
-            # determine stdout file
-            filename = f"chunk-{offest}-{offest + n_chunks}.bt"
-            output = os.path.join(__dir__, dir_out, filename)
-            files.append(output)
-            # write to file
-            save_file_chunk(output, chunk)
-            
-            iteration = f"{len(files)}/{total}"
-            out_dir = '/'.join(re.split(r'[\\/]', output)[-3:-1])
-            logger.info(f"{iteration:<8}: {filename} writen to path ../{out_dir}/")
-            
-            offest += n_chunks
-    except Exception as e:
-        raise e
-    
-    return files
-
-
 model = create_gpt2(10)
-files = chunk_model(model, 14, "output")
+output = os.path.join(__dir__, "output")
 
-gpt = load_file_chunks(files, device="cpu")
+# Shards are written in parallel, with `model.bintensors.index.json` mapping
+# every tensor to its shard.
+files = save_sharded(model, output, max_shard_size="100MB")
+logger.info(f"{len(files)} shards writen to {output}")
+
+gpt = load_sharded(output, device="cpu")
 print(gpt.keys())
+
+# Single tensors are read from the shard holding them.
+with sharded_open(output, framework="pt") as f:
+    print(f.get_tensor("h.3.mlp.c_fc.weight").shape)
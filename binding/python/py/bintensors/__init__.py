@@ -1,8 +1,17 @@
 from ._bintensors_rs import (
     BintensorError,
     __version__,
+    checksum_file,
     deserialize,
+    inspect,
+    repack,
     safe_open,
     serialize,
     serialize_file,
+    serialize_file_with_checksum,
+    serialize_into,
+    serialize_with_checksum,
+    serialized_size,
+    verify_file,
 )
+from ._sharded import sharded_open
@@ -1,3 +1,28 @@
+@staticmethod
+def checksum_file(filename, hasher=None, num_threads=None):
+    """
+    Computes the tree hash of a file on several cores.
+
+    The file is cut into chunks of 4 MiB hashed in parallel, with the GIL
+    released, and the digests of the chunks are hashed into the result. It is
+    the checksum returned by `serialize_file_with_checksum(..., tree=True)`,
+    not the plain hash of the file.
+
+    Args:
+        filename (`str`, or `os.PathLike`):
+            The name of the file to hash.
+        hasher (`Callable[[bytes], HASH]`, *optional*):
+            The `hashlib` constructor of the checksum, `hashlib.sha1` by default.
+            Only the SHA-1, SHA-2 and SHA-3 families are supported.
+        num_threads (`int`, *optional*):
+            Hash with this many threads, all available cores by default.
+
+    Returns:
+        (`bytes`):
+            The tree hash of the file.
+    """
+    pass
+
 @staticmethod
 def deserialize(bytes):
     """
@@ -15,7 +40,50 @@ def deserialize(bytes):
     pass
 
 @staticmethod
-def serialize(tensor_dict, metadata=None):
+def inspect(filename):
+    """
+    Reads the header of a bintensors file without mapping it or reading the tensors
+
+    Args:
+        filename (`str`, or `os.PathLike`):
+            The name of the file to inspect
+
+    Returns:
+        (`Dict[str, Any]`):
+            The header, like:
+                {"metadata": {"format": "pt"}, "alignment": None, "tensors": {"tensor_name":
+                {"dtype": "F32", "shape": [2, 3], "data_offsets": (0, 24)}}}
+            Tensors are ordered by offset, `metadata` is `None` without user metadata
+            and `alignment` is `None` when the tensors are packed.
+    """
+    pass
+
+@staticmethod
+def repack(src, dst, trace):
+    """
+    Rewrites a bintensors file with its tensors laid out in first access order
+
+    The tensor data is copied verbatim and the metadata and alignment are kept,
+    only the offsets change. Tensors missing from the trace come after the
+    traced ones. In packed files, tensors whose size is not a multiple of 8
+    bytes are placed last to keep every tensor aligned.
+
+    Args:
+        src (`str`, or `os.PathLike`):
+            The file to repack
+        dst (`str`, or `os.PathLike`):
+            The file to write, it must differ from `src`
+        trace (`List[Union[str, Tuple[str, float]]]`):
+            The accessed tensor names, as returned by `safe_open(..., trace=True).trace()`.
+
+    Returns:
+        (`NoneType`):
+            On success return `None`.
+    """
+    pass
+
+@staticmethod
+def serialize(tensor_dict, metadata=None, order=None, alignment=None, checksums=False):
     """
     Serializes raw data.
 
@@ -25,6 +93,18 @@ def serialize(tensor_dict, metadata=None):
                 {"tensor_name": {"dtype": "float32", "shape": [2, 3], "data": b"...."}}
         metadata (`Dict[str, str]`, *optional*):
             The optional purely text annotations
+        order (`Union[str, List[str]]`, *optional*):
+            The order of the tensors in the file: `"dtype"` (the default),
+            `"natural"`, `"insertion"` or a list of names. Without `alignment`,
+            tensors whose size is not a multiple of 8 bytes are placed last.
+        alignment (`int`, *optional*):
+            Start every tensor at a multiple of this many bytes from the beginning
+            of the file, a power of two like `64` or `4096`. It is recorded in the
+            header and the gaps are filled with zeros. By default the tensors are packed.
+        checksums (`bool`, *optional*):
+            Record an xxh3 checksum of every tensor in the header, which
+            `safe_open(..., verify="lazy")` checks when the tensor is first read.
+            Callable `data` entries are then all called before anything is written.
 
     Returns:
         (`bytes`):
@@ -33,7 +113,9 @@ def serialize(tensor_dict, metadata=None):
     pass
 
 @staticmethod
-def serialize_file(tensor_dict, filename, metadata=None):
+def serialize_file(
+    tensor_dict, filename, metadata=None, num_threads=None, order=None, alignment=None, checksums=False
+):
     """
     Serializes raw data into file.
 
@@ -44,6 +126,22 @@ def serialize_file(tensor_dict, filename, metadata=None):
             The name of the file to write into.
         metadata (`Dict[str, str]`, *optional*):
             The optional purely text annotations
+        num_threads (`int`, *optional*):
+            Write the tensors with this many threads, each one writing at the
+            tensor's final offset in a preallocated file. `0` uses all available
+            cores. By default a single sequential writer is used.
+        order (`Union[str, List[str]]`, *optional*):
+            The order of the tensors in the file: `"dtype"` (the default),
+            `"natural"`, `"insertion"` or a list of names. Without `alignment`,
+            tensors whose size is not a multiple of 8 bytes are placed last.
+        alignment (`int`, *optional*):
+            Start every tensor at a multiple of this many bytes from the beginning
+            of the file, a power of two like `64` or `4096`. It is recorded in the
+            header and the gaps are filled with zeros. By default the tensors are packed.
+        checksums (`bool`, *optional*):
+            Record an xxh3 checksum of every tensor in the header, which
+            `safe_open(..., verify="lazy")` checks when the tensor is first read.
+            Callable `data` entries are then all called before anything is written.
 
     Returns:
         (`NoneType`):
@@ -51,6 +149,126 @@ def serialize_file(tensor_dict, filename, metadata=None):
     """
     pass
 
+@staticmethod
+def serialize_file_with_checksum(filename, tensor_dict, metadata=None, hasher=None, tree=False):
+    """
+    Serializes raw data into file, computing its checksum in the same pass.
+
+    Args:
+        filename (`str`, or `os.PathLike`):
+            The name of the file to write into.
+        tensor_dict (`Dict[str, Dict[Any]]`):
+            The tensor dict, as for `serialize`.
+        metadata (`Dict[str, str]`, *optional*):
+            The optional purely text annotations
+        hasher (`Callable[[bytes], HASH]`, *optional*):
+            The `hashlib` constructor of the checksum, `hashlib.sha1` by default.
+            Only the SHA-1, SHA-2 and SHA-3 families are supported.
+        tree (`bool`, *optional*):
+            Compute the tree hash of the file, which `checksum_file` and
+            `verify_file` compute on several cores, instead of the plain hash.
+
+    Returns:
+        (`bytes`):
+            The checksum of the file content.
+    """
+    pass
+
+@staticmethod
+def serialize_into(buffer, tensor_dict, metadata=None, order=None, alignment=None, checksums=False):
+    """
+    Serializes raw data into an existing writable buffer.
+
+    Args:
+        buffer (`Union[bytearray, memoryview, mmap.mmap]`):
+            The contiguous writable buffer to write into, from its start. It can
+            be any buffer protocol object, like the `buf` of a
+            `multiprocessing.shared_memory.SharedMemory`, and must hold at least
+            `serialized_size(...)` bytes.
+        tensor_dict (`Dict[str, Dict[Any]]`):
+            The tensor dict, as for `serialize`.
+        metadata (`Dict[str, str]`, *optional*):
+            The optional purely text annotations
+        order (`Union[str, List[str]]`, *optional*):
+            The order of the tensors, as for `serialize`.
+        alignment (`int`, *optional*):
+            The alignment of the tensors, as for `serialize`.
+        checksums (`bool`, *optional*):
+            Record the checksums of the tensors, as for `serialize`.
+
+    Returns:
+        (`int`):
+            The number of bytes written, the rest of `buffer` is left untouched.
+    """
+    pass
+
+@staticmethod
+def serialize_with_checksum(tensor_dict, metadata=None, hasher=None):
+    """
+    Serializes raw data, computing its checksum in the same pass.
+
+    Args:
+        tensor_dict (`Dict[str, Dict[Any]]`):
+            The tensor dict, as for `serialize`.
+        metadata (`Dict[str, str]`, *optional*):
+            The optional purely text annotations
+        hasher (`Callable[[bytes], HASH]`, *optional*):
+            The `hashlib` constructor of the checksum, `hashlib.sha1` by default.
+            The SHA-1, SHA-2 and SHA-3 families are hashed natively without the
+            GIL, other algorithms hash the serialized bytes afterwards.
+
+    Returns:
+        (`Tuple[bytes, bytes]`):
+            The checksum and the serialized content.
+    """
+    pass
+
+@staticmethod
+def serialized_size(tensor_dict, metadata=None, order=None, alignment=None, checksums=False):
+    """
+    Computes the size of the serialized data, without serializing it.
+
+    Args:
+        tensor_dict (`Dict[str, Dict[Any]]`):
+            The tensor dict, as for `serialize`. The `data` of the tensors is
+            only read with `checksums`, to hash it.
+        metadata (`Dict[str, str]`, *optional*):
+            The optional purely text annotations
+        order (`Union[str, List[str]]`, *optional*):
+            The order of the tensors, as for `serialize`.
+        alignment (`int`, *optional*):
+            The alignment of the tensors, as for `serialize`.
+        checksums (`bool`, *optional*):
+            Record the checksums of the tensors, as for `serialize`.
+
+    Returns:
+        (`int`):
+            The number of bytes `serialize` returns and `serialize_into` writes.
+    """
+    pass
+
+@staticmethod
+def verify_file(filename, expected, hasher=None, num_threads=None):
+    """
+    Checks the tree hash of a file, see `checksum_file`.
+
+    Args:
+        filename (`str`, or `os.PathLike`):
+            The name of the file to verify.
+        expected (`bytes`):
+            The expected checksum, from `checksum_file` or
+            `serialize_file_with_checksum(..., tree=True)`.
+        hasher (`Callable[[bytes], HASH]`, *optional*):
+            The `hashlib` constructor of the checksum, `hashlib.sha1` by default.
+        num_threads (`int`, *optional*):
+            Hash with this many threads, all available cores by default.
+
+    Returns:
+        (`NoneType`):
+            On success return `None`, raises if the file does not match.
+    """
+    pass
+
 class safe_open:
     """
     Opens a bintensors lazily and returns tensors as asked
@@ -65,9 +283,17 @@ class safe_open:
 
         device (`str`, defaults to `"cpu"`):
             The device on which you want the tensors.
+
+        trace (`bool`, defaults to `False`):
+            Record the tensors accessed and when, see `trace()` and `repack`.
+
+        verify (`str`, *optional*):
+            `"lazy"` checks every tensor against the checksum recorded in the
+            header the first time it is read. The file must have been saved
+            with `checksums=True`. By default nothing is verified.
     """
 
-    def __init__(self, filename, framework, device=...):
+    def __init__(self, filename, framework, device=..., trace=False, verify=None):
         pass
     def __enter__(self):
         """
@@ -96,17 +322,23 @@ class safe_open:
 
         with safe_open("model.bintensors", framework="pt", device=0) as f:
             tensor_part = f.get_slice("embedding")[:, ::8]
+            # Gather rows by index, a list or an integer array on any single dimension
+            rows = f.get_slice("embedding")[[3, 1024, 7]]
 
         ```
         """
         pass
-    def get_tensor(self, name):
+    def get_tensor(self, name, dtype=None):
         """
         Returns a full tensor
 
         Args:
             name (`str`):
                 The name of the tensor you want
+            dtype (`Union[str, dtype]`, *optional*):
+                Convert the tensor to this dtype, a name like `"float32"` or a
+                framework dtype, in a single pass out of the file. F16, BF16, F32
+                and F64 convert into each other and F8 converts to F16 and F32.
 
         Returns:
             (`Tensor`):
@@ -118,10 +350,109 @@ class safe_open:
 
         with safe_open("model.bintensors", framework="pt", device=0) as f:
             tensor = f.get_tensor("embedding")
+            upcast = f.get_tensor("lm_head", dtype=torch.float32)
 
         ```
         """
         pass
+    def get_tensors(self, names=None, num_threads=None, dtype=None):
+        """
+        Returns several tensors at once
+
+        Args:
+            names (`List[str]`, *optional*):
+                The names of the tensors you want, all of them by default.
+            num_threads (`int`, *optional*):
+                Copy the tensors out of the file with this many threads, `0` uses
+                all available cores. By default the tensors are built one after
+                the other on the calling thread.
+            dtype (`Union[str, dtype]`, *optional*):
+                Convert the floating point tensors to this dtype while copying them
+                out of the file, as for `get_tensor`. The other tensors are kept as
+                stored.
+
+        Returns:
+            (`Dict[str, Tensor]`):
+                The tensors in the framework you opened the file for, in the order
+                of `names`, or ordered by offset when `names` is not given.
+
+        Example:
+        ```python
+        from bintensors import safe_open
+
+        with safe_open("model.bintensors", framework="pt", device=0) as f:
+            tensors = f.get_tensors()
+
+        ```
+        """
+        pass
+    def prefetch(self, names):
+        """
+        Asks the kernel to read the given tensors ahead, without waiting for it
+
+        Args:
+            names (`List[str]`):
+                The names of the tensors which are about to be read
+
+        Example:
+        ```python
+        from bintensors import safe_open
+
+        with safe_open("model.bintensors", framework="pt") as f:
+            f.prefetch(["experts.3.w1", "experts.3.w2"])
+            # ... run something else while the pages are read in
+            w1 = f.get_tensor("experts.3.w1")
+
+        ```
+        """
+        pass
+    def advise(self, advice):
+        """
+        Tells the kernel how the whole file is going to be accessed
+
+        Args:
+            advice (`str`):
+                `"sequential"` for aggressive readahead, `"random"` to disable
+                readahead or `"normal"` to restore the default behavior.
+        """
+        pass
+    def trace(self):
+        """
+        Returns the accesses recorded since the file was opened
+
+        Returns:
+            (`List[Tuple[str, float]]`):
+                The name of every tensor accessed through `get_tensor`, `get_tensors`
+                or `get_slice`, with the seconds elapsed since opening, in call order.
+
+        Example:
+        ```python
+        from bintensors import repack, safe_open
+
+        with safe_open("model.bintensors", framework="pt", trace=True) as f:
+            # ... warm up the model
+            trace = f.trace()
+        repack("model.bintensors", "model.packed.bintensors", trace)
+
+        ```
+        """
+        pass
+    def release(self, names):
+        """
+        Drops the pages of the given tensors from the mapping and, on Linux,
+        from the page cache
+
+        Tensors already read stay valid, the pages are read again from the file
+        if they are accessed later on. Pages still mapped elsewhere stay in
+        memory: with `framework="pt"` (torch 1.11 or later) the returned tensors
+        live in torch's own mapping of the file, which `release` does not touch,
+        so their pages are only dropped once the tensors are freed.
+
+        Args:
+            names (`List[str]`):
+                The names of the tensors which have been copied elsewhere
+        """
+        pass
     def keys(self):
         """
         Returns the names of the tensors in the file.
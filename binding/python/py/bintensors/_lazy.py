@@ -0,0 +1,117 @@
+import os
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Any, Iterator, Optional, Union
+
+from bintensors import safe_open
+
+# Size in bytes of one element, keyed by the dtype names of `PySafeSlice.get_dtype`.
+_DTYPE_SIZES = {
+    "BOOL": 1,
+    "U8": 1,
+    "I8": 1,
+    "F8_E5M2": 1,
+    "F8_E4M3": 1,
+    "I16": 2,
+    "U16": 2,
+    "F16": 2,
+    "BF16": 2,
+    "I32": 4,
+    "U32": 4,
+    "F32": 4,
+    "F64": 8,
+    "I64": 8,
+    "U64": 8,
+}
+
+
+class LazyStateDict(Mapping):
+    """
+    Read-only mapping over the tensors of a bintensors file, materialized on first access.
+
+    Materialized tensors are kept in a least recently used cache holding at most
+    `cache_bytes` bytes of tensor data. Tensors larger than the whole budget are
+    returned without being cached.
+
+    Args:
+        filename (`str`, or `os.PathLike`):
+            The name of the file which contains the tensors
+        framework (`str`):
+            The framework passed to `safe_open`.
+        device (`Union[str, int]`, *optional*, defaults to `cpu`):
+            The device passed to `safe_open`.
+        cache_bytes (`int`, *optional*, defaults to `None`):
+            The byte budget of the cache, `None` keeps every tensor accessed.
+    """
+
+    def __init__(
+        self,
+        filename: Union[str, os.PathLike],
+        framework: str,
+        device: Union[str, int] = "cpu",
+        cache_bytes: Optional[int] = None,
+    ):
+        if cache_bytes is not None and cache_bytes < 0:
+            raise ValueError(f"cache_bytes must be positive, got {cache_bytes}")
+        self._handle = safe_open(filename, framework=framework, device=device)
+        self._keys = self._handle.offset_keys()
+        self._names = set(self._keys)
+        self._cache: "OrderedDict[str, Any]" = OrderedDict()
+        self._cache_bytes = cache_bytes
+        self.cached_bytes = 0
+
+    def nbytes(self, key: str) -> int:
+        """
+        Returns the size in bytes of a tensor, without materializing it.
+        """
+        tensor_slice = self._handle.get_slice(key)
+        count = 1
+        for dim in tensor_slice.get_shape():
+            count *= dim
+        return count * _DTYPE_SIZES[tensor_slice.get_dtype()]
+
+    def metadata(self) -> Optional[dict]:
+        return self._handle.metadata()
+
+    def close(self):
+        """
+        Closes the underlying file and empties the cache, tensors already returned stay valid.
+        """
+        self._cache.clear()
+        self.cached_bytes = 0
+        self._handle.__exit__(None, None, None)
+
+    def __enter__(self) -> "LazyStateDict":
+        return self
+
+    def __exit__(self, _exc_type, _exc_value, _traceback):
+        self.close()
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        if key not in self._names:
+            raise KeyError(key)
+
+        tensor = self._handle.get_tensor(key)
+        nbytes = self.nbytes(key)
+        if self._cache_bytes is None or nbytes <= self._cache_bytes:
+            self._cache[key] = tensor
+            self.cached_bytes += nbytes
+            while self._cache_bytes is not None and self.cached_bytes > self._cache_bytes:
+                evicted, _ = self._cache.popitem(last=False)
+                self.cached_bytes -= self.nbytes(evicted)
+        return tensor
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._names
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({len(self)} tensors, {len(self._cache)} cached)"
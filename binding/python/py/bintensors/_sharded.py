@@ -0,0 +1,191 @@
+import os
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Union
+
+from ._bintensors_rs import BintensorError, safe_open, serialize_file
+
+INDEX_FILENAME = "model.bintensors.index.json"
+
+_UNITS = {
+    "": 1,
+    "B": 1,
+    "KB": 10**3,
+    "MB": 10**6,
+    "GB": 10**9,
+    "TB": 10**12,
+    "KIB": 2**10,
+    "MIB": 2**20,
+    "GIB": 2**30,
+    "TIB": 2**40,
+}
+
+
+def _parse_size(size: Union[int, str]) -> int:
+    """
+    Parses a size in bytes given as an `int` or a string like `"5GB"` or `"500MiB"`.
+    """
+    if isinstance(size, int):
+        value = size
+    else:
+        match = re.fullmatch(r"\s*(\d+)\s*([a-zA-Z]*)\s*", size)
+        if match is None or match.group(2).upper() not in _UNITS:
+            raise ValueError(f"Invalid size {size!r}, expected a number of bytes like `5GB` or `500MiB`")
+        value = int(match.group(1)) * _UNITS[match.group(2).upper()]
+    if value <= 0:
+        raise ValueError(f"Shard size must be positive, got {size!r}")
+    return value
+
+
+def _plan_shards(sizes: Dict[str, int], max_shard_size: int) -> List[List[str]]:
+    """
+    Groups the tensor names, in order, into shards of at most `max_shard_size` bytes.
+    A tensor larger than `max_shard_size` gets a shard of its own.
+    """
+    shards: List[List[str]] = []
+    current: List[str] = []
+    current_size = 0
+    for name, size in sizes.items():
+        if current and current_size + size > max_shard_size:
+            shards.append(current)
+            current, current_size = [], 0
+        current.append(name)
+        current_size += size
+    if current or not shards:
+        shards.append(current)
+    return shards
+
+
+def save_sharded(
+    flattened: Dict[str, Dict[str, Any]],
+    sizes: Dict[str, int],
+    directory: Union[str, os.PathLike],
+    max_shard_size: Union[int, str],
+    metadata: Optional[Dict[str, str]] = None,
+    num_threads: Optional[int] = None,
+) -> List[str]:
+    """
+    Writes the flattened tensors into shards of `directory` in parallel, along with the index.
+
+    Args:
+        flattened (`Dict[str, Dict[str, Any]]`):
+            The tensors as accepted by `serialize_file`.
+        sizes (`Dict[str, int]`):
+            The size in bytes of every tensor, in the order they are grouped into shards.
+        directory (`str`, or `os.PathLike`):
+            The directory to write into, created if needed.
+        max_shard_size (`Union[int, str]`):
+            The maximum size of the tensor data of a shard, in bytes or like `"5GB"`.
+        metadata (`Dict[str, str]`, *optional*):
+            Text metadata written in every shard and in the index.
+        num_threads (`int`, *optional*):
+            Number of shards written at the same time, all of them by default.
+
+    Returns:
+        `List[str]`: the file names of the shards.
+    """
+    shards = _plan_shards(sizes, _parse_size(max_shard_size))
+    filenames = [f"model-{i + 1:05d}-of-{len(shards):05d}.bintensors" for i in range(len(shards))]
+    os.makedirs(directory, exist_ok=True)
+
+    def write(shard: int):
+        tensors = {name: flattened[name] for name in shards[shard]}
+        serialize_file(os.path.join(directory, filenames[shard]), tensors, metadata=metadata)
+
+    # `serialize_file` releases the GIL, so shards are written concurrently.
+    with ThreadPoolExecutor(max_workers=num_threads or len(shards)) as executor:
+        list(executor.map(write, range(len(shards))))
+
+    index = {
+        "metadata": {**(metadata or {}), "total_size": sum(sizes.values())},
+        "weight_map": {name: filename for names, filename in zip(shards, filenames) for name in names},
+    }
+    with open(os.path.join(directory, INDEX_FILENAME), "w") as f:
+        json.dump(index, f, separators=(",", ":"))
+    return filenames
+
+
+class sharded_open:
+    """
+    Opens a sharded checkpoint lazily and returns tensors as asked, like `safe_open` on a single file.
+
+    Every shard header is read concurrently when opening, `get_tensor` and
+    `get_slice` are then routed to the shard holding the tensor.
+
+    Args:
+        directory (`str`, or `os.PathLike`):
+            The directory containing the shards and their index
+        framework (`str`):
+            The framework you want you tensors in, as for `safe_open`.
+        device (`str`, defaults to `"cpu"`):
+            The device on which you want the tensors.
+    """
+
+    def __init__(self, directory: Union[str, os.PathLike], framework: str, device: Union[str, int] = "cpu"):
+        with open(os.path.join(directory, INDEX_FILENAME)) as f:
+            index = json.load(f)
+        self._metadata = index.get("metadata")
+        self._weight_map: Dict[str, str] = index["weight_map"]
+        filenames = list(dict.fromkeys(self._weight_map.values()))
+
+        def open_shard(filename: str):
+            return safe_open(os.path.join(directory, filename), framework=framework, device=device)
+
+        # Opening a file maps it and parses its header with the GIL released.
+        with ThreadPoolExecutor(max_workers=max(len(filenames), 1)) as executor:
+            self._handles = dict(zip(filenames, executor.map(open_shard, filenames)))
+
+    def _filename(self, name: str) -> str:
+        filename = self._weight_map.get(name)
+        if filename is None:
+            raise BintensorError(f"Checkpoint does not contain tensor {name}")
+        return filename
+
+    def _handle(self, name: str):
+        return self._handles[self._filename(name)]
+
+    def metadata(self) -> Optional[Dict[str, str]]:
+        return self._metadata
+
+    def keys(self) -> List[str]:
+        return sorted(self._weight_map)
+
+    def offset_keys(self) -> List[str]:
+        """
+        Returns the tensor names shard after shard, each shard ordered by offset.
+        """
+        return [name for handle in self._handles.values() for name in handle.offset_keys()]
+
+    def get_tensor(self, name: str, dtype: Optional[Any] = None):
+        return self._handle(name).get_tensor(name, dtype=dtype)
+
+    def get_slice(self, name: str):
+        return self._handle(name).get_slice(name)
+
+    def get_tensors(
+        self, names: Optional[List[str]] = None, num_threads: Optional[int] = None, dtype: Optional[Any] = None
+    ) -> Dict[str, Any]:
+        if names is None:
+            tensors = {}
+            for handle in self._handles.values():
+                tensors.update(handle.get_tensors(num_threads=num_threads, dtype=dtype))
+            return tensors
+        by_shard: Dict[str, List[str]] = {}
+        for name in names:
+            by_shard.setdefault(self._filename(name), []).append(name)
+        loaded = {}
+        for filename, shard_names in by_shard.items():
+            loaded.update(self._handles[filename].get_tensors(shard_names, num_threads=num_threads, dtype=dtype))
+        return {name: loaded[name] for name in names}
+
+    def close(self):
+        for handle in self._handles.values():
+            handle.__exit__(None, None, None)
+        self._handles = {}
+
+    def __enter__(self) -> "sharded_open":
+        return self
+
+    def __exit__(self, _exc_type, _exc_value, _traceback):
+        self.close()
@@ -101,13 +101,17 @@ def load(data: bytes) -> Dict[str, Array]:
     return _np2jnp(flat)
 
 
-def load_file(filename: Union[str, os.PathLike]) -> Dict[str, Array]:
+def load_file(filename: Union[str, os.PathLike], dtype: Optional[Union[str, jnp.dtype]] = None) -> Dict[str, Array]:
     """
     Loads a bintensors file into flax format.
 
     Args:
         filename (`str`, or `os.PathLike`)):
             The name of the file which contains the tensors
+        dtype (`Union[str, jnp.dtype]`, *optional*, defaults to `None`):
+            Convert the floating point tensors to this dtype in a single pass out of
+            the file, like `jnp.float32` to upcast a `float16` checkpoint. The other
+            tensors are kept as stored.
 
     Returns:
         `Dict[str, Array]`: dictionary that contains name as key, value as `Array`
@@ -121,11 +125,8 @@ def load_file(filename: Union[str, os.PathLike]) -> Dict[str, Array]:
     loaded = load_file(file_path)
     ```
     """
-    result = {}
     with safe_open(filename, framework="flax") as f:
-        for k in f.offset_keys():
-            result[k] = f.get_tensor(k)
-    return result
+        return f.get_tensors(dtype=dtype)
 
 def save_with_checksum(
     tensor_dict: Dict[str, Array],
@@ -137,13 +137,17 @@ def load(data: bytes) -> Dict[str, mx.array]:
     return _np2mx(flat)
 
 
-def load_file(filename: Union[str, os.PathLike]) -> Dict[str, mx.array]:
+def load_file(filename: Union[str, os.PathLike], dtype: Optional[Union[str, mx.Dtype]] = None) -> Dict[str, mx.array]:
     """
     Loads a bintensors file into MLX format.
 
     Args:
         filename (`str`, or `os.PathLike`)):
             The name of the file which contains the tensors
+        dtype (`Union[str, mx.Dtype]`, *optional*, defaults to `None`):
+            Convert the floating point tensors to this dtype in a single pass out of
+            the file, like `mx.float32` to upcast a `float16` checkpoint. The other
+            tensors are kept as stored.
 
     Returns:
         `Dict[str, mx.array]`: dictionary that contains name as key, value as `mx.array`
@@ -157,11 +161,8 @@ def load_file(filename: Union[str, os.PathLike]) -> Dict[str, mx.array]:
     loaded = load_file(file_path)
     ```
     """
-    result = {}
     with safe_open(filename, framework="mlx") as f:
-        for k in f.offset_keys():
-            result[k] = f.get_tensor(k)
-    return result
+        return f.get_tensors(dtype=dtype)
 
 
 def _np2mx(numpy_dict: Dict[str, np.ndarray]) -> Dict[str, mx.array]:
@@ -2,7 +2,7 @@ import os
 import sys
 import hashlib
 from _hashlib import HASH
-from typing import Dict, Optional, Union, Tuple, Callable
+from typing import Dict, List, Optional, Union, Tuple, Callable
 
 try:
     import numpy as np
@@ -13,27 +13,47 @@ except ImportError:
 
 
 from bintensors import deserialize, safe_open, serialize, serialize_file
-
-__all__ = ["save", "save_file", "load", "load_file", "save_with_checksum"]
-
-
-def _tobytes(tensor: np.ndarray) -> bytes:
+from bintensors import serialize_file_with_checksum, serialize_with_checksum
+from bintensors._lazy import LazyStateDict
+from bintensors import _sharded
+
+__all__ = [
+    "save",
+    "save_file",
+    "save_sharded",
+    "load",
+    "load_file",
+    "load_sharded",
+    "save_with_checksum",
+    "save_file_with_checksum",
+]
+
+
+def _tobuffer(tensor: np.ndarray) -> np.ndarray:
     """
-    Converts a `np.ndarray` into a raw little-endian byte representation.
+    Returns a contiguous little-endian view of a `np.ndarray` that the rust
+    binding reads in place. A copy is only made when the array has to be
+    byteswapped or packed.
 
     Args:
         tensor (`np.ndarray`):
             A dense and contiguous NumPy array.
 
     Returns:
-        `bytes`: A byte representation of the array's data in little-endian order.
+        `np.ndarray`: A C-contiguous array with its data in little-endian order.
     """
     if not _is_little_endian(tensor):
-        tensor = tensor.byteswap(inplace=False)
-    return tensor.tobytes()
+        tensor = tensor.byteswap(inplace=False).view(tensor.dtype.newbyteorder("<"))
+    return np.ascontiguousarray(tensor)
 
 
-def save(tensor_dict: Dict[str, np.ndarray], metadata: Optional[Dict[str, str]] = None) -> bytes:
+def save(
+    tensor_dict: Dict[str, np.ndarray],
+    metadata: Optional[Dict[str, str]] = None,
+    order: Optional[Union[str, List[str]]] = None,
+    alignment: Optional[int] = None,
+    checksums: bool = False,
+) -> bytes:
     """
     Saves a dictionary of tensors into raw bytes in bintensors format.
 
@@ -44,6 +64,17 @@ def save(tensor_dict: Dict[str, np.ndarray], metadata: Optional[Dict[str, str]]
             Optional text only metadata you might want to save in your header.
             For instance it can be useful to specify more about the underlying
             tensors. This is purely informative and does not affect tensor loading.
+        order (`Union[str, List[str]]`, *optional*, defaults to `None`):
+            The layout order of the tensors in the file: `"dtype"` (the default),
+            `"natural"` (`h.2` before `h.10`), `"insertion"` or a list of names.
+            Without `alignment`, tensors whose size is not a multiple of 8 bytes
+            are placed last.
+        alignment (`int`, *optional*, defaults to `None`):
+            Start every tensor at a multiple of this many bytes in the file, a
+            power of two like `64` or `4096`. By default the tensors are packed.
+        checksums (`bool`, *optional*, defaults to `False`):
+            Record a checksum of every tensor in the header, so that
+            `safe_open(..., verify="lazy")` can check each tensor when it is first read.
 
     Returns:
         `bytes`: The raw bytes representing the format
@@ -58,14 +89,20 @@ def save(tensor_dict: Dict[str, np.ndarray], metadata: Optional[Dict[str, str]]
     byte_data = save(tensors)
     ```
     """
-    flattened = {k: {"dtype": v.dtype.name, "shape": v.shape, "data": _tobytes(v)} for k, v in tensor_dict.items()}
-    serialized = serialize(flattened, metadata=metadata)
+    flattened = {k: {"dtype": v.dtype.name, "shape": v.shape, "data": _tobuffer(v)} for k, v in tensor_dict.items()}
+    serialized = serialize(flattened, metadata=metadata, order=order, alignment=alignment, checksums=checksums)
     result = bytes(serialized)
     return result
 
 
 def save_file(
-    tensor_dict: Dict[str, np.ndarray], filename: Union[str, os.PathLike], metadata: Optional[Dict[str, str]] = None
+    tensor_dict: Dict[str, np.ndarray],
+    filename: Union[str, os.PathLike],
+    metadata: Optional[Dict[str, str]] = None,
+    num_threads: Optional[int] = None,
+    order: Optional[Union[str, List[str]]] = None,
+    alignment: Optional[int] = None,
+    checksums: bool = False,
 ) -> None:
     """
     Saves a dictionary of tensors into raw bytes in bintensors format.
@@ -79,6 +116,20 @@ def save_file(
             Optional text only metadata you might want to save in your header.
             For instance it can be useful to specify more about the underlying
             tensors. This is purely informative and does not affect tensor loading.
+        num_threads (`int`, *optional*, defaults to `None`):
+            Number of threads writing tensors in parallel at their final offset
+            in the file. `0` uses all available cores, `None` writes sequentially.
+        order (`Union[str, List[str]]`, *optional*, defaults to `None`):
+            The layout order of the tensors in the file: `"dtype"` (the default),
+            `"natural"` (`h.2` before `h.10`), `"insertion"` or a list of names.
+            Without `alignment`, tensors whose size is not a multiple of 8 bytes
+            are placed last.
+        alignment (`int`, *optional*, defaults to `None`):
+            Start every tensor at a multiple of this many bytes in the file, a
+            power of two like `64` or `4096`. By default the tensors are packed.
+        checksums (`bool`, *optional*, defaults to `False`):
+            Record a checksum of every tensor in the header, so that
+            `safe_open(..., verify="lazy")` can check each tensor when it is first read.
 
     Returns:
         `None`
@@ -93,8 +144,16 @@ def save_file(
     save_file(tensors, "model.bintensors")
     ```
     """
-    flattened = {k: {"dtype": v.dtype.name, "shape": v.shape, "data": _tobytes(v)} for k, v in tensor_dict.items()}
-    serialize_file(filename, flattened, metadata=metadata)
+    flattened = {k: {"dtype": v.dtype.name, "shape": v.shape, "data": _tobuffer(v)} for k, v in tensor_dict.items()}
+    serialize_file(
+        filename,
+        flattened,
+        metadata=metadata,
+        num_threads=num_threads,
+        order=order,
+        alignment=alignment,
+        checksums=checksums,
+    )
 
 
 def save_with_checksum(
@@ -114,6 +173,7 @@ def save_with_checksum(
             tensors. This is purely informative and does not affect tensor loading.
         hasher (`Callable[[bytes], HASH]`):
             A hash is an object used to calculate a checksum of a string of information.
+            The SHA-1, SHA-2 and SHA-3 families are computed while serializing.
 
     Returns:
         `bytes`: The raw bytes representing the format
@@ -128,10 +188,118 @@ def save_with_checksum(
     checksum, byte_data = save_with_checksum(tensors)
     ```
     """
-    buffer = save(tensor_dict, metadata=metadata)
-    buffer = bytes(buffer)
-    result = hasher(buffer).digest(), buffer
-    return result
+    flattened = {k: {"dtype": v.dtype.name, "shape": v.shape, "data": _tobuffer(v)} for k, v in tensor_dict.items()}
+    return serialize_with_checksum(flattened, metadata=metadata, hasher=hasher)
+
+
+def save_file_with_checksum(
+    tensor_dict: Dict[str, np.ndarray],
+    filename: Union[str, os.PathLike],
+    metadata: Optional[Dict[str, str]] = None,
+    hasher: Callable[[bytes], HASH] = hashlib.sha1,
+    tree: bool = False,
+) -> bytes:
+    """
+    Saves a dictionary of tensors into a file in bintensors format, and returns the checksum of the file.
+    The checksum is computed while writing, in a single pass over the tensors.
+
+    Args:
+        tensor_dict (`Dict[str, np.ndarray]`):
+            The incoming tensors. Tensors need to be contiguous and dense.
+        filename (`str`, or `os.PathLike`)):
+            The filename we're saving into.
+        metadata (`Dict[str, str]`, *optional*, defaults to `None`):
+            Optional text only metadata you might want to save in your header.
+            For instance it can be useful to specify more about the underlying
+            tensors. This is purely informative and does not affect tensor loading.
+        hasher (`Callable[[bytes], HASH]`):
+            The `hashlib` constructor of the checksum, from the SHA-1, SHA-2 or SHA-3 families.
+        tree (`bool`, *optional*, defaults to `False`):
+            Return the tree hash of the file, which `bintensors.verify_file` checks
+            on several cores, instead of the plain hash.
+
+    Returns:
+        `bytes`: The checksum of the file, equal to the one of `save_with_checksum`.
+
+    Example:
+
+    ```python
+    from bintensors.numpy import save_file_with_checksum
+    import numpy as np
+
+    tensors = {"embedding": np.zeros((512, 1024)), "attention": np.zeros((256, 256))}
+    checksum = save_file_with_checksum(tensors, "model.bintensors")
+    ```
+    """
+    flattened = {k: {"dtype": v.dtype.name, "shape": v.shape, "data": _tobuffer(v)} for k, v in tensor_dict.items()}
+    return serialize_file_with_checksum(filename, flattened, metadata=metadata, hasher=hasher, tree=tree)
+
+
+def save_sharded(
+    tensor_dict: Dict[str, np.ndarray],
+    directory: Union[str, os.PathLike],
+    max_shard_size: Union[int, str] = "5GB",
+    metadata: Optional[Dict[str, str]] = None,
+    num_threads: Optional[int] = None,
+) -> List[str]:
+    """
+    Saves a dictionary of tensors into several bintensors files, along with an index
+    mapping every tensor to its file.
+
+    Args:
+        tensor_dict (`Dict[str, np.ndarray]`):
+            The incoming tensors. Tensors need to be contiguous and dense.
+        directory (`str`, or `os.PathLike`):
+            The directory we're saving into, created if needed.
+        max_shard_size (`Union[int, str]`, *optional*, defaults to `"5GB"`):
+            The maximum size of the tensors of one file, in bytes or like `"500MB"`.
+            Tensors are grouped in order, a larger tensor gets a file of its own.
+        metadata (`Dict[str, str]`, *optional*, defaults to `None`):
+            Optional text only metadata saved in every file and in the index.
+        num_threads (`int`, *optional*, defaults to `None`):
+            Number of files written at the same time, `None` writes all of them at once.
+
+    Returns:
+        `List[str]`: the names of the files written in `directory`.
+
+    Example:
+
+    ```python
+    from bintensors.numpy import save_sharded
+    import numpy as np
+
+    tensors = {"embedding": np.zeros((512, 1024)), "attention": np.zeros((256, 256))}
+    save_sharded(tensors, "model", max_shard_size="1MB")
+    ```
+    """
+    flattened = {k: {"dtype": v.dtype.name, "shape": v.shape, "data": _tobuffer(v)} for k, v in tensor_dict.items()}
+    sizes = {k: v.nbytes for k, v in tensor_dict.items()}
+    return _sharded.save_sharded(flattened, sizes, directory, max_shard_size, metadata, num_threads)
+
+
+def load_sharded(directory: Union[str, os.PathLike], num_threads: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    Loads a checkpoint saved with `save_sharded` into numpy format.
+
+    Args:
+        directory (`str`, or `os.PathLike`):
+            The directory containing the files and their index
+        num_threads (`int`, *optional*, defaults to `None`):
+            Number of threads copying the tensors out of each file, as for `load_file`.
+
+    Returns:
+        `Dict[str, np.ndarray]`: dictionary that contains name as key, value as `np.ndarray`
+
+    Example:
+
+    ```python
+    from bintensors.numpy import load_sharded
+
+    loaded = load_sharded("./my_folder/bert")
+    ```
+    """
+    with _sharded.sharded_open(directory, framework="np") as f:
+        return f.get_tensors(num_threads=num_threads)
 
 
 def load(data: bytes) -> Dict[str, np.ndarray]:
@@ -161,16 +329,37 @@ def load(data: bytes) -> Dict[str, np.ndarray]:
     return _view2np(flat)
 
 
-def load_file(filename: Union[str, os.PathLike]) -> Dict[str, np.ndarray]:
+def load_file(
+    filename: Union[str, os.PathLike],
+    num_threads: Optional[int] = None,
+    lazy: bool = False,
+    cache_bytes: Optional[int] = None,
+    dtype: Optional[Union[str, np.dtype]] = None,
+) -> Union[Dict[str, np.ndarray], LazyStateDict]:
     """
     Loads a bintensors file into numpy format.
 
     Args:
         filename (`str`, or `os.PathLike`)):
             The name of the file which contains the tensors
+        num_threads (`int`, *optional*, defaults to `None`):
+            Number of threads copying the tensors out of the file, with the file
+            read ahead first. `0` uses all available cores, `None` returns arrays
+            reading the file in place.
+        lazy (`bool`, *optional*, defaults to `False`):
+            Return a read-only mapping keeping the file open, which only loads
+            tensors when they are first accessed.
+        cache_bytes (`int`, *optional*, defaults to `None`):
+            With `lazy`, the byte budget of the least recently used tensors kept
+            by the mapping. `None` keeps every tensor accessed.
+        dtype (`Union[str, np.dtype]`, *optional*, defaults to `None`):
+            Convert the floating point arrays to this dtype in a single pass out of
+            the file, like `np.float32` to upcast a `float16` checkpoint. The other
+            arrays are kept as stored. Not supported with `lazy`.
 
     Returns:
-        `Dict[str, np.ndarray]`: dictionary that contains name as key, value as `np.ndarray`
+        `Dict[str, np.ndarray]`: dictionary that contains name as key, value as `np.ndarray`,
+        or a `LazyStateDict` with `lazy=True`.
 
     Example:
 
@@ -181,11 +370,12 @@ def load_file(filename: Union[str, os.PathLike]) -> Dict[str, np.ndarray]:
     loaded = load_file(file_path)
     ```
     """
-    result = {}
+    if lazy:
+        if dtype is not None:
+            raise ValueError("dtype is not supported with lazy=True")
+        return LazyStateDict(filename, framework="np", cache_bytes=cache_bytes)
     with safe_open(filename, framework="np") as f:
-        for k in f.offset_keys():
-            result[k] = f.get_tensor(k)
-    return result
+        return f.get_tensors(num_threads=num_threads, dtype=dtype)
 
 
 # np.float8 formats require 2.1; we do not support these dtypes on earlier versions
@@ -2,11 +2,15 @@ from __future__ import annotations
 import os
 import sys
 import hashlib
+import functools
 from _hashlib import HASH
 from collections import defaultdict
 from typing import Any, Dict, List, Optional, Set, Tuple, Union, Callable
 
 from bintensors import deserialize, safe_open, serialize, serialize_file
+from bintensors import serialize_file_with_checksum, serialize_with_checksum
+from bintensors._lazy import LazyStateDict
+from bintensors import _sharded
 
 # ensures that torch is installed
 try:
@@ -16,7 +20,18 @@ except ImportError:
         "Could not find the 'torch' module. To use this part of the package, please install torch: `pip install torch`."
     )
 
-__all__ = ["save_model", "save", "save_file", "load_model", "load", "load_file", "save_with_checksum"]
+__all__ = [
+    "save_model",
+    "save",
+    "save_file",
+    "save_sharded",
+    "load_model",
+    "load",
+    "load_file",
+    "load_sharded",
+    "save_with_checksum",
+    "save_file_with_checksum",
+]
 
 
 def storage_ptr(tensor: torch.Tensor) -> int:
@@ -328,7 +343,13 @@ def load_model(
     return missing, unexpected
 
 
-def save(tensors: Dict[str, torch.Tensor], metadata: Optional[Dict[str, str]] = None) -> bytes:
+def save(
+    tensors: Dict[str, torch.Tensor],
+    metadata: Optional[Dict[str, str]] = None,
+    order: Optional[Union[str, List[str]]] = None,
+    alignment: Optional[int] = None,
+    checksums: bool = False,
+) -> bytes:
     """
     Saves a dictionary of tensors into raw bytes in bintensors format.
 
@@ -339,6 +360,17 @@ def save(tensors: Dict[str, torch.Tensor], metadata: Optional[Dict[str, str]] =
             Optional text only metadata you might want to save in your header.
             For instance it can be useful to specify more about the underlying
             tensors. This is purely informative and does not affect tensor loading.
+        order (`Union[str, List[str]]`, *optional*, defaults to `None`):
+            The layout order of the tensors in the file: `"dtype"` (the default),
+            `"natural"` (`h.2` before `h.10`), `"insertion"` or a list of names.
+            Without `alignment`, tensors whose size is not a multiple of 8 bytes
+            are placed last.
+        alignment (`int`, *optional*, defaults to `None`):
+            Start every tensor at a multiple of this many bytes in the file, a
+            power of two like `64` or `4096`. By default the tensors are packed.
+        checksums (`bool`, *optional*, defaults to `False`):
+            Record a checksum of every tensor in the header, so that
+            `safe_open(..., verify="lazy")` can check each tensor when it is first read.
 
     Returns:
         `bytes`: The raw bytes representing the format
@@ -353,7 +385,7 @@ def save(tensors: Dict[str, torch.Tensor], metadata: Optional[Dict[str, str]] =
     byte_data = save(tensors)
     ```
     """
-    serialized = serialize(_flatten(tensors), metadata=metadata)
+    serialized = serialize(_flatten(tensors), metadata=metadata, order=order, alignment=alignment, checksums=checksums)
     result = bytes(serialized)
     return result
 
@@ -375,7 +407,8 @@ def save_with_checksum(
             tensors. This is purely informative and does not affect tensor loading.
         hasher (`Callable[[bytes], HASH]`):
             A hash is an object used to calculate a checksum of a string of information.
-            
+            The SHA-1, SHA-2 and SHA-3 families are computed while serializing.
+
     Returns:
         `bytes`: The raw bytes representing the format
 
@@ -389,17 +422,59 @@ def save_with_checksum(
     checksum, byte_data = save_with_checksum(tensors)
     ```
     """
+    return serialize_with_checksum(_flatten(tensor_dict), metadata=metadata, hasher=hasher)
 
-    buffer = save(tensor_dict, metadata=metadata)
-    buffer = bytes(buffer)
-    result = hasher(buffer).digest(), buffer
-    return result
+
+def save_file_with_checksum(
+    tensors: Dict[str, torch.Tensor],
+    filename: Union[str, os.PathLike],
+    metadata: Optional[Dict[str, str]] = None,
+    hasher: Callable[[bytes], HASH] = hashlib.sha1,
+    tree: bool = False,
+) -> bytes:
+    """
+    Saves a dictionary of tensors into a file in bintensors format, and returns the checksum of the file.
+    The checksum is computed while writing, in a single pass over the tensors.
+
+    Args:
+        tensors (`Dict[str, torch.Tensor]`):
+            The incoming tensors. Tensors need to be contiguous and dense.
+        filename (`str`, or `os.PathLike`)):
+            The filename we're saving into.
+        metadata (`Dict[str, str]`, *optional*, defaults to `None`):
+            Optional text only metadata you might want to save in your header.
+            For instance it can be useful to specify more about the underlying
+            tensors. This is purely informative and does not affect tensor loading.
+        hasher (`Callable[[bytes], HASH]`):
+            The `hashlib` constructor of the checksum, from the SHA-1, SHA-2 or SHA-3 families.
+        tree (`bool`, *optional*, defaults to `False`):
+            Return the tree hash of the file, which `bintensors.verify_file` checks
+            on several cores, instead of the plain hash.
+
+    Returns:
+        `bytes`: The checksum of the file, equal to the one of `save_with_checksum`.
+
+    Example:
+
+    ```python
+    from bintensors.torch import save_file_with_checksum
+    import torch
+
+    tensors = {"embedding": torch.zeros((512, 1024)), "attention": torch.zeros((256, 256))}
+    checksum = save_file_with_checksum(tensors, "model.bintensors")
+    ```
+    """
+    return serialize_file_with_checksum(filename, _flatten(tensors), metadata=metadata, hasher=hasher, tree=tree)
 
 
 def save_file(
     tensors: Dict[str, torch.Tensor],
     filename: Union[str, os.PathLike],
     metadata: Optional[Dict[str, str]] = None,
+    num_threads: Optional[int] = None,
+    order: Optional[Union[str, List[str]]] = None,
+    alignment: Optional[int] = None,
+    checksums: bool = False,
 ):
     """
     Saves a dictionary of tensors into raw bytes in bintensors format.
@@ -413,6 +488,20 @@ def save_file(
             Optional text only metadata you might want to save in your header.
             For instance it can be useful to specify more about the underlying
             tensors. This is purely informative and does not affect tensor loading.
+        num_threads (`int`, *optional*, defaults to `None`):
+            Number of threads writing tensors in parallel at their final offset
+            in the file. `0` uses all available cores, `None` writes sequentially.
+        order (`Union[str, List[str]]`, *optional*, defaults to `None`):
+            The layout order of the tensors in the file: `"dtype"` (the default),
+            `"natural"` (`h.2` before `h.10`), `"insertion"` or a list of names.
+            Without `alignment`, tensors whose size is not a multiple of 8 bytes
+            are placed last.
+        alignment (`int`, *optional*, defaults to `None`):
+            Start every tensor at a multiple of this many bytes in the file, a
+            power of two like `64` or `4096`. By default the tensors are packed.
+        checksums (`bool`, *optional*, defaults to `False`):
+            Record a checksum of every tensor in the header, so that
+            `safe_open(..., verify="lazy")` can check each tensor when it is first read.
 
     Returns:
         `None`
@@ -427,10 +516,25 @@ def save_file(
     save_file(tensors, "model.bintensors")
     ```
     """
-    serialize_file(filename, _flatten(tensors), metadata=metadata)
+    serialize_file(
+        filename,
+        _flatten(tensors),
+        metadata=metadata,
+        num_threads=num_threads,
+        order=order,
+        alignment=alignment,
+        checksums=checksums,
+    )
 
 
-def load_file(filename: Union[str, os.PathLike], device: Union[str, int] = "cpu") -> Dict[str, torch.Tensor]:
+def load_file(
+    filename: Union[str, os.PathLike],
+    device: Union[str, int] = "cpu",
+    num_threads: Optional[int] = None,
+    lazy: bool = False,
+    cache_bytes: Optional[int] = None,
+    dtype: Optional[torch.dtype] = None,
+) -> Union[Dict[str, torch.Tensor], LazyStateDict]:
     """
     Loads a bintensors file into torch format.
 
@@ -440,9 +544,24 @@ def load_file(filename: Union[str, os.PathLike], device: Union[str, int] = "cpu"
         device (`Union[str, int]`, *optional*, defaults to `cpu`):
             The device where the tensors need to be located after load.
             available options are all regular torch device locations.
+        num_threads (`int`, *optional*, defaults to `None`):
+            Number of threads copying the tensors out of the file, with the file
+            read ahead first. `0` uses all available cores, `None` loads sequentially.
+        lazy (`bool`, *optional*, defaults to `False`):
+            Return a read-only mapping keeping the file open, which only loads
+            tensors when they are first accessed.
+        cache_bytes (`int`, *optional*, defaults to `None`):
+            With `lazy`, the byte budget of the least recently used tensors kept
+            by the mapping. `None` keeps every tensor accessed.
+        dtype (`torch.dtype`, *optional*, defaults to `None`):
+            Convert the floating point tensors to this dtype in a single pass out of
+            the file, like `torch.float32` to upcast a `bfloat16` checkpoint, instead
+            of loading them and calling `.float()`. The other tensors are kept as
+            stored. Not supported with `lazy`.
 
     Returns:
-        `Dict[str, torch.Tensor]`: dictionary that contains name as key, value as `torch.Tensor`
+        `Dict[str, torch.Tensor]`: dictionary that contains name as key, value as `torch.Tensor`,
+        or a `LazyStateDict` with `lazy=True`.
 
     Example:
 
@@ -453,11 +572,83 @@ def load_file(filename: Union[str, os.PathLike], device: Union[str, int] = "cpu"
     loaded = load_file(file_path)
     ```
     """
-    result = {}
+    if lazy:
+        if dtype is not None:
+            raise ValueError("dtype is not supported with lazy=True")
+        return LazyStateDict(filename, framework="pt", device=device, cache_bytes=cache_bytes)
     with safe_open(filename, framework="pt", device=device) as f:
-        for k in f.offset_keys():
-            result[k] = f.get_tensor(k)
-    return result
+        return f.get_tensors(num_threads=num_threads, dtype=dtype)
+
+
+def save_sharded(
+    tensors: Dict[str, torch.Tensor],
+    directory: Union[str, os.PathLike],
+    max_shard_size: Union[int, str] = "5GB",
+    metadata: Optional[Dict[str, str]] = None,
+    num_threads: Optional[int] = None,
+) -> List[str]:
+    """
+    Saves a dictionary of tensors into several bintensors files, along with an index
+    mapping every tensor to its file.
+
+    Args:
+        tensors (`Dict[str, torch.Tensor]`):
+            The incoming tensors. Tensors need to be contiguous and dense.
+        directory (`str`, or `os.PathLike`):
+            The directory we're saving into, created if needed.
+        max_shard_size (`Union[int, str]`, *optional*, defaults to `"5GB"`):
+            The maximum size of the tensors of one file, in bytes or like `"500MB"`.
+            Tensors are grouped in order, a larger tensor gets a file of its own.
+        metadata (`Dict[str, str]`, *optional*, defaults to `None`):
+            Optional text only metadata saved in every file and in the index.
+        num_threads (`int`, *optional*, defaults to `None`):
+            Number of files written at the same time, `None` writes all of them at once.
+
+    Returns:
+        `List[str]`: the names of the files written in `directory`.
+
+    Example:
+
+    ```python
+    from bintensors.torch import save_sharded
+    import torch
+
+    tensors = {"embedding": torch.zeros((512, 1024)), "attention": torch.zeros((256, 256))}
+    save_sharded(tensors, "model", max_shard_size="1MB")
+    ```
+    """
+    sizes = {k: v.numel() * v.element_size() for k, v in tensors.items()}
+    return _sharded.save_sharded(_flatten(tensors), sizes, directory, max_shard_size, metadata, num_threads)
+
+
+def load_sharded(
+    directory: Union[str, os.PathLike], device: Union[str, int] = "cpu", num_threads: Optional[int] = None
+) -> Dict[str, torch.Tensor]:
+    """
+    Loads a checkpoint saved with `save_sharded` into torch format.
+
+    Args:
+        directory (`str`, or `os.PathLike`):
+            The directory containing the files and their index
+        device (`Union[str, int]`, *optional*, defaults to `cpu`):
+            The device where the tensors need to be located after load.
+            available options are all regular torch device locations.
+        num_threads (`int`, *optional*, defaults to `None`):
+            Number of threads copying the tensors out of each file, as for `load_file`.
+
+    Returns:
+        `Dict[str, torch.Tensor]`: dictionary that contains name as key, value as `torch.Tensor`
+
+    Example:
+
+    ```python
+    from bintensors.torch import load_sharded
+
+    loaded = load_sharded("./my_folder/bert")
+    ```
+    """
+    with _sharded.sharded_open(directory, framework="pt", device=device) as f:
+        return f.get_tensors(num_threads=num_threads)
 
 
 def load(data: bytes) -> Dict[str, torch.Tensor]:
@@ -566,7 +757,24 @@ def _view2torch(safeview) -> Dict[str, torch.Tensor]:
     return result
 
 
-def _tobytes(tensor: torch.Tensor, name: str) -> bytes:
+class _ByteView:
+    """
+    Exposes the memory of a dense CPU tensor as a flat `uint8` buffer through
+    `__array_interface__`, so the rust binding can read it in place. Keeps a
+    reference on the tensor for as long as the view is alive.
+    """
+
+    def __init__(self, tensor: torch.Tensor, nbytes: int):
+        self.tensor = tensor
+        self.__array_interface__ = {
+            "shape": (nbytes,),
+            "typestr": "|u1",
+            "data": (tensor.data_ptr(), True),
+            "version": 3,
+        }
+
+
+def _check_dense(tensor: torch.Tensor, name: str) -> None:
     if tensor.layout != torch.strided:
         raise ValueError(
             f"You are trying to save a sparse tensor: `{name}` which this library does not support."
@@ -581,27 +789,21 @@ def _tobytes(tensor: torch.Tensor, name: str) -> bytes:
             " only the full tensors, and reslice at load time, or simply call `.contiguous()` on your tensor to"
             " pack it before saving."
         )
+
+
+def _tobuffer(tensor: torch.Tensor, name: str) -> Union[bytes, "_ByteView", "np.ndarray"]:
+    _check_dense(tensor, name)
     if tensor.device.type != "cpu":
         # Moving tensor to cpu before saving
         tensor = tensor.to("cpu")
 
-    import ctypes
-
-    import numpy as np
-
-    # When shape is empty (scalar), np.prod returns a float
-    # we need a int for the following calculations
-    length = int(np.prod(tensor.shape).item())
-    bytes_per_item = _SIZE[tensor.dtype]
-
-    total_bytes = length * bytes_per_item
-
-    ptr = tensor.data_ptr()
-    if ptr == 0:
+    total_bytes = tensor.numel() * _SIZE[tensor.dtype]
+    if tensor.data_ptr() == 0 or total_bytes == 0:
         return b""
-    newptr = ctypes.cast(ptr, ctypes.POINTER(ctypes.c_ubyte))
-    data = np.ctypeslib.as_array(newptr, (total_bytes,))  # no internal copy
+    data = _ByteView(tensor, total_bytes)  # no internal copy
     if sys.byteorder == "big":
+        import numpy as np
+
         NPDTYPES = {
             torch.int64: np.int64,
             torch.float32: np.float32,
@@ -620,8 +822,9 @@ def _tobytes(tensor: torch.Tensor, name: str) -> bytes:
         }
         npdtype = NPDTYPES[tensor.dtype]
         # Not in place as that would potentially modify a live running model
-        data = data.view(npdtype).byteswap(inplace=False)
-    return data.tobytes()
+        data = np.asarray(data).view(npdtype).byteswap(inplace=False)
+        data = data.view(data.dtype.newbyteorder("<"))
+    return data
 
 
 def _flatten(tensors: Dict[str, torch.Tensor]) -> Dict[str, Dict[str, Any]]:
@@ -635,15 +838,19 @@ def _flatten(tensors: Dict[str, torch.Tensor]) -> Dict[str, Dict[str, Any]]:
 
     Returns:
         `Dict[str, Dict[str, Any]]`: dictionary object of the layers within the state dict with metadata for serializing in bintensors.
+        `data` is a zero-copy view on the tensor memory (exposing `__array_interface__`) rather than `bytes`.
+        For tensors that are not on cpu, or on big-endian hosts, `data` is a callable producing the buffer
+        when the tensor is written.
 
     ### Example
     ```
+    import numpy as np
     import torch
     from bintensors.torch import _flatten
 
     tensors = { "ln.weight" : torch.zeros((2,2), dtype=torch.int8) }
     flatten_t = _flatten(tensors)
-    assert {'ln.weight': {'dtype': 'int8', 'shape': torch.Size([2, 2]), 'data': b'\x00\x00\x00\x00'}} == flatten_t
+    assert bytes(memoryview(np.asarray(flatten_t["ln.weight"]["data"]))) == b"\x00\x00\x00\x00"
     ```
     """
     if not isinstance(tensors, dict):
@@ -678,11 +885,18 @@ def _flatten(tensors: Dict[str, torch.Tensor]) -> Dict[str, Dict[str, Any]]:
             """
         )
 
-    return {
-        k: {
+    flattened = {}
+    for k, v in tensors.items():
+        _check_dense(v, k)
+        if v.device.type == "cpu" and sys.byteorder == "little":
+            data = _tobuffer(v, k)
+        else:
+            # Device transfer and byteswap are deferred until the tensor is written,
+            # so only one host copy is alive at a time.
+            data = functools.partial(_tobuffer, v, k)
+        flattened[k] = {
             "dtype": str(v.dtype).split(".")[-1],
             "shape": v.shape,
-            "data": _tobytes(v, k),
+            "data": data,
         }
-        for k, v in tensors.items()
-    }
+    return flattened
@@ -3,22 +3,28 @@ use pyo3::exceptions::{PyException, PyFileNotFoundError};
 use pyo3::prelude::*;
 use pyo3::sync::OnceLockExt;
 use pyo3::types::IntoPyDict;
-use pyo3::types::{PyBool, PyByteArray, PyBytes, PyDict, PyList, PySlice};
+use pyo3::types::{PyBool, PyByteArray, PyBytes, PyDict, PyList, PySlice, PyTuple};
 use pyo3::Bound as PyBound;
 use pyo3::{intern, PyErr};
 
 use bintensors::slice::TensorIndexer;
-use bintensors::tensor::{BinTensors, Dtype, Metadata, TensorInfo, TensorView};
+use bintensors::tensor::{
+    BinTensors, Dtype, Layout, Metadata, PreparedTensors, TensorInfo, TensorOrder, TensorView,
+    TreeHash,
+};
 use bintensors::View;
+use sha2::Digest;
 
 use std::borrow::Cow;
-use std::collections::HashMap;
+use std::collections::{BTreeMap, HashMap, HashSet};
 use std::fs::File;
 use std::iter::FromIterator;
 use std::ops::Bound;
 use std::path::PathBuf;
 use std::sync::Arc;
+use std::sync::Mutex;
 use std::sync::OnceLock;
+use std::time::Instant;
 
 static TORCH_MODULE: OnceLock<Py<PyModule>> = OnceLock::new();
 static NUMPY_MODULE: OnceLock<Py<PyModule>> = OnceLock::new();
@@ -26,16 +32,105 @@ static TENSORFLOW_MODULE: OnceLock<Py<PyModule>> = OnceLock::new();
 static FLAX_MODULE: OnceLock<Py<PyModule>> = OnceLock::new();
 static MLX_MODULE: OnceLock<Py<PyModule>> = OnceLock::new();
 
+/// Same as Python's `sys.byteorder == "big"`, tensors are stored little-endian.
+const BIG_ENDIAN: bool = cfg!(target_endian = "big");
+
+/// Size of the pieces large tensors are cut into by the parallel loader.
+const LOAD_CHUNK_SIZE: usize = 4 * 1024 * 1024;
+
+enum PyData<'a> {
+    /// Bytes read in place from a pinned Python buffer.
+    Borrowed(&'a [u8]),
+    /// A zero-arg Python callable producing the buffer on demand.
+    Lazy(&'a Py<PyAny>),
+}
+
+/// The buffer returned by the producer of a lazy tensor, read in place.
+struct Produced {
+    _owner: Py<PyAny>,
+    ptr: *const u8,
+    len: usize,
+}
+
+// SAFETY: the buffer behind `ptr` is only read, and is kept alive by `_owner`,
+// a `Py` which may be moved between threads.
+unsafe impl Send for Produced {}
+
+impl Produced {
+    fn data(&self) -> &[u8] {
+        if self.len == 0 {
+            &[]
+        } else {
+            // SAFETY: `_owner` keeps the exported buffer alive as long as `self`.
+            unsafe { std::slice::from_raw_parts(self.ptr, self.len) }
+        }
+    }
+}
+
+/// State shared by the lazy tensors of one serialization.
+#[derive(Default)]
+struct LazyState {
+    /// First error raised by a producer, reported once writing is over.
+    error: Option<PyErr>,
+    /// The last produced tensor, released when the next one is produced.
+    produced: Option<Produced>,
+}
+
 struct PyView<'a> {
     shape: Vec<usize>,
     dtype: Dtype,
-    data: PyBound<'a, PyBytes>,
-    data_len: usize,
+    data: PyData<'a>,
+    /// Shared by all the views of one serialization.
+    lazy: &'a Mutex<LazyState>,
+}
+
+impl PyView<'_> {
+    /// Call the producer of a lazy tensor and keep the buffer it returns in
+    /// `state`, in place of the previous one, so at most one materialized
+    /// tensor is alive at a time and its bytes are not copied.
+    fn produce(&self, producer: &Py<PyAny>, state: &mut LazyState) -> PyResult<()> {
+        Python::with_gil(|py| {
+            // Release the previous tensor before materializing this one.
+            state.produced = None;
+            let buffer = producer.call0(py)?;
+            let (owner, ptr, len) = buffer_parts(buffer.into_bound(py))?;
+            check_produced_len(&self.shape, self.dtype, len)?;
+            state.produced = Some(Produced {
+                _owner: owner.unbind(),
+                ptr,
+                len,
+            });
+            Ok(())
+        })
+    }
 }
 
 impl View for &PyView<'_> {
     fn data(&self) -> std::borrow::Cow<[u8]> {
-        Cow::Borrowed(self.data.as_bytes())
+        match self.data {
+            PyData::Borrowed(data) => Cow::Borrowed(data),
+            PyData::Lazy(producer) => {
+                let mut state = self.lazy.lock().unwrap_or_else(|e| e.into_inner());
+                if state.error.is_none() {
+                    match self.produce(producer, &mut state) {
+                        Ok(()) => {
+                            let data = state.produced.as_ref().map_or(&[][..], Produced::data);
+                            // SAFETY: the buffer stays in `state` until the next
+                            // lazy tensor is produced. Lazy tensors are only given
+                            // to the sequential serializers, which drop the data of
+                            // a tensor before asking for the next one, as
+                            // `bintensors::View::data` documents.
+                            return Cow::Borrowed(unsafe {
+                                std::slice::from_raw_parts(data.as_ptr(), data.len())
+                            });
+                        }
+                        Err(e) => state.error = Some(e),
+                    }
+                }
+                // Keep the layout consistent, the output is discarded anyway.
+                Cow::Owned(vec![0; self.data_len()])
+            }
+        }
     }
     fn shape(&self) -> &[usize] {
         &self.shape
@@ -44,89 +139,490 @@ impl View for &PyView<'_> {
         self.dtype
     }
     fn data_len(&self) -> usize {
-        self.data_len
+        match self.data {
+            PyData::Borrowed(data) => data.len(),
+            PyData::Lazy(_) => self.shape.iter().product::<usize>() * self.dtype.size(),
+        }
+    }
+}
+
+enum PyTensorData<'py> {
+    /// The bytes are read in place from the `data` object, which is kept
+    /// referenced by `_owner` so the pointer stays valid while the GIL is
+    /// released, even if the caller mutates the original dict concurrently.
+    Buffer {
+        _owner: PyBound<'py, PyAny>,
+        ptr: *const u8,
+        len: usize,
+    },
+    Lazy(PyBound<'py, PyAny>),
+}
+
+/// A tensor description extracted from the Python dict.
+struct PyTensor<'py> {
+    shape: Vec<usize>,
+    dtype: Dtype,
+    data: PyTensorData<'py>,
+}
+
+impl PyTensor<'_> {
+    fn data(&self) -> PyData<'_> {
+        match &self.data {
+            PyTensorData::Buffer { len: 0, .. } => PyData::Borrowed(&[]),
+            // SAFETY: `ptr` and `len` describe the contiguous buffer exported by
+            // `_owner`, which we hold a strong reference to for our whole lifetime.
+            PyTensorData::Buffer { ptr, len, .. } => {
+                PyData::Borrowed(unsafe { std::slice::from_raw_parts(*ptr, *len) })
+            }
+            PyTensorData::Lazy(producer) => PyData::Lazy(producer.as_unbound()),
+        }
+    }
+
+    fn is_lazy(&self) -> bool {
+        matches!(self.data, PyTensorData::Lazy(_))
+    }
+}
+
+/// Locate the contiguous bytes behind a tensor's `data` entry without copying
+/// them. Accepts `bytes`, any object exposing `__array_interface__` (numpy
+/// arrays, torch views, ...) and other buffer protocol objects such as
+/// `memoryview` or `bytearray`, which are wrapped with `numpy.frombuffer`.
+fn buffer_parts<'py>(
+    data: PyBound<'py, PyAny>,
+) -> PyResult<(PyBound<'py, PyAny>, *const u8, usize)> {
+    if let Ok(bytes) = data.downcast::<PyBytes>() {
+        let (ptr, len) = (bytes.as_bytes().as_ptr(), bytes.as_bytes().len());
+        return Ok((data, ptr, len));
+    }
+    let (data, ptr, len, _readonly) = array_parts(data)?;
+    Ok((data, ptr, len))
+}
+
+/// Locate the contiguous bytes behind a writable buffer, a `bytearray`,
+/// `memoryview`, `mmap.mmap`, shared memory segment or numpy array.
+fn writable_buffer_parts<'py>(
+    data: PyBound<'py, PyAny>,
+) -> PyResult<(PyBound<'py, PyAny>, *mut u8, usize)> {
+    let (data, ptr, len, readonly) = array_parts(data)?;
+    if readonly {
+        return Err(BinTensorError::new_err(
+            "Buffer is read-only, expected a writable buffer like a `bytearray`",
+        ));
+    }
+    Ok((data, ptr as *mut u8, len))
+}
+
+/// Reads `__array_interface__`, wrapping plain buffers with `numpy.frombuffer`.
+/// Gives back the array owning the bytes, their address, their length and
+/// whether they are read-only.
+fn array_parts<'py>(
+    data: PyBound<'py, PyAny>,
+) -> PyResult<(PyBound<'py, PyAny>, *const u8, usize, bool)> {
+    let py = data.py();
+    let data = if data.hasattr(intern!(py, "__array_interface__"))? {
+        data
+    } else {
+        let numpy = PyModule::import(py, intern!(py, "numpy"))?;
+        numpy
+            .getattr(intern!(py, "frombuffer"))?
+            .call1((data, intern!(py, "uint8")))?
+    };
+
+    let interface = data.getattr(intern!(py, "__array_interface__"))?;
+    let interface = interface.downcast::<PyDict>()?;
+    let get = |key: &str| -> PyResult<PyBound<'py, PyAny>> {
+        interface.get_item(key)?.ok_or_else(|| {
+            BinTensorError::new_err(format!("Missing `{key}` in `__array_interface__`"))
+        })
+    };
+
+    let shape: Vec<usize> = get("shape")?.extract()?;
+    let typestr: String = get("typestr")?.extract()?;
+    if typestr.starts_with('>') {
+        return Err(BinTensorError::new_err(format!(
+            "Buffer with typestr {typestr} is big-endian, it must be byteswapped before saving"
+        )));
     }
+    let itemsize: usize = typestr
+        .get(2..)
+        .and_then(|size| size.parse().ok())
+        .ok_or_else(|| BinTensorError::new_err(format!("Unsupported buffer typestr {typestr}")))?;
+
+    if let Some(strides) = interface.get_item("strides")? {
+        if !strides.is_none() {
+            let strides: Vec<usize> = strides.extract()?;
+            let mut expected = itemsize;
+            for (&dim, &stride) in shape.iter().zip(&strides).rev() {
+                if dim > 1 && stride != expected {
+                    return Err(BinTensorError::new_err(
+                        "Buffer is not contiguous, tensors need to be contiguous and dense",
+                    ));
+                }
+                expected *= dim;
+            }
+        }
+    }
+
+    let (ptr, readonly): (usize, bool) = get("data")?.extract()?;
+    let len = shape.iter().product::<usize>() * itemsize;
+    Ok((data, ptr as *const u8, len, readonly))
+}
+
+/// The dtype of a framework dtype name, like `float32` or `bfloat16`.
+fn dtype_from_name(name: &str) -> PyResult<Dtype> {
+    let dtype = match name {
+        "bool" => Dtype::BOOL,
+        "int8" => Dtype::I8,
+        "uint8" => Dtype::U8,
+        "int16" => Dtype::I16,
+        "uint16" => Dtype::U16,
+        "int32" => Dtype::I32,
+        "uint32" => Dtype::U32,
+        "int64" => Dtype::I64,
+        "uint64" => Dtype::U64,
+        "float16" => Dtype::F16,
+        "float32" => Dtype::F32,
+        "float64" => Dtype::F64,
+        "bfloat16" => Dtype::BF16,
+        "float8_e4m3fn" => Dtype::F8_E4M3,
+        "float8_e5m2" => Dtype::F8_E5M2,
+        dtype_str => {
+            return Err(BinTensorError::new_err(format!(
+                "dtype {dtype_str} is not covered",
+            )));
+        }
+    };
+    Ok(dtype)
 }
 
-fn prepare(tensor_dict: HashMap<String, PyBound<PyDict>>) -> PyResult<HashMap<String, PyView>> {
-    let mut tensors = HashMap::with_capacity(tensor_dict.len());
-    for (tensor_name, tensor_desc) in &tensor_dict {
+/// Reads the `dtype` argument of the loaders: a name like `"float32"`, or a
+/// numpy, torch or mlx dtype.
+fn requested_dtype(dtype: &PyBound<'_, PyAny>) -> PyResult<Dtype> {
+    if let Ok(name) = dtype.extract::<String>() {
+        return dtype_from_name(&name);
+    }
+    let repr = dtype.str()?.to_string();
+    if let Some(name) = repr
+        .strip_prefix("torch.")
+        .or_else(|| repr.strip_prefix("mlx.core."))
+    {
+        return dtype_from_name(name);
+    }
+    // `np.float32`, `np.dtype("float32")` or a jax dtype.
+    let py = dtype.py();
+    let name: String = PyModule::import(py, intern!(py, "numpy"))?
+        .call_method1(intern!(py, "dtype"), (dtype,))?
+        .getattr(intern!(py, "name"))?
+        .extract()?;
+    dtype_from_name(&name)
+}
+
+/// The dtype a tensor stored as `stored` is loaded as when `dtype` is asked
+/// for every tensor: floating point tensors are converted, the others are
+/// kept as stored.
+fn load_dtype(stored: Dtype, dtype: Option<Dtype>) -> Dtype {
+    match (stored, dtype) {
+        (
+            Dtype::F8_E5M2 | Dtype::F8_E4M3 | Dtype::F16 | Dtype::BF16 | Dtype::F32 | Dtype::F64,
+            Some(dtype),
+        ) => dtype,
+        _ => stored,
+    }
+}
+
+/// Fails unless a tensor stored as `from` can be loaded as `to`.
+fn check_conversion(from: Dtype, to: Dtype) -> PyResult<()> {
+    if !bintensors::convert::is_supported(from, to) {
+        return Err(BinTensorError::new_err(format!(
+            "Cannot convert {from:?} to {to:?}, F16, BF16, F32 and F64 convert into each other and F8 to F16 and F32"
+        )));
+    }
+    Ok(())
+}
+
+fn prepare<'py>(tensor_dict: &PyBound<'py, PyDict>) -> PyResult<Vec<(String, PyTensor<'py>)>> {
+    let mut tensors = Vec::with_capacity(tensor_dict.len());
+    // Iterating the dict keeps the insertion order, used by `order="insertion"`.
+    for (tensor_name, tensor_desc) in tensor_dict.iter() {
+        let tensor_name: String = tensor_name.extract()?;
+        let tensor_desc = tensor_desc.downcast_into::<PyDict>()?;
         let shape: Vec<usize> = tensor_desc
             .get_item("shape")?
             .ok_or_else(|| BinTensorError::new_err(format!("Missing `shape` in {tensor_desc:?}")))?
             .extract()?;
-        let pydata: PyBound<PyAny> = tensor_desc
-            .get_item("data")?
-            .ok_or_else(|| BinTensorError::new_err(format!("Missing `data` in {tensor_desc:?}")))?;
-        // Make sure it's extractable first.
-        let data: &[u8] = pydata.extract()?;
-        let data_len = data.len();
-        let data: PyBound<PyBytes> = pydata.extract()?;
         let pydtype = tensor_desc.get_item("dtype")?.ok_or_else(|| {
             BinTensorError::new_err(format!("Missing `dtype` in {tensor_desc:?}"))
         })?;
         let dtype: String = pydtype.extract()?;
-        let dtype = match dtype.as_ref() {
-            "bool" => Dtype::BOOL,
-            "int8" => Dtype::I8,
-            "uint8" => Dtype::U8,
-            "int16" => Dtype::I16,
-            "uint16" => Dtype::U16,
-            "int32" => Dtype::I32,
-            "uint32" => Dtype::U32,
-            "int64" => Dtype::I64,
-            "uint64" => Dtype::U64,
-            "float16" => Dtype::F16,
-            "float32" => Dtype::F32,
-            "float64" => Dtype::F64,
-            "bfloat16" => Dtype::BF16,
-            "float8_e4m3fn" => Dtype::F8_E4M3,
-            "float8_e5m2" => Dtype::F8_E5M2,
-            dtype_str => {
-                return Err(BinTensorError::new_err(format!(
-                    "dtype {dtype_str} is not covered",
-                )));
+        let dtype = dtype_from_name(&dtype)?;
+
+        let pydata: PyBound<PyAny> = tensor_desc
+            .get_item("data")?
+            .ok_or_else(|| BinTensorError::new_err(format!("Missing `data` in {tensor_desc:?}")))?;
+        let data = if pydata.is_callable() {
+            PyTensorData::Lazy(pydata)
+        } else {
+            let (owner, ptr, len) = buffer_parts(pydata)?;
+            PyTensorData::Buffer {
+                _owner: owner,
+                ptr,
+                len,
             }
         };
 
-        let tensor = PyView {
-            shape,
-            dtype,
-            data,
-            data_len,
-        };
-        tensors.insert(tensor_name.to_string(), tensor);
+        let tensor = PyTensor { shape, dtype, data };
+        tensors.push((tensor_name, tensor));
     }
     Ok(tensors)
 }
 
+/// Fails when a lazy tensor produced `len` bytes, not the size of its `shape`
+/// and `dtype`.
+fn check_produced_len(shape: &[usize], dtype: Dtype, len: usize) -> PyResult<()> {
+    let expected = shape.iter().product::<usize>() * dtype.size();
+    if len != expected {
+        return Err(BinTensorError::new_err(format!(
+            "Lazy tensor produced {len} bytes, expected {expected} from its shape {shape:?} and dtype {dtype:?}"
+        )));
+    }
+    Ok(())
+}
+
+/// Calls the producers of the lazy tensors up front and pins their buffers.
+/// Checksums are computed before the tensors are written, producing them
+/// there would call every producer twice and hash a different copy than the
+/// one written.
+fn produce_lazy(tensors: &mut [(String, PyTensor<'_>)]) -> PyResult<()> {
+    for (_, tensor) in tensors.iter_mut() {
+        if let PyTensorData::Lazy(producer) = &tensor.data {
+            let (owner, ptr, len) = buffer_parts(producer.call0()?)?;
+            check_produced_len(&tensor.shape, tensor.dtype, len)?;
+            tensor.data = PyTensorData::Buffer {
+                _owner: owner,
+                ptr,
+                len,
+            };
+        }
+    }
+    Ok(())
+}
+
+/// Borrow plain byte views out of the pinned tensors. The result is `Send`
+/// and can be handed to `Python::allow_threads`, lazy tensors re-acquire the
+/// GIL when their data is requested and report failures into `lazy`.
+fn views<'a>(
+    tensors: &'a [(String, PyTensor<'_>)],
+    lazy: &'a Mutex<LazyState>,
+) -> Vec<(&'a str, PyView<'a>)> {
+    tensors
+        .iter()
+        .map(|(name, tensor)| {
+            let view = PyView {
+                shape: tensor.shape.clone(),
+                dtype: tensor.dtype,
+                data: tensor.data(),
+                lazy,
+            };
+            (name.as_str(), view)
+        })
+        .collect()
+}
+
 /// Serializes raw data.
 ///
 /// Args:
 ///     tensor_dict (`Dict[str, Dict[Any]]`):
 ///         The tensor dict is like:
 ///             {"tensor_name": {"dtype": "F32", "shape": [2, 3], "data": b"\0\0"}}
+///         `data` can be any contiguous buffer (`bytes`, `memoryview`, numpy array,
+///         object exposing `__array_interface__`), it is read in place. It can
+///         also be a callable taking no argument and returning such a buffer, it
+///         is then only called when the tensor is written.
 ///     metadata (`Dict[str, str]`, *optional*):
 ///         The optional purely text annotations
+///     order (`Union[str, List[str]]`, *optional*):
+///         The order of the tensors in the file: `"dtype"` (the default, by
+///         descending dtype size then name), `"natural"` (by name, with numbers
+///         compared by value so `h.2` comes before `h.10`), `"insertion"` (the
+///         order of `tensor_dict`) or a list of names, the tensors which are
+///         not listed coming after them in natural order. Without `alignment`,
+///         tensors whose size is not a multiple of 8 bytes are placed last to
+///         keep every tensor aligned.
+///     alignment (`int`, *optional*):
+///         Start every tensor at a multiple of this many bytes from the beginning
+///         of the file, a power of two like `64` for SIMD loads or `4096` for
+///         page aligned views. The alignment is recorded in the header and the
+///         gaps are filled with zeros. By default the tensors are packed.
+///     checksums (`bool`, *optional*):
+///         Record an xxh3 checksum of every tensor in the header, which
+///         `safe_open(..., verify="lazy")` checks when the tensor is first read.
+///         The data of every tensor is read once more to compute them, and
+///         callable `data` entries are all called before anything is written.
 ///
 /// Returns:
 ///     (`bytes`):
 ///         The serialized content.
 #[pyfunction]
-#[pyo3(signature = (tensor_dict, metadata=None))]
+#[pyo3(signature = (tensor_dict, metadata=None, order=None, alignment=None, checksums=false))]
 fn serialize<'py>(
     py: Python<'py>,
-    tensor_dict: HashMap<String, PyBound<PyDict>>,
+    tensor_dict: PyBound<PyDict>,
     metadata: Option<HashMap<String, String>>,
+    order: Option<Order>,
+    alignment: Option<usize>,
+    checksums: bool,
 ) -> PyResult<PyBound<'py, PyBytes>> {
-    let tensors = prepare(tensor_dict)?;
-    let metadata_map = metadata.map(HashMap::from_iter);
-    let out = bintensors::tensor::serialize(&tensors, &metadata_map)
+    let mut tensors = prepare(&tensor_dict)?;
+    if checksums {
+        produce_lazy(&mut tensors)?;
+    }
+    let layout = layout(order, alignment, checksums);
+    let state = Mutex::default();
+    let views = views(&tensors, &state);
+    // Laid out once, the checksums are computed here and reused for the write.
+    let prepared = py
+        .allow_threads(|| {
+            let data = views.iter().map(|(k, v)| (*k, v));
+            PreparedTensors::new(data, &metadata, &layout)
+        })
         .map_err(|e| BinTensorError::new_err(format!("Error while serializing: {e:?}")))?;
-    let pybytes = PyBytes::new(py, &out);
+    // Lazy tensors are produced one at a time, in file order, the others are
+    // copied on several threads.
+    #[cfg(feature = "parallel")]
+    let lazy = tensors.iter().any(|(_, t)| t.is_lazy());
+    // Write straight into the `bytes` object, the tensors are copied only once.
+    let pybytes = PyBytes::new_with(py, prepared.size(), |buffer| {
+        py.allow_threads(|| {
+            #[cfg(feature = "parallel")]
+            if !lazy {
+                return prepared.write_into_parallel(buffer, 0);
+            }
+            prepared.write_into(buffer)
+        })
+        .map_err(|e| BinTensorError::new_err(format!("Error while serializing: {e:?}")))?;
+        Ok(())
+    })?;
+    drop(prepared);
+    drop(views);
+    if let Some(err) = state.into_inner().unwrap_or_else(|e| e.into_inner()).error {
+        return Err(err);
+    }
     Ok(pybytes)
 }
 
+/// Computes the size of the serialized data, without serializing it.
+///
+/// Args:
+///     tensor_dict (`Dict[str, Dict[Any]]`):
+///         The tensor dict, as for `serialize`. The `data` of the tensors is
+///         only read with `checksums`, to hash it.
+///     metadata (`Dict[str, str]`, *optional*):
+///         The optional purely text annotations
+///     order (`Union[str, List[str]]`, *optional*):
+///         The order of the tensors, as for `serialize`.
+///     alignment (`int`, *optional*):
+///         The alignment of the tensors, as for `serialize`.
+///     checksums (`bool`, *optional*):
+///         Record the checksums of the tensors, as for `serialize`.
+///
+/// Returns:
+///     (`int`):
+///         The number of bytes `serialize` returns and `serialize_into` writes.
+#[pyfunction]
+#[pyo3(signature = (tensor_dict, metadata=None, order=None, alignment=None, checksums=false))]
+fn serialized_size(
+    tensor_dict: PyBound<PyDict>,
+    metadata: Option<HashMap<String, String>>,
+    order: Option<Order>,
+    alignment: Option<usize>,
+    checksums: bool,
+) -> PyResult<usize> {
+    let mut tensors = prepare(&tensor_dict)?;
+    if checksums {
+        produce_lazy(&mut tensors)?;
+    }
+    let state = Mutex::default();
+    let views = views(&tensors, &state);
+    let data = views.iter().map(|(k, v)| (*k, v));
+    let size =
+        bintensors::tensor::serialized_size(data, &metadata, &layout(order, alignment, checksums))
+            .map_err(|e| BinTensorError::new_err(format!("Error while serializing: {e:?}")))?;
+    drop(views);
+    if let Some(err) = state.into_inner().unwrap_or_else(|e| e.into_inner()).error {
+        return Err(err);
+    }
+    Ok(size)
+}
+
+/// Serializes raw data into an existing writable buffer.
+///
+/// Args:
+///     buffer (`Union[bytearray, memoryview, mmap.mmap]`):
+///         The contiguous writable buffer to write into, from its start. It can
+///         be any buffer protocol object, like the `buf` of a
+///         `multiprocessing.shared_memory.SharedMemory`, and must hold at least
+///         `serialized_size(...)` bytes.
+///     tensor_dict (`Dict[str, Dict[Any]]`):
+///         The tensor dict, as for `serialize`.
+///     metadata (`Dict[str, str]`, *optional*):
+///         The optional purely text annotations
+///     order (`Union[str, List[str]]`, *optional*):
+///         The order of the tensors, as for `serialize`.
+///     alignment (`int`, *optional*):
+///         The alignment of the tensors, as for `serialize`.
+///     checksums (`bool`, *optional*):
+///         Record the checksums of the tensors, as for `serialize`.
+///
+/// Returns:
+///     (`int`):
+///         The number of bytes written, the rest of `buffer` is left untouched.
+#[pyfunction]
+#[pyo3(signature = (buffer, tensor_dict, metadata=None, order=None, alignment=None, checksums=false))]
+fn serialize_into(
+    py: Python<'_>,
+    buffer: PyBound<PyAny>,
+    tensor_dict: PyBound<PyDict>,
+    metadata: Option<HashMap<String, String>>,
+    order: Option<Order>,
+    alignment: Option<usize>,
+    checksums: bool,
+) -> PyResult<usize> {
+    let mut tensors = prepare(&tensor_dict)?;
+    if checksums {
+        produce_lazy(&mut tensors)?;
+    }
+    let layout = layout(order, alignment, checksums);
+    let (_owner, ptr, len) = writable_buffer_parts(buffer)?;
+    let buffer: &mut [u8] = if len == 0 {
+        &mut []
+    } else {
+        // SAFETY: `_owner` keeps the exported buffer alive until the end of this scope.
+        unsafe { std::slice::from_raw_parts_mut(ptr, len) }
+    };
+    let state = Mutex::default();
+    let views = views(&tensors, &state);
+    let written = py
+        .allow_threads(|| {
+            let data = views.iter().map(|(k, v)| (*k, v));
+            bintensors::tensor::serialize_into(data, &metadata, &layout, buffer)
+        })
+        .map_err(|e| BinTensorError::new_err(format!("Error while serializing: {e:?}")))?;
+    drop(views);
+    if let Some(err) = state.into_inner().unwrap_or_else(|e| e.into_inner()).error {
+        return Err(err);
+    }
+    Ok(written)
+}
+
+/// Builds the layout from the `order`, `alignment` and `checksums` arguments.
+fn layout(order: Option<Order>, alignment: Option<usize>, checksums: bool) -> Layout {
+    Layout {
+        order: order.unwrap_or_default().0,
+        alignment,
+        checksums,
+    }
+}
+
 // /// Serializes raw data.
 // ///
 // /// Args:
@@ -163,27 +659,374 @@ fn serialize<'py>(
 ///     tensor_dict (`Dict[str, Dict[Any]]`):
 ///         The tensor dict is like:
 ///             {"tensor_name": {"dtype": "F32", "shape": [2, 3], "data": b"\0\0"}}
+///         `data` can be any contiguous buffer (`bytes`, `memoryview`, numpy array,
+///         object exposing `__array_interface__`), it is read in place. It can
+///         also be a callable taking no argument and returning such a buffer, it
+///         is then only called when the tensor is written.
 ///     filename (`str`, or `os.PathLike`):
 ///         The name of the file to write into.
 ///     metadata (`Dict[str, str]`, *optional*):
 ///         The optional purely text annotations
+///     num_threads (`int`, *optional*):
+///         Write the tensors with this many threads, each one writing at the
+///         tensor's final offset in a preallocated file. `0` uses all available
+///         cores. By default a single sequential writer is used, which is
+///         also the case when some `data` entries are callables.
+///     order (`Union[str, List[str]]`, *optional*):
+///         The order of the tensors in the file: `"dtype"` (the default, by
+///         descending dtype size then name), `"natural"` (by name, with numbers
+///         compared by value so `h.2` comes before `h.10`), `"insertion"` (the
+///         order of `tensor_dict`) or a list of names, the tensors which are
+///         not listed coming after them in natural order. Without `alignment`,
+///         tensors whose size is not a multiple of 8 bytes are placed last to
+///         keep every tensor aligned.
+///     alignment (`int`, *optional*):
+///         Start every tensor at a multiple of this many bytes from the beginning
+///         of the file, a power of two like `64` for SIMD loads or `4096` for
+///         page aligned views. The alignment is recorded in the header and the
+///         gaps are filled with zeros. By default the tensors are packed.
+///     checksums (`bool`, *optional*):
+///         Record an xxh3 checksum of every tensor in the header, which
+///         `safe_open(..., verify="lazy")` checks when the tensor is first read.
+///         The data of every tensor is read once more to compute them, and
+///         callable `data` entries are all called before anything is written.
 ///
 /// Returns:
 ///     (`NoneType`):
 ///         On success return None
 #[pyfunction]
-#[pyo3(signature = (filename, tensor_dict, metadata=None))]
+#[pyo3(signature = (filename, tensor_dict, metadata=None, num_threads=None, order=None, alignment=None, checksums=false))]
 fn serialize_file(
+    py: Python<'_>,
     filename: PathBuf,
-    tensor_dict: HashMap<String, PyBound<PyDict>>,
+    tensor_dict: PyBound<PyDict>,
     metadata: Option<HashMap<String, String>>,
+    num_threads: Option<usize>,
+    order: Option<Order>,
+    alignment: Option<usize>,
+    checksums: bool,
 ) -> PyResult<()> {
-    let tensors = prepare(tensor_dict)?;
-    bintensors::tensor::serialize_to_file(&tensors, &metadata, &filename)
-        .map_err(|e| BinTensorError::new_err(format!("Error while seralizing {e:?}")))?;
+    let mut tensors = prepare(&tensor_dict)?;
+    if checksums {
+        produce_lazy(&mut tensors)?;
+    }
+    let layout = layout(order, alignment, checksums);
+    // Lazy tensors are produced one at a time, in file order.
+    let num_threads = num_threads.filter(|_| !tensors.iter().any(|(_, t)| t.is_lazy()));
+    let state = Mutex::default();
+    let views = views(&tensors, &state);
+    py.allow_threads(|| {
+        let data = views.iter().map(|(k, v)| (*k, v));
+        match num_threads {
+            Some(num_threads) => bintensors::tensor::serialize_to_file_parallel_with_layout(
+                data,
+                &metadata,
+                &filename,
+                num_threads,
+                &layout,
+            ),
+            None => bintensors::tensor::serialize_to_file_with_layout(
+                data, &metadata, &filename, &layout,
+            ),
+        }
+        .map_err(|e| format!("{e:?}"))
+    })
+    .map_err(|e| BinTensorError::new_err(format!("Error while seralizing {e}")))?;
+    drop(views);
+    if let Some(err) = state.into_inner().unwrap_or_else(|e| e.into_inner()).error {
+        // Do not leave a file with zeroed tensors behind.
+        let _ = std::fs::remove_file(&filename);
+        return Err(err);
+    }
     Ok(())
 }
 
+/// The `hashlib` algorithms computed natively by the checksum functions.
+const CHECKSUM_ALGORITHMS: &[&str] = &[
+    "sha1", "sha224", "sha256", "sha384", "sha512", "sha3_224", "sha3_256", "sha3_384", "sha3_512",
+];
+
+/// Evaluates `$body` with the type `$digest` naming the hasher of the
+/// `hashlib` algorithm `$name`, giving `None` when it is not one of
+/// [`CHECKSUM_ALGORITHMS`].
+macro_rules! with_hasher {
+    ($name:expr, |$digest:ident| $body:expr) => {
+        match $name {
+            "sha1" => Some({
+                type $digest = sha1::Sha1;
+                $body
+            }),
+            "sha224" => Some({
+                type $digest = sha2::Sha224;
+                $body
+            }),
+            "sha256" => Some({
+                type $digest = sha2::Sha256;
+                $body
+            }),
+            "sha384" => Some({
+                type $digest = sha2::Sha384;
+                $body
+            }),
+            "sha512" => Some({
+                type $digest = sha2::Sha512;
+                $body
+            }),
+            "sha3_224" => Some({
+                type $digest = sha3::Sha3_224;
+                $body
+            }),
+            "sha3_256" => Some({
+                type $digest = sha3::Sha3_256;
+                $body
+            }),
+            "sha3_384" => Some({
+                type $digest = sha3::Sha3_384;
+                $body
+            }),
+            "sha3_512" => Some({
+                type $digest = sha3::Sha3_512;
+                $body
+            }),
+            _ => None,
+        }
+    };
+}
+
+/// The `hashlib` name of the algorithm of `hasher`, a constructor like
+/// `hashlib.sha256`, `sha1` by default. `None` for other callables, which
+/// need the data or do not return a named `hashlib` object, they are only
+/// hashed from Python.
+fn hasher_name(hasher: Option<&PyBound<PyAny>>) -> Option<String> {
+    match hasher {
+        Some(hasher) => hasher
+            .call0()
+            .and_then(|hash| hash.getattr(intern!(hasher.py(), "name")))
+            .and_then(|name| name.extract())
+            .ok(),
+        None => Some("sha1".to_string()),
+    }
+}
+
+/// Same as [`hasher_name`], failing for algorithms not in [`CHECKSUM_ALGORITHMS`].
+fn native_hasher_name(hasher: Option<&PyBound<PyAny>>) -> PyResult<String> {
+    match hasher_name(hasher) {
+        Some(name) if CHECKSUM_ALGORITHMS.contains(&name.as_str()) => Ok(name),
+        name => Err(BinTensorError::new_err(format!(
+            "Unsupported hasher {}, expected a hashlib constructor among {CHECKSUM_ALGORITHMS:?}",
+            name.as_deref().unwrap_or("callable")
+        ))),
+    }
+}
+
+/// Serializes raw data, computing its checksum in the same pass.
+///
+/// Args:
+///     tensor_dict (`Dict[str, Dict[Any]]`):
+///         The tensor dict, as for `serialize`.
+///     metadata (`Dict[str, str]`, *optional*):
+///         The optional purely text annotations
+///     hasher (`Callable[[bytes], HASH]`, *optional*):
+///         The `hashlib` constructor of the checksum, `hashlib.sha1` by default.
+///         The SHA-1, SHA-2 and SHA-3 families are hashed natively without the
+///         GIL, other algorithms hash the serialized bytes afterwards.
+///
+/// Returns:
+///     (`Tuple[bytes, bytes]`):
+///         The checksum and the serialized content.
+#[pyfunction]
+#[pyo3(signature = (tensor_dict, metadata=None, hasher=None))]
+fn serialize_with_checksum<'py>(
+    py: Python<'py>,
+    tensor_dict: PyBound<PyDict>,
+    metadata: Option<HashMap<String, String>>,
+    hasher: Option<PyBound<'py, PyAny>>,
+) -> PyResult<(PyBound<'py, PyBytes>, PyBound<'py, PyBytes>)> {
+    let name = hasher_name(hasher.as_ref());
+    let tensors = prepare(&tensor_dict)?;
+    let layout = Layout::default();
+    let state = Mutex::default();
+    let views = views(&tensors, &state);
+    let size = py
+        .allow_threads(|| {
+            let data = views.iter().map(|(k, v)| (*k, v));
+            bintensors::tensor::serialized_size(data, &metadata, &layout)
+        })
+        .map_err(|e| BinTensorError::new_err(format!("Error while serializing: {e:?}")))?;
+    let mut checksum = None;
+    let pybytes = PyBytes::new_with(py, size, |buffer| {
+        py.allow_threads(|| {
+            let data = views.iter().map(|(k, v)| (*k, v));
+            checksum = with_hasher!(name.as_deref().unwrap_or_default(), |H| {
+                bintensors::tensor::serialize_to_writer_with_checksum(
+                    data,
+                    &metadata,
+                    &mut *buffer,
+                    H::new(),
+                )
+            })
+            .transpose()?;
+            if checksum.is_none() {
+                let data = views.iter().map(|(k, v)| (*k, v));
+                bintensors::tensor::serialize_into(data, &metadata, &layout, buffer)?;
+            }
+            Ok::<_, bintensors::BinTensorError>(())
+        })
+        .map_err(|e| BinTensorError::new_err(format!("Error while serializing: {e:?}")))
+    })?;
+    drop(views);
+    if let Some(err) = state.into_inner().unwrap_or_else(|e| e.into_inner()).error {
+        return Err(err);
+    }
+    let checksum = match (checksum, hasher) {
+        (Some(checksum), _) => PyBytes::new(py, &checksum),
+        (None, Some(hasher)) => hasher
+            .call1((&pybytes,))?
+            .call_method0(intern!(py, "digest"))?
+            .downcast_into::<PyBytes>()?,
+        (None, None) => unreachable!("sha1 is hashed natively"),
+    };
+    Ok((checksum, pybytes))
+}
+
+/// Serializes raw data into file, computing its checksum in the same pass.
+///
+/// Args:
+///     filename (`str`, or `os.PathLike`):
+///         The name of the file to write into.
+///     tensor_dict (`Dict[str, Dict[Any]]`):
+///         The tensor dict, as for `serialize`.
+///     metadata (`Dict[str, str]`, *optional*):
+///         The optional purely text annotations
+///     hasher (`Callable[[bytes], HASH]`, *optional*):
+///         The `hashlib` constructor of the checksum, `hashlib.sha1` by default.
+///         Only the SHA-1, SHA-2 and SHA-3 families are supported.
+///     tree (`bool`, *optional*):
+///         Compute the tree hash of the file, which `checksum_file` and
+///         `verify_file` compute on several cores, instead of the plain hash.
+///
+/// Returns:
+///     (`bytes`):
+///         The checksum of the file content.
+#[pyfunction]
+#[pyo3(signature = (filename, tensor_dict, metadata=None, hasher=None, tree=false))]
+fn serialize_file_with_checksum<'py>(
+    py: Python<'py>,
+    filename: PathBuf,
+    tensor_dict: PyBound<PyDict>,
+    metadata: Option<HashMap<String, String>>,
+    hasher: Option<PyBound<'py, PyAny>>,
+    tree: bool,
+) -> PyResult<PyBound<'py, PyBytes>> {
+    let name = native_hasher_name(hasher.as_ref())?;
+    let tensors = prepare(&tensor_dict)?;
+    let state = Mutex::default();
+    let views = views(&tensors, &state);
+    let checksum = py
+        .allow_threads(|| {
+            let data = views.iter().map(|(k, v)| (*k, v));
+            with_hasher!(name.as_str(), |H| if tree {
+                bintensors::tensor::serialize_to_file_with_checksum(
+                    data,
+                    &metadata,
+                    &filename,
+                    TreeHash::<H>::new(),
+                )
+            } else {
+                bintensors::tensor::serialize_to_file_with_checksum(
+                    data,
+                    &metadata,
+                    &filename,
+                    H::new(),
+                )
+            })
+            .expect("checked above")
+            .map_err(|e| format!("{e:?}"))
+        })
+        .map_err(|e| BinTensorError::new_err(format!("Error while seralizing {e}")))?;
+    drop(views);
+    if let Some(err) = state.into_inner().unwrap_or_else(|e| e.into_inner()).error {
+        // Do not leave a file with zeroed tensors behind.
+        let _ = std::fs::remove_file(&filename);
+        return Err(err);
+    }
+    Ok(PyBytes::new(py, &checksum))
+}
+
+/// Computes the tree hash of a file on several cores.
+///
+/// The file is cut into chunks of 4 MiB hashed in parallel, with the GIL
+/// released, and the digests of the chunks are hashed into the result. It is
+/// the checksum returned by `serialize_file_with_checksum(..., tree=True)`,
+/// not the plain hash of the file.
+///
+/// Args:
+///     filename (`str`, or `os.PathLike`):
+///         The name of the file to hash.
+///     hasher (`Callable[[bytes], HASH]`, *optional*):
+///         The `hashlib` constructor of the checksum, `hashlib.sha1` by default.
+///         Only the SHA-1, SHA-2 and SHA-3 families are supported.
+///     num_threads (`int`, *optional*):
+///         Hash with this many threads, all available cores by default.
+///
+/// Returns:
+///     (`bytes`):
+///         The tree hash of the file.
+#[pyfunction]
+#[pyo3(signature = (filename, hasher=None, num_threads=None))]
+fn checksum_file<'py>(
+    py: Python<'py>,
+    filename: PathBuf,
+    hasher: Option<PyBound<'py, PyAny>>,
+    num_threads: Option<usize>,
+) -> PyResult<PyBound<'py, PyBytes>> {
+    let name = native_hasher_name(hasher.as_ref())?;
+    let checksum = py
+        .allow_threads(|| {
+            with_hasher!(name.as_str(), |H| {
+                bintensors::tensor::checksum_file::<H, _>(&filename, num_threads.unwrap_or(0))
+            })
+            .expect("checked above")
+        })
+        .map_err(|e| BinTensorError::new_err(format!("Error while hashing {filename:?}: {e:?}")))?;
+    Ok(PyBytes::new(py, &checksum))
+}
+
+/// Checks the tree hash of a file, see `checksum_file`.
+///
+/// Args:
+///     filename (`str`, or `os.PathLike`):
+///         The name of the file to verify.
+///     expected (`bytes`):
+///         The expected checksum, from `checksum_file` or
+///         `serialize_file_with_checksum(..., tree=True)`.
+///     hasher (`Callable[[bytes], HASH]`, *optional*):
+///         The `hashlib` constructor of the checksum, `hashlib.sha1` by default.
+///     num_threads (`int`, *optional*):
+///         Hash with this many threads, all available cores by default.
+///
+/// Returns:
+///     (`NoneType`):
+///         On success return `None`, raises if the file does not match.
+#[pyfunction]
+#[pyo3(signature = (filename, expected, hasher=None, num_threads=None))]
+fn verify_file(
+    py: Python<'_>,
+    filename: PathBuf,
+    expected: &[u8],
+    hasher: Option<PyBound<'_, PyAny>>,
+    num_threads: Option<usize>,
+) -> PyResult<()> {
+    let name = native_hasher_name(hasher.as_ref())?;
+    py.allow_threads(|| {
+        with_hasher!(name.as_str(), |H| {
+            bintensors::tensor::verify_file::<H, _>(&filename, expected, num_threads.unwrap_or(0))
+        })
+        .expect("checked above")
+    })
+    .map_err(|e| BinTensorError::new_err(format!("Error while verifying {filename:?}: {e:?}")))
+}
+
 /// Opens a bintensors lazily and returns tensors as asked
 ///
 /// Args:
@@ -197,17 +1040,27 @@ fn serialize_file(
 #[pyfunction]
 #[pyo3(signature = (bytes))]
 fn deserialize(py: Python, bytes: &[u8]) -> PyResult<Vec<(String, HashMap<String, PyObject>)>> {
-    let bin = BinTensors::deserialize(bytes)
-        .map_err(|e| BinTensorError::new_err(format!("Error while deserializing: {e:?}")))?;
+    // `bytes` is immutable and borrowed from the argument for the whole call.
+    let tensors = py
+        .allow_threads(|| {
+            BinTensors::deserialize(bytes)
+                .map(|bin| bin.tensors())
+                .map_err(|e| format!("{e:?}"))
+        })
+        .map_err(|e| BinTensorError::new_err(format!("Error while deserializing: {e}")))?;
 
-    let tensors = bin.tensors();
     let mut items = Vec::with_capacity(tensors.len());
 
     for (tensor_name, tensor) in tensors {
         let pyshape: PyObject = PyList::new(py, tensor.shape().iter())?.into();
         let pydtype: PyObject = format!("{:?}", tensor.dtype()).into_pyobject(py)?.into();
 
-        let pydata: PyObject = PyByteArray::new(py, tensor.data()).into();
+        let data = tensor.data();
+        let pydata: PyObject = PyByteArray::new_with(py, data.len(), |out: &mut [u8]| {
+            py.allow_threads(|| out.copy_from_slice(data));
+            Ok(())
+        })?
+        .into();
 
         let map = HashMap::from([
             ("shape".to_string(), pyshape),
@@ -218,6 +1071,128 @@ fn deserialize(py: Python, bytes: &[u8]) -> PyResult<Vec<(String, HashMap<String
     }
     Ok(items)
 }
+/// Reads the header of a bintensors file without mapping it or reading the tensors
+///
+/// Args:
+///     filename (`str`, or `os.PathLike`):
+///         The name of the file to inspect
+///
+/// Returns:
+///     (`Dict[str, Any]`):
+///         The header, like:
+///             {"metadata": {"format": "pt"}, "alignment": None, "tensors": {"tensor_name":
+///             {"dtype": "F32", "shape": [2, 3], "data_offsets": (0, 24)}}}
+///         Tensors are ordered by offset, `metadata` is `None` without user metadata
+///         and `alignment` is `None` when the tensors are packed.
+#[pyfunction]
+#[pyo3(signature = (filename))]
+fn inspect(py: Python<'_>, filename: PathBuf) -> PyResult<PyBound<'_, PyDict>> {
+    let metadata = py.allow_threads(|| -> PyResult<Metadata> {
+        let mut file = File::open(&filename).map_err(|_| {
+            PyFileNotFoundError::new_err(format!("No such file or directory: {filename:?}"))
+        })?;
+        let (_, metadata) = BinTensors::read_metadata_from(&mut file).map_err(|e| {
+            BinTensorError::new_err(format!("Error while deserializing header: {e:?}"))
+        })?;
+        Ok(metadata)
+    })?;
+
+    let tensors = PyDict::new(py);
+    for name in metadata.offset_names() {
+        let Some(info) = metadata.info(name) else {
+            continue;
+        };
+        let tensor = PyDict::new(py);
+        tensor.set_item(intern!(py, "dtype"), format!("{:?}", info.dtype))?;
+        tensor.set_item(intern!(py, "shape"), info.shape.clone())?;
+        tensor.set_item(intern!(py, "data_offsets"), info.data_offsets)?;
+        tensors.set_item(name, tensor)?;
+    }
+    let header = PyDict::new(py);
+    header.set_item(intern!(py, "metadata"), metadata.metadata().clone())?;
+    header.set_item(intern!(py, "alignment"), metadata.alignment())?;
+    header.set_item(intern!(py, "tensors"), tensors)?;
+    Ok(header)
+}
+
+/// An entry of an access trace, a tensor name or a `(name, seconds)` pair of `safe_open.trace()`.
+#[derive(FromPyObject)]
+enum TraceEntry {
+    Name(String),
+    Access(String, f64),
+}
+
+/// Rewrites a bintensors file with its tensors laid out in first access order
+///
+/// The tensor data is copied verbatim and the metadata, alignment and checksums are kept,
+/// only the offsets change. Tensors missing from the trace come after the
+/// traced ones. In packed files, tensors whose size is not a multiple of 8
+/// bytes are placed last to keep every tensor aligned.
+///
+/// Args:
+///     src (`str`, or `os.PathLike`):
+///         The file to repack
+///     dst (`str`, or `os.PathLike`):
+///         The file to write, it must differ from `src`
+///     trace (`List[Union[str, Tuple[str, float]]]`):
+///         The accessed tensor names, as returned by `safe_open(..., trace=True).trace()`.
+///
+/// Returns:
+///     (`NoneType`):
+///         On success return None
+#[pyfunction]
+#[pyo3(signature = (src, dst, trace))]
+fn repack(py: Python<'_>, src: PathBuf, dst: PathBuf, trace: Vec<TraceEntry>) -> PyResult<()> {
+    let mut seen = HashSet::new();
+    let order: Vec<String> = trace
+        .into_iter()
+        .map(|entry| match entry {
+            TraceEntry::Name(name) | TraceEntry::Access(name, _) => name,
+        })
+        .filter(|name| seen.insert(name.clone()))
+        .collect();
+
+    py.allow_threads(|| {
+        let file = File::open(&src).map_err(|_| {
+            PyFileNotFoundError::new_err(format!("No such file or directory: {src:?}"))
+        })?;
+        if dst.exists() && std::fs::canonicalize(&dst)? == std::fs::canonicalize(&src)? {
+            return Err(BinTensorError::new_err(format!(
+                "Cannot repack {src:?} into itself"
+            )));
+        }
+        // SAFETY: the file is only read while it is mapped.
+        let buffer = unsafe { MmapOptions::new().map(&file)? };
+        let (n, metadata) = BinTensors::read_metadata(&buffer).map_err(|e| {
+            BinTensorError::new_err(format!("Error while deserializing header: {e:?}"))
+        })?;
+        if let Some(name) = order.iter().find(|name| metadata.info(name).is_none()) {
+            return Err(BinTensorError::new_err(format!(
+                "File does not contain tensor {name}"
+            )));
+        }
+
+        let data = &buffer[n + 8..];
+        let mut views = Vec::with_capacity(metadata.offset_names().len());
+        for name in metadata.offset_names() {
+            let info = metadata
+                .info(name)
+                .ok_or_else(|| BinTensorError::new_err(format!("Invalid header for {name}")))?;
+            let (start, stop) = info.data_offsets;
+            let view = TensorView::new(info.dtype, info.shape.clone(), &data[start..stop])
+                .map_err(|e| BinTensorError::new_err(format!("Invalid tensor {name}: {e:?}")))?;
+            views.push((name.as_str(), view));
+        }
+        let layout = Layout {
+            order: TensorOrder::Explicit(order),
+            alignment: metadata.alignment(),
+            checksums: metadata.has_checksums(),
+        };
+        bintensors::tensor::serialize_to_file_with_layout(views, metadata.metadata(), &dst, &layout)
+            .map_err(|e| BinTensorError::new_err(format!("Error while repacking {e:?}")))
+    })
+}
+
 fn slice_to_indexer(
     (dim_idx, (slice_index, dim)): (usize, (SliceIndex, usize)),
 ) -> Result<TensorIndexer, PyErr> {
@@ -238,7 +1213,34 @@ fn slice_to_indexer(
             } else {
                 Bound::Unbounded
             };
-            Ok(TensorIndexer::Narrow(start, stop))
+
+            let py_step = slice.getattr(intern!(slice.py(), "step"))?;
+            let step: Option<isize> = py_step.extract()?;
+            match step {
+                None | Some(1) => Ok(TensorIndexer::Narrow(start, stop)),
+                Some(step) if step > 1 => Ok(TensorIndexer::Strided(start, stop, step as usize)),
+                Some(step) => Err(BinTensorError::new_err(format!(
+                    "Invalid step {step} for dimension {dim_idx}, only positive steps are supported"
+                ))),
+            }
+        }
+        SliceIndex::Gather(IndexList(indices)) => {
+            let indices = indices
+                .into_iter()
+                .map(|idx| {
+                    let resolved = if idx < 0 {
+                        dim.checked_add_signed(idx as isize)
+                    } else {
+                        Some(idx as usize)
+                    };
+                    resolved.filter(|&idx| idx < dim).ok_or_else(|| {
+                        BinTensorError::new_err(format!(
+                            "Invalid index {idx} for dimension {dim_idx} of size {dim}"
+                        ))
+                    })
+                })
+                .collect::<PyResult<Vec<usize>>>()?;
+            Ok(TensorIndexer::IndexSelect(indices))
         }
         SliceIndex::Index(idx) => {
             if idx < 0 {
@@ -288,6 +1290,27 @@ impl<'source> FromPyObject<'source> for Framework {
     }
 }
 
+/// Layout order of the tensors written by `serialize` and `serialize_file`.
+#[derive(Debug, Clone, Default)]
+struct Order(TensorOrder);
+
+impl<'source> FromPyObject<'source> for Order {
+    fn extract_bound(ob: &PyBound<'source, PyAny>) -> PyResult<Self> {
+        if let Ok(name) = ob.extract::<String>() {
+            match &name[..] {
+                "dtype" => Ok(Order(TensorOrder::Dtype)),
+                "natural" => Ok(Order(TensorOrder::Natural)),
+                "insertion" => Ok(Order(TensorOrder::Insertion)),
+                name => Err(BinTensorError::new_err(format!("order {name} is invalid"))),
+            }
+        } else if let Ok(names) = ob.extract::<Vec<String>>() {
+            Ok(Order(TensorOrder::Explicit(names)))
+        } else {
+            Err(BinTensorError::new_err(format!("order {ob} is invalid")))
+        }
+    }
+}
+
 #[derive(Debug, Clone, PartialEq, Eq)]
 enum Device {
     Cpu,
@@ -362,15 +1385,59 @@ impl<'py> IntoPyObject<'py> for Device {
     }
 }
 
-enum Storage {
-    Mmap(Mmap),
-    /// Torch specific mmap
-    /// This allows us to not manage it
-    /// so Pytorch can handle the whole lifecycle.
-    /// https://pytorch.org/docs/stable/storage.html#torch.TypedStorage.from_file.
-    TorchStorage(OnceLock<PyObject>),
-}
-
+enum Storage {
+    Mmap(Mmap),
+    /// Torch specific mmap
+    /// This allows us to not manage it
+    /// so Pytorch can handle the whole lifecycle.
+    /// https://pytorch.org/docs/stable/storage.html#torch.TypedStorage.from_file.
+    /// Our own mapping of the file is kept for the parallel loader.
+    TorchStorage(OnceLock<PyObject>, Mmap),
+}
+
+impl Storage {
+    fn mmap(&self) -> &Mmap {
+        match self {
+            Storage::Mmap(mmap) | Storage::TorchStorage(_, mmap) => mmap,
+        }
+    }
+}
+
+/// Read-only window over a region of the memory map.
+///
+/// Exposed to numpy through the `__array_interface__` protocol so arrays
+/// point directly at the mapped pages. Every array built on top of it holds
+/// a reference to this object, which in turn holds the storage, so the
+/// mapping outlives the `safe_open` handle for as long as it is needed.
+#[pyclass(frozen)]
+struct PyMmapSlice {
+    storage: Arc<Storage>,
+    start: usize,
+    stop: usize,
+}
+
+#[pymethods]
+impl PyMmapSlice {
+    #[getter(__array_interface__)]
+    fn array_interface<'py>(&self, py: Python<'py>) -> PyResult<PyBound<'py, PyDict>> {
+        let ptr = match self.storage.as_ref() {
+            Storage::Mmap(mmap) => mmap[self.start..self.stop].as_ptr() as usize,
+            Storage::TorchStorage(..) => {
+                return Err(BinTensorError::new_err(
+                    "Torch storage cannot be exposed as an array interface",
+                ))
+            }
+        };
+        let interface = PyDict::new(py);
+        interface.set_item(intern!(py, "shape"), (self.stop - self.start,))?;
+        interface.set_item(intern!(py, "typestr"), "|u1")?;
+        // (pointer, read_only)
+        interface.set_item(intern!(py, "data"), (ptr, true))?;
+        interface.set_item(intern!(py, "version"), 3)?;
+        Ok(interface)
+    }
+}
+
 #[derive(Debug, PartialEq, Eq, PartialOrd)]
 struct Version {
     major: u8,
@@ -419,10 +1486,29 @@ struct Open {
     framework: Framework,
     device: Device,
     storage: Arc<Storage>,
+    /// Kept open to drop the pages of released tensors from the page cache.
+    #[cfg_attr(not(target_os = "linux"), allow(dead_code))]
+    file: File,
+    /// Framework dtype objects, resolved once per dtype.
+    dtypes: Mutex<BTreeMap<Dtype, PyObject>>,
+    /// `dtype=torch.uint8, device=...` arguments of `torch.asarray` on the storage.
+    storage_kwargs: OnceLock<Py<PyDict>>,
+    /// Accessed tensor names with the seconds elapsed since opening, when tracing.
+    trace: Option<Mutex<Vec<(String, f64)>>>,
+    opened: Instant,
+    /// Names of the tensors already checked against their checksums, when verifying.
+    verified: Option<Mutex<HashSet<String>>>,
 }
 
 impl Open {
-    fn new(filename: PathBuf, framework: Framework, device: Option<Device>) -> PyResult<Self> {
+    fn new(
+        filename: PathBuf,
+        framework: Framework,
+        device: Option<Device>,
+        trace: bool,
+        verify: bool,
+    ) -> PyResult<Self> {
+        let opened = Instant::now();
         let file = File::open(&filename).map_err(|_| {
             PyFileNotFoundError::new_err(format!("No such file or directory: {filename:?}"))
         })?;
@@ -441,6 +1527,11 @@ impl Open {
         let (n, metadata) = BinTensors::read_metadata(&buffer).map_err(|e| {
             BinTensorError::new_err(format!("Error while deserializing header: {e:?}"))
         })?;
+        if verify && !metadata.has_checksums() {
+            return Err(BinTensorError::new_err(format!(
+                "File {filename:?} has no tensor checksums to verify, save it with `checksums=True`"
+            )));
+        }
 
         let offset = n + 8;
 
@@ -501,7 +1592,7 @@ impl Open {
                     let gil_storage = OnceLock::new();
                     gil_storage.get_or_init_py_attached(py, || storage);
 
-                    Ok(Storage::TorchStorage(gil_storage))
+                    Ok(Storage::TorchStorage(gil_storage, buffer))
                 } else {
                     Ok(Storage::Mmap(buffer))
                 }
@@ -517,9 +1608,105 @@ impl Open {
             framework,
             device,
             storage,
+            file,
+            dtypes: Mutex::new(BTreeMap::new()),
+            storage_kwargs: OnceLock::new(),
+            trace: trace.then(|| Mutex::new(Vec::new())),
+            opened,
+            verified: verify.then(|| Mutex::new(HashSet::new())),
         })
     }
 
+    /// Checks the tensors against their checksums the first time they are
+    /// read, if verifying.
+    fn verify<'a>(&self, names: impl IntoIterator<Item = &'a str>) -> PyResult<()> {
+        let Some(verified) = &self.verified else {
+            return Ok(());
+        };
+        let (metadata, mmap) = (&self.metadata, self.storage.mmap());
+        for name in names {
+            if verified
+                .lock()
+                .unwrap_or_else(|e| e.into_inner())
+                .contains(name)
+            {
+                continue;
+            }
+            let info = self.info(name)?;
+            let data = mmap
+                .get(info.data_offsets.0 + self.offset..info.data_offsets.1 + self.offset)
+                .ok_or_else(|| {
+                    BinTensorError::new_err(format!("Tensor {name} is out of bounds of the file"))
+                })?;
+            // Hashing does not need the GIL.
+            Python::with_gil(|py| py.allow_threads(|| metadata.verify(name, data))).map_err(
+                |e| BinTensorError::new_err(format!("Error while verifying {name}: {e:?}")),
+            )?;
+            verified
+                .lock()
+                .unwrap_or_else(|e| e.into_inner())
+                .insert(name.to_string());
+        }
+        Ok(())
+    }
+
+    /// Appends the accessed tensors to the trace, if tracing.
+    fn record<'a>(&self, names: impl IntoIterator<Item = &'a str>) {
+        if let Some(trace) = &self.trace {
+            let elapsed = self.opened.elapsed().as_secs_f64();
+            let mut trace = trace.lock().unwrap_or_else(|e| e.into_inner());
+            trace.extend(names.into_iter().map(|name| (name.to_string(), elapsed)));
+        }
+    }
+
+    /// Returns the accesses recorded since the file was opened
+    ///
+    /// Returns:
+    ///     (`List[Tuple[str, float]]`):
+    ///         The name of every tensor accessed through `get_tensor`, `get_tensors`
+    ///         or `get_slice`, with the seconds elapsed since opening, in call order.
+    pub fn trace(&self) -> PyResult<Vec<(String, f64)>> {
+        let trace = self.trace.as_ref().ok_or_else(|| {
+            BinTensorError::new_err("Accesses are not traced, open the file with `trace=True`")
+        })?;
+        Ok(trace.lock().unwrap_or_else(|e| e.into_inner()).clone())
+    }
+
+    /// Returns the framework dtype object of `dtype`, cached for the lifetime of the file.
+    fn pydtype(&self, py: Python<'_>, dtype: Dtype) -> PyResult<PyObject> {
+        let dtypes = self.dtypes.lock().unwrap_or_else(|e| e.into_inner());
+        if let Some(pydtype) = dtypes.get(&dtype) {
+            return Ok(pydtype.clone_ref(py));
+        }
+        // Resolve without holding the lock, attribute lookups may release the GIL.
+        drop(dtypes);
+        let (module, is_numpy) = framework_module(py, &self.framework)?;
+        let pydtype = get_pydtype(module, dtype, is_numpy)?;
+        self.dtypes
+            .lock()
+            .unwrap_or_else(|e| e.into_inner())
+            .insert(dtype, pydtype.clone_ref(py));
+        Ok(pydtype)
+    }
+
+    /// Keyword arguments reading a byte range of the torch storage onto the device.
+    fn storage_kwargs<'py>(&self, py: Python<'py>) -> PyResult<PyBound<'py, PyDict>> {
+        if let Some(kwargs) = self.storage_kwargs.get() {
+            return Ok(kwargs.bind(py).clone());
+        }
+        let torch_uint8 = self.pydtype(py, Dtype::U8)?;
+        let device: PyObject = self.device.clone().into_pyobject(py)?.into();
+        let kwargs = [
+            (intern!(py, "dtype"), torch_uint8),
+            (intern!(py, "device"), device),
+        ]
+        .into_py_dict(py)?;
+        let kwargs = self
+            .storage_kwargs
+            .get_or_init_py_attached(py, || kwargs.unbind());
+        Ok(kwargs.bind(py).clone())
+    }
+
     /// Return the special non tensor information in the header
     ///
     /// Returns:
@@ -535,8 +1722,7 @@ impl Open {
     ///     (`List[str]`):
     ///         The name of the tensors contained in that file
     pub fn keys(&self) -> PyResult<Vec<String>> {
-        let mut keys: Vec<String> = self.metadata.tensors().keys().cloned().collect();
-        keys.sort();
+        let keys: Vec<String> = self.metadata.sorted_names().cloned().collect();
         Ok(keys)
     }
 
@@ -555,6 +1741,10 @@ impl Open {
     /// Args:
     ///     name (`str`):
     ///         The name of the tensor you want
+    ///     dtype (`Union[str, dtype]`, *optional*):
+    ///         Convert the tensor to this dtype, a name like `"float32"` or a
+    ///         framework dtype, in a single pass out of the file. F16, BF16, F32
+    ///         and F64 convert into each other and F8 converts to F16 and F32.
     ///
     /// Returns:
     ///     (`Tensor`):
@@ -566,104 +1756,321 @@ impl Open {
     ///
     /// with safe_open("model.bintensors", framework="pt", device=0) as f:
     ///     tensor = f.get_tensor("embedding")
+    ///     upcast = f.get_tensor("lm_head", dtype=torch.float32)
     ///
     /// ```
-    pub fn get_tensor(&self, name: &str) -> PyResult<PyObject> {
-        let info = self.metadata.info(name).ok_or_else(|| {
-            BinTensorError::new_err(format!("File does not contain tensor {name}",))
+    pub fn get_tensor(&self, name: &str, dtype: Option<Dtype>) -> PyResult<PyObject> {
+        let info = self.info(name)?;
+        self.record([name]);
+        self.verify([name])?;
+        Python::with_gil(|py| self.load(py, info, dtype.unwrap_or(info.dtype)))
+    }
+
+    /// Returns several tensors at once
+    ///
+    /// Args:
+    ///     names (`List[str]`, *optional*):
+    ///         The names of the tensors you want, all of them by default.
+    ///     num_threads (`int`, *optional*):
+    ///         Copy the tensors out of the file with this many threads, `0` uses
+    ///         all available cores. By default the tensors are built one after
+    ///         the other on the calling thread.
+    ///     dtype (`Union[str, dtype]`, *optional*):
+    ///         Convert the floating point tensors to this dtype while copying them
+    ///         out of the file, as for `get_tensor`. The other tensors are kept as
+    ///         stored.
+    ///
+    /// Returns:
+    ///     (`Dict[str, Tensor]`):
+    ///         The tensors in the framework you opened the file for, in the order
+    ///         of `names`, or ordered by offset when `names` is not given.
+    pub fn get_tensors<'py>(
+        &self,
+        py: Python<'py>,
+        names: Option<Vec<String>>,
+        num_threads: Option<usize>,
+        dtype: Option<Dtype>,
+    ) -> PyResult<PyBound<'py, PyDict>> {
+        match &names {
+            Some(names) => {
+                self.record(names.iter().map(String::as_str));
+                self.verify(names.iter().map(String::as_str))?;
+            }
+            None => {
+                self.record(self.metadata.offset_names().iter().map(String::as_str));
+                self.verify(self.metadata.offset_names().iter().map(String::as_str))?;
+            }
+        }
+        // Big-endian hosts need a byteswap, which the sequential path handles.
+        if let Some(num_threads) = num_threads.filter(|_| !BIG_ENDIAN) {
+            let names = names.unwrap_or_else(|| self.metadata.offset_keys());
+            return self.get_tensors_parallel(py, names, num_threads, dtype);
+        }
+        let tensors = PyDict::new(py);
+        match names {
+            Some(names) => {
+                for name in names {
+                    let info = self.info(&name)?;
+                    let tensor = self.load(py, info, load_dtype(info.dtype, dtype))?;
+                    tensors.set_item(name, tensor)?;
+                }
+            }
+            None => {
+                for name in self.metadata.offset_names() {
+                    let info = self.info(name)?;
+                    let tensor = self.load(py, info, load_dtype(info.dtype, dtype))?;
+                    tensors.set_item(name, tensor)?;
+                }
+            }
+        }
+        Ok(tensors)
+    }
+
+    /// Copies the tensors out of the memory map into freshly allocated arrays.
+    ///
+    /// The byte ranges are cut into chunks in offset order and handed out to
+    /// `num_threads` workers with the GIL released, so page faults of a cold
+    /// file are served by several cores. The kernel is asked to read the
+    /// ranges ahead before the workers start. Floating point tensors are
+    /// converted to `dtype` by the workers while they copy.
+    fn get_tensors_parallel<'py>(
+        &self,
+        py: Python<'py>,
+        names: Vec<String>,
+        num_threads: usize,
+        dtype: Option<Dtype>,
+    ) -> PyResult<PyBound<'py, PyDict>> {
+        use std::sync::atomic::{AtomicUsize, Ordering};
+
+        let mmap = self.storage.mmap();
+
+        // (start in the file, stop in the file, destination pointer, stored dtype, loaded dtype)
+        let mut ranges = Vec::with_capacity(names.len());
+        let mut targets = Vec::with_capacity(names.len());
+        for name in &names {
+            let info = self.info(name)?;
+            let start = info.data_offsets.0 + self.offset;
+            let stop = info.data_offsets.1 + self.offset;
+            if mmap.get(start..stop).is_none() {
+                return Err(BinTensorError::new_err(format!(
+                    "Tensor {name} is out of bounds of the file"
+                )));
+            }
+            let dtype = load_dtype(info.dtype, dtype);
+            check_conversion(info.dtype, dtype)?;
+            let (target, ptr) =
+                self.empty(py, (stop - start) / info.dtype.size() * dtype.size())?;
+            ranges.push((start, stop, ptr, info.dtype, dtype));
+            targets.push((name, info, dtype, target));
+        }
+        ranges.sort_unstable_by_key(|&(start, ..)| start);
+
+        // Chunks hold whole elements, `LOAD_CHUNK_SIZE` is a multiple of every dtype size.
+        let mut chunks = Vec::new();
+        for &(start, stop, ptr, from, to) in &ranges {
+            let mut chunk_start = start;
+            while chunk_start < stop {
+                let chunk_stop = (chunk_start + LOAD_CHUNK_SIZE).min(stop);
+                let dst = ptr + (chunk_start - start) / from.size() * to.size();
+                chunks.push((chunk_start, chunk_stop, dst, from, to));
+                chunk_start = chunk_stop;
+            }
+        }
+        let num_threads = match num_threads {
+            0 => std::thread::available_parallelism().map_or(1, |n| n.get()),
+            n => n,
+        }
+        .min(chunks.len())
+        .max(1);
+
+        py.allow_threads(|| {
+            #[cfg(unix)]
+            for &(start, stop, ..) in ranges.iter().filter(|(start, stop, ..)| start < stop) {
+                // Only a hint, a failure just means no readahead.
+                let _ = mmap.advise_range(memmap2::Advice::WillNeed, start, stop - start);
+            }
+
+            let next = AtomicUsize::new(0);
+            let worker = || {
+                while let Some(&(start, stop, dst, from, to)) =
+                    chunks.get(next.fetch_add(1, Ordering::Relaxed))
+                {
+                    let src = &mmap[start..stop];
+                    let len = src.len() / from.size() * to.size();
+                    // SAFETY: `dst` points into the array allocated above for this
+                    // tensor, which holds `len` more bytes past it. Chunks never
+                    // overlap and the arrays are kept alive in `targets`.
+                    let dst = unsafe { std::slice::from_raw_parts_mut(dst as *mut u8, len) };
+                    if from == to {
+                        dst.copy_from_slice(src);
+                    } else {
+                        bintensors::convert::convert_into(src, from, dst, to)
+                            .expect("conversion checked above");
+                    }
+                }
+            };
+            std::thread::scope(|scope| {
+                for _ in 0..num_threads {
+                    scope.spawn(worker);
+                }
+            });
+        });
+
+        let tensors = PyDict::new(py);
+        for (name, info, dtype, target) in targets {
+            let shape = info.shape.to_vec();
+            let tensor = target
+                .call_method1(intern!(py, "view"), (self.pydtype(py, dtype)?,))?
+                .call_method1(intern!(py, "reshape"), (shape,))?;
+            tensors.set_item(
+                name,
+                to_framework(py, &self.framework, tensor, &self.device)?,
+            )?;
+        }
+        Ok(tensors)
+    }
+
+    /// Allocates an uninitialized CPU array of `len` bytes, returning it with
+    /// the address of its data.
+    fn empty<'py>(&self, py: Python<'py>, len: usize) -> PyResult<(PyBound<'py, PyAny>, usize)> {
+        let (module, is_numpy) = framework_module(py, &self.framework)?;
+        let kwargs = [(intern!(py, "dtype"), self.pydtype(py, Dtype::U8)?)].into_py_dict(py)?;
+        // `empty` leaves the pages untouched, they are first written by the caller.
+        let target = module.call_method(intern!(py, "empty"), (len,), Some(&kwargs))?;
+        let ptr = if is_numpy {
+            buffer_parts(target.clone())?.1 as usize
+        } else {
+            target.call_method0(intern!(py, "data_ptr"))?.extract()?
+        };
+        Ok((target, ptr))
+    }
+
+    /// Builds the framework tensor described by `info` as `dtype`, converted
+    /// when it is not stored as such.
+    fn load(&self, py: Python<'_>, info: &TensorInfo, dtype: Dtype) -> PyResult<PyObject> {
+        if dtype == info.dtype {
+            return self.tensor(py, info);
+        }
+        check_conversion(info.dtype, dtype)?;
+        let start = info.data_offsets.0 + self.offset;
+        let stop = info.data_offsets.1 + self.offset;
+        let src = self.storage.mmap().get(start..stop).ok_or_else(|| {
+            BinTensorError::new_err(format!("Tensor is out of bounds of the file: {info:?}"))
         })?;
-        // let info = tensors.get(name).ok_or_else(|| {
-        //     BinTensorError::new_err(format!("File does not contain tensor {name}",))
-        // })?;
+        let len = src.len() / info.dtype.size() * dtype.size();
+        let (target, ptr) = self.empty(py, len)?;
+        let dst: &mut [u8] = if len == 0 {
+            &mut []
+        } else {
+            // SAFETY: `target` was just allocated with `len` bytes and is not
+            // shared until it is returned.
+            unsafe { std::slice::from_raw_parts_mut(ptr as *mut u8, len) }
+        };
+        // A single pass from the memory map into the array, without the GIL.
+        py.allow_threads(|| bintensors::convert::convert_into(src, info.dtype, dst, dtype))
+            .map_err(|e| BinTensorError::new_err(format!("Error while converting: {e:?}")))?;
+        let tensor = target
+            .call_method1(intern!(py, "view"), (self.pydtype(py, dtype)?,))?
+            .call_method1(intern!(py, "reshape"), (info.shape.to_vec(),))?;
+        Ok(to_framework(py, &self.framework, tensor, &self.device)?.into())
+    }
+
+    fn info(&self, name: &str) -> PyResult<&TensorInfo> {
+        self.metadata
+            .info(name)
+            .ok_or_else(|| BinTensorError::new_err(format!("File does not contain tensor {name}",)))
+    }
 
+    /// Builds the framework tensor described by `info`.
+    fn tensor(&self, py: Python<'_>, info: &TensorInfo) -> PyResult<PyObject> {
+        let start = info.data_offsets.0 + self.offset;
+        let stop = info.data_offsets.1 + self.offset;
         match &self.storage.as_ref() {
             Storage::Mmap(mmap) => {
-                let data =
-                    &mmap[info.data_offsets.0 + self.offset..info.data_offsets.1 + self.offset];
-
-                let array: PyObject =
-                    Python::with_gil(|py| PyByteArray::new(py, data).into_any().into());
+                let array: PyObject = if self.framework == Framework::Pytorch {
+                    // torch.frombuffer expects a writable buffer, keep the copy.
+                    PyByteArray::new(py, &mmap[start..stop]).into_any().into()
+                } else {
+                    // Zero-copy: numpy borrows the pages of the memory map directly,
+                    // the slice object keeps the mapping alive.
+                    let numpy = get_module(py, &NUMPY_MODULE)?;
+                    let view = Py::new(
+                        py,
+                        PyMmapSlice {
+                            storage: self.storage.clone(),
+                            start,
+                            stop,
+                        },
+                    )?;
+                    numpy.call_method1(intern!(py, "asarray"), (view,))?.into()
+                };
 
                 create_tensor(
+                    py,
                     &self.framework,
-                    info.dtype,
+                    self.pydtype(py, info.dtype)?,
                     &info.shape,
                     array,
                     &self.device,
                 )
             }
-            Storage::TorchStorage(storage) => {
-                Python::with_gil(|py| -> PyResult<PyObject> {
-                    let torch = get_module(py, &TORCH_MODULE)?;
-                    let dtype: PyObject = get_pydtype(torch, info.dtype, false)?;
-                    let torch_uint8: PyObject = get_pydtype(torch, Dtype::U8, false)?;
-                    let device: PyObject = self.device.clone().into_pyobject(py)?.into();
-                    let kwargs = [
-                        (intern!(py, "dtype"), torch_uint8),
-                        (intern!(py, "device"), device),
-                    ]
-                    .into_py_dict(py)?;
-                    let view_kwargs = [(intern!(py, "dtype"), dtype)].into_py_dict(py)?;
-                    let shape = info.shape.to_vec();
-                    let shape: PyObject = shape.into_pyobject(py)?.into();
-
-                    let start = (info.data_offsets.0 + self.offset) as isize;
-                    let stop = (info.data_offsets.1 + self.offset) as isize;
-                    let slice = PySlice::new(py, start, stop, 1);
-                    let storage: &PyObject = storage
-                        .get()
-                        .ok_or_else(|| BinTensorError::new_err("Could not find storage"))?;
-                    let storage: &PyBound<PyAny> = storage.bind(py);
-                    let storage_slice = storage
-                        .getattr(intern!(py, "__getitem__"))?
-                        .call1((slice,))?;
-
-                    let sys = PyModule::import(py, intern!(py, "sys"))?;
-                    let byteorder: String = sys.getattr(intern!(py, "byteorder"))?.extract()?;
-
-                    let mut tensor = torch
-                        .getattr(intern!(py, "asarray"))?
-                        .call((storage_slice,), Some(&kwargs))?
-                        .getattr(intern!(py, "view"))?
-                        .call((), Some(&view_kwargs))?;
-
-                    if byteorder == "big" {
-                        let inplace_kwargs =
-                            [(intern!(py, "inplace"), PyBool::new(py, false))].into_py_dict(py)?;
-
-                        let intermediary_dtype = match info.dtype {
-                            Dtype::BF16 => Some(Dtype::F16),
-                            Dtype::F8_E5M2 => Some(Dtype::U8),
-                            Dtype::F8_E4M3 => Some(Dtype::U8),
-                            _ => None,
-                        };
-                        if let Some(intermediary_dtype) = intermediary_dtype {
-                            // Reinterpret to f16 for numpy compatibility.
-                            let dtype: PyObject = get_pydtype(torch, intermediary_dtype, false)?;
-                            let view_kwargs = [(intern!(py, "dtype"), dtype)].into_py_dict(py)?;
-                            tensor = tensor
-                                .getattr(intern!(py, "view"))?
-                                .call((), Some(&view_kwargs))?;
-                        }
-                        let numpy = tensor
-                            .getattr(intern!(py, "numpy"))?
-                            .call0()?
-                            .getattr("byteswap")?
-                            .call((), Some(&inplace_kwargs))?;
-                        tensor = torch.getattr(intern!(py, "from_numpy"))?.call1((numpy,))?;
-                        if intermediary_dtype.is_some() {
-                            // Reinterpret to f16 for numpy compatibility.
-                            let dtype: PyObject = get_pydtype(torch, info.dtype, false)?;
-                            let view_kwargs = [(intern!(py, "dtype"), dtype)].into_py_dict(py)?;
-                            tensor = tensor
-                                .getattr(intern!(py, "view"))?
-                                .call((), Some(&view_kwargs))?;
-                        }
+            Storage::TorchStorage(storage, _) => {
+                let torch = get_module(py, &TORCH_MODULE)?;
+                let kwargs = self.storage_kwargs(py)?;
+                let view_kwargs =
+                    [(intern!(py, "dtype"), self.pydtype(py, info.dtype)?)].into_py_dict(py)?;
+                let shape = info.shape.to_vec();
+                let shape: PyObject = shape.into_pyobject(py)?.into();
+
+                let slice = PySlice::new(py, start as isize, stop as isize, 1);
+                let storage: &PyObject = storage
+                    .get()
+                    .ok_or_else(|| BinTensorError::new_err("Could not find storage"))?;
+                let storage: &PyBound<PyAny> = storage.bind(py);
+                let storage_slice = storage
+                    .getattr(intern!(py, "__getitem__"))?
+                    .call1((slice,))?;
+
+                let mut tensor = torch
+                    .getattr(intern!(py, "asarray"))?
+                    .call((storage_slice,), Some(&kwargs))?
+                    .getattr(intern!(py, "view"))?
+                    .call((), Some(&view_kwargs))?;
+
+                if BIG_ENDIAN {
+                    let inplace_kwargs =
+                        [(intern!(py, "inplace"), PyBool::new(py, false))].into_py_dict(py)?;
+
+                    let intermediary_dtype = match info.dtype {
+                        Dtype::BF16 => Some(Dtype::F16),
+                        Dtype::F8_E5M2 => Some(Dtype::U8),
+                        Dtype::F8_E4M3 => Some(Dtype::U8),
+                        _ => None,
+                    };
+                    if let Some(intermediary_dtype) = intermediary_dtype {
+                        // Reinterpret to f16 for numpy compatibility.
+                        let dtype = self.pydtype(py, intermediary_dtype)?;
+                        let view_kwargs = [(intern!(py, "dtype"), dtype)].into_py_dict(py)?;
+                        tensor = tensor
+                            .getattr(intern!(py, "view"))?
+                            .call((), Some(&view_kwargs))?;
                     }
+                    let numpy = tensor
+                        .getattr(intern!(py, "numpy"))?
+                        .call0()?
+                        .getattr("byteswap")?
+                        .call((), Some(&inplace_kwargs))?;
+                    tensor = torch.getattr(intern!(py, "from_numpy"))?.call1((numpy,))?;
+                    if intermediary_dtype.is_some() {
+                        // Reinterpret to f16 for numpy compatibility.
+                        tensor = tensor
+                            .getattr(intern!(py, "view"))?
+                            .call((), Some(&view_kwargs))?;
+                    }
+                }
 
-                    tensor = tensor.getattr(intern!(py, "reshape"))?.call1((shape,))?;
-                    Ok(tensor.into_pyobject(py)?.into())
-                })
+                tensor = tensor.getattr(intern!(py, "reshape"))?.call1((shape,))?;
+                Ok(tensor.into_pyobject(py)?.into())
             }
         }
     }
@@ -686,7 +2093,9 @@ impl Open {
     ///
     /// ```
     pub fn get_slice(&self, name: &str) -> PyResult<PySafeSlice> {
-        if let Some(&info) = self.metadata.tensors().get(name) {
+        if let Some(info) = self.metadata.info(name) {
+            self.record([name]);
+            self.verify([name])?;
             Ok(PySafeSlice {
                 info: info.clone(),
                 framework: self.framework.clone(),
@@ -700,6 +2109,128 @@ impl Open {
             )))
         }
     }
+
+    /// Asks the kernel to read the given tensors ahead, without waiting for it
+    ///
+    /// Args:
+    ///     names (`List[str]`):
+    ///         The names of the tensors which are about to be read
+    ///
+    /// Example:
+    /// ```python
+    /// from bintensors import safe_open
+    ///
+    /// with safe_open("model.bintensors", framework="pt") as f:
+    ///     f.prefetch(["experts.3.w1", "experts.3.w2"])
+    ///     # ... run something else while the pages are read in
+    ///     w1 = f.get_tensor("experts.3.w1")
+    ///
+    /// ```
+    pub fn prefetch(&self, names: Vec<String>) -> PyResult<()> {
+        let ranges = self.byte_ranges(&names)?;
+        #[cfg(unix)]
+        for (start, stop) in ranges {
+            self.storage
+                .mmap()
+                .advise_range(memmap2::Advice::WillNeed, start, stop - start)
+                .map_err(|e| BinTensorError::new_err(format!("Error while prefetching: {e}")))?;
+        }
+        #[cfg(not(unix))]
+        let _ = ranges;
+        Ok(())
+    }
+
+    /// Tells the kernel how the whole file is going to be accessed
+    ///
+    /// Args:
+    ///     advice (`str`):
+    ///         `"sequential"` for aggressive readahead, `"random"` to disable
+    ///         readahead or `"normal"` to restore the default behavior.
+    pub fn advise(&self, advice: &str) -> PyResult<()> {
+        #[cfg(unix)]
+        {
+            let advice = match advice {
+                "normal" => memmap2::Advice::Normal,
+                "sequential" => memmap2::Advice::Sequential,
+                "random" => memmap2::Advice::Random,
+                advice => {
+                    return Err(BinTensorError::new_err(format!(
+                        "advice {advice} is invalid, expected normal, sequential or random"
+                    )))
+                }
+            };
+            self.storage
+                .mmap()
+                .advise(advice)
+                .map_err(|e| BinTensorError::new_err(format!("Error while advising: {e}")))?;
+        }
+        #[cfg(not(unix))]
+        let _ = advice;
+        Ok(())
+    }
+
+    /// Drops the pages of the given tensors from the mapping and, on Linux,
+    /// from the page cache
+    ///
+    /// Tensors already read stay valid, the pages are read again from the file
+    /// if they are accessed later on. Pages still mapped elsewhere stay in
+    /// memory: with `framework="pt"` (torch 1.11 or later) the returned tensors
+    /// live in torch's own mapping of the file, which `release` does not touch,
+    /// so their pages are only dropped once the tensors are freed.
+    ///
+    /// Args:
+    ///     names (`List[str]`):
+    ///         The names of the tensors which have been copied elsewhere
+    pub fn release(&self, names: Vec<String>) -> PyResult<()> {
+        let ranges = self.byte_ranges(&names)?;
+        #[cfg(unix)]
+        for (start, stop) in ranges {
+            let mmap = self.storage.mmap();
+            // SAFETY: the mapping is private and never written to, dropped pages
+            // are transparently read back from the file with the same content,
+            // so arrays borrowing them stay valid.
+            unsafe {
+                mmap.unchecked_advise_range(memmap2::UncheckedAdvice::DontNeed, start, stop - start)
+            }
+            .map_err(|e| BinTensorError::new_err(format!("Error while releasing: {e}")))?;
+            // Dropping the pages from the mapping leaves them in the page cache.
+            #[cfg(target_os = "linux")]
+            {
+                use std::os::unix::io::AsRawFd;
+                // SAFETY: `posix_fadvise` only reads its arguments and `file` is open.
+                let err = unsafe {
+                    libc::posix_fadvise(
+                        self.file.as_raw_fd(),
+                        start as libc::off_t,
+                        (stop - start) as libc::off_t,
+                        libc::POSIX_FADV_DONTNEED,
+                    )
+                };
+                if err != 0 {
+                    return Err(BinTensorError::new_err(format!(
+                        "Error while releasing: {}",
+                        std::io::Error::from_raw_os_error(err)
+                    )));
+                }
+            }
+        }
+        #[cfg(not(unix))]
+        let _ = ranges;
+        Ok(())
+    }
+
+    /// Byte ranges in the file of the non empty tensors called `names`.
+    fn byte_ranges(&self, names: &[String]) -> PyResult<Vec<(usize, usize)>> {
+        let mut ranges = Vec::with_capacity(names.len());
+        for name in names {
+            let info = self.info(name)?;
+            let (start, stop) = info.data_offsets;
+            if start < stop {
+                ranges.push((start + self.offset, stop + self.offset));
+            }
+        }
+        Ok(ranges)
+    }
 }
 
 /// Opens a bintensors lazily and returns tensors as asked
@@ -714,6 +2245,15 @@ impl Open {
 ///
 ///     device (`str`, defaults to `"cpu"`):
 ///         The device on which you want the tensors.
+///
+///     trace (`bool`, defaults to `False`):
+///         Record the tensors accessed and when, see `trace()` and `repack`.
+///
+///     verify (`str`, *optional*):
+///         `"lazy"` checks every tensor against the checksum recorded in the
+///         header the first time it is read, through `get_tensor`, `get_tensors`
+///         or `get_slice` (which checks the whole tensor). The file must have
+///         been saved with `checksums=True`. By default nothing is verified.
 #[pyclass]
 #[allow(non_camel_case_types)]
 struct safe_open {
@@ -733,9 +2273,28 @@ impl safe_open {
 #[pymethods]
 impl safe_open {
     #[new]
-    #[pyo3(signature = (filename, framework, device=Some(Device::Cpu)))]
-    fn new(filename: PathBuf, framework: Framework, device: Option<Device>) -> PyResult<Self> {
-        let inner = Some(Open::new(filename, framework, device)?);
+    #[pyo3(signature = (filename, framework, device=Some(Device::Cpu), trace=false, verify=None))]
+    fn new(
+        py: Python<'_>,
+        filename: PathBuf,
+        framework: Framework,
+        device: Option<Device>,
+        trace: bool,
+        verify: Option<&str>,
+    ) -> PyResult<Self> {
+        let verify = match verify {
+            None => false,
+            Some("lazy") => true,
+            Some(verify) => {
+                return Err(BinTensorError::new_err(format!(
+                    "verify {verify} is invalid, expected lazy"
+                )))
+            }
+        };
+        // Mapping the file and parsing its header do not need the GIL, which
+        // lets several files be opened concurrently from Python threads.
+        let inner =
+            Some(py.allow_threads(|| Open::new(filename, framework, device, trace, verify))?);
         Ok(Self { inner })
     }
 
@@ -771,6 +2330,10 @@ impl safe_open {
     /// Args:
     ///     name (`str`):
     ///         The name of the tensor you want
+    ///     dtype (`Union[str, dtype]`, *optional*):
+    ///         Convert the tensor to this dtype, a name like `"float32"` or a
+    ///         framework dtype, in a single pass out of the file. F16, BF16, F32
+    ///         and F64 convert into each other and F8 converts to F16 and F32.
     ///
     /// Returns:
     ///     (`Tensor`):
@@ -782,10 +2345,52 @@ impl safe_open {
     ///
     /// with safe_open("model.bintensors", framework="pt", device=0) as f:
     ///     tensor = f.get_tensor("embedding")
+    ///     upcast = f.get_tensor("lm_head", dtype=torch.float32)
+    ///
+    /// ```
+    #[pyo3(signature = (name, dtype=None))]
+    pub fn get_tensor(&self, name: &str, dtype: Option<PyBound<PyAny>>) -> PyResult<PyObject> {
+        let dtype = dtype.as_ref().map(requested_dtype).transpose()?;
+        self.inner()?.get_tensor(name, dtype)
+    }
+
+    /// Returns several tensors at once
+    ///
+    /// Args:
+    ///     names (`List[str]`, *optional*):
+    ///         The names of the tensors you want, all of them by default.
+    ///     num_threads (`int`, *optional*):
+    ///         Copy the tensors out of the file with this many threads, `0` uses
+    ///         all available cores. By default the tensors are built one after
+    ///         the other on the calling thread.
+    ///     dtype (`Union[str, dtype]`, *optional*):
+    ///         Convert the floating point tensors to this dtype while copying them
+    ///         out of the file, as for `get_tensor`. The other tensors are kept as
+    ///         stored.
+    ///
+    /// Returns:
+    ///     (`Dict[str, Tensor]`):
+    ///         The tensors in the framework you opened the file for, in the order
+    ///         of `names`, or ordered by offset when `names` is not given.
+    ///
+    /// Example:
+    /// ```python
+    /// from bintensors import safe_open
+    ///
+    /// with safe_open("model.bintensors", framework="pt", device=0) as f:
+    ///     tensors = f.get_tensors()
     ///
     /// ```
-    pub fn get_tensor(&self, name: &str) -> PyResult<PyObject> {
-        self.inner()?.get_tensor(name)
+    #[pyo3(signature = (names=None, num_threads=None, dtype=None))]
+    pub fn get_tensors<'py>(
+        &self,
+        py: Python<'py>,
+        names: Option<Vec<String>>,
+        num_threads: Option<usize>,
+        dtype: Option<PyBound<'py, PyAny>>,
+    ) -> PyResult<PyBound<'py, PyDict>> {
+        let dtype = dtype.as_ref().map(requested_dtype).transpose()?;
+        self.inner()?.get_tensors(py, names, num_threads, dtype)
     }
 
     /// Returns a full slice view object
@@ -809,6 +2414,73 @@ impl safe_open {
         self.inner()?.get_slice(name)
     }
 
+    /// Returns the accesses recorded since the file was opened
+    ///
+    /// Returns:
+    ///     (`List[Tuple[str, float]]`):
+    ///         The name of every tensor accessed through `get_tensor`, `get_tensors`
+    ///         or `get_slice`, with the seconds elapsed since opening, in call order.
+    ///
+    /// Example:
+    /// ```python
+    /// from bintensors import repack, safe_open
+    ///
+    /// with safe_open("model.bintensors", framework="pt", trace=True) as f:
+    ///     # ... warm up the model
+    ///     trace = f.trace()
+    /// repack("model.bintensors", "model.packed.bintensors", trace)
+    ///
+    /// ```
+    pub fn trace(&self) -> PyResult<Vec<(String, f64)>> {
+        self.inner()?.trace()
+    }
+
+    /// Asks the kernel to read the given tensors ahead, without waiting for it
+    ///
+    /// Args:
+    ///     names (`List[str]`):
+    ///         The names of the tensors which are about to be read
+    ///
+    /// Example:
+    /// ```python
+    /// from bintensors import safe_open
+    ///
+    /// with safe_open("model.bintensors", framework="pt") as f:
+    ///     f.prefetch(["experts.3.w1", "experts.3.w2"])
+    ///     # ... run something else while the pages are read in
+    ///     w1 = f.get_tensor("experts.3.w1")
+    ///
+    /// ```
+    pub fn prefetch(&self, names: Vec<String>) -> PyResult<()> {
+        self.inner()?.prefetch(names)
+    }
+
+    /// Tells the kernel how the whole file is going to be accessed
+    ///
+    /// Args:
+    ///     advice (`str`):
+    ///         `"sequential"` for aggressive readahead, `"random"` to disable
+    ///         readahead or `"normal"` to restore the default behavior.
+    pub fn advise(&self, advice: &str) -> PyResult<()> {
+        self.inner()?.advise(advice)
+    }
+
+    /// Drops the pages of the given tensors from the mapping and, on Linux,
+    /// from the page cache
+    ///
+    /// Tensors already read stay valid, the pages are read again from the file
+    /// if they are accessed later on. Pages still mapped elsewhere stay in
+    /// memory: with `framework="pt"` (torch 1.11 or later) the returned tensors
+    /// live in torch's own mapping of the file, which `release` does not touch,
+    /// so their pages are only dropped once the tensors are freed.
+    ///
+    /// Args:
+    ///     names (`List[str]`):
+    ///         The names of the tensors which have been copied elsewhere
+    pub fn release(&self, names: Vec<String>) -> PyResult<()> {
+        self.inner()?.release(names)
+    }
+
     /// Start the context manager
     pub fn __enter__(slf: Py<Self>) -> Py<Self> {
         slf
@@ -833,12 +2505,27 @@ struct PySafeSlice {
 enum SliceIndex<'a> {
     Slice(PyBound<'a, PySlice>),
     Index(i32),
+    Gather(IndexList),
 }
 
-#[derive(FromPyObject)]
-enum Slice<'a> {
-    Slice(SliceIndex<'a>),
-    Slices(Vec<SliceIndex<'a>>),
+/// Indices to gather along a dimension, from a Python `list` or from anything
+/// with a `tolist` method returning one (numpy arrays, torch tensors).
+struct IndexList(Vec<i64>);
+
+impl<'source> FromPyObject<'source> for IndexList {
+    fn extract_bound(ob: &PyBound<'source, PyAny>) -> PyResult<Self> {
+        let list = if ob.is_instance_of::<PyList>() {
+            ob.clone()
+        } else {
+            ob.call_method0(intern!(ob.py(), "tolist"))?
+        };
+        if !list.is_instance_of::<PyList>() {
+            return Err(BinTensorError::new_err(format!(
+                "Expected a 1-D list of indices, got {ob}"
+            )));
+        }
+        Ok(IndexList(list.extract()?))
+    }
 }
 
 use std::fmt;
@@ -907,23 +2594,22 @@ impl PySafeSlice {
     pub fn __getitem__(&self, slices: &PyBound<'_, PyAny>) -> PyResult<PyObject> {
         match &self.storage.as_ref() {
             Storage::Mmap(mmap) => {
-                let pyslices = slices;
-                let slices: Slice = pyslices.extract()?;
-                let is_list = pyslices.is_instance_of::<PyList>();
-                let slices: Vec<SliceIndex> = match slices {
-                    Slice::Slice(slice) => vec![slice],
-                    Slice::Slices(slices) => {
-                        if slices.is_empty() && is_list {
-                            vec![SliceIndex::Slice(PySlice::new(pyslices.py(), 0, 0, 0))]
-                        } else if is_list {
-                            return Err(BinTensorError::new_err(
-                                "Non empty lists are not implemented",
-                            ));
-                        } else {
-                            slices
-                        }
-                    }
+                // A tuple indexes several dimensions, anything else (slice,
+                // int, list or array of indices) only the leading one.
+                let slices: Vec<SliceIndex> = if slices.is_instance_of::<PyTuple>() {
+                    slices.extract()?
+                } else {
+                    vec![slices.extract()?]
                 };
+                let gathers = slices
+                    .iter()
+                    .filter(|slice| matches!(slice, SliceIndex::Gather(_)))
+                    .count();
+                if gathers > 1 {
+                    return Err(BinTensorError::new_err(
+                        "Only one list of indices is supported per slice",
+                    ));
+                }
                 let data = &mmap[self.info.data_offsets.0 + self.offset
                     ..self.info.data_offsets.1 + self.offset];
 
@@ -955,25 +2641,29 @@ impl PySafeSlice {
                 Python::with_gil(|py| {
                     let array: PyObject =
                         PyByteArray::new_with(py, length, |bytes: &mut [u8]| {
-                            for slice in iterator {
-                                let len = slice.len();
-                                bytes[offset..offset + slice.len()].copy_from_slice(slice);
-                                offset += len;
-                            }
+                            py.allow_threads(|| {
+                                for slice in iterator {
+                                    let len = slice.len();
+                                    bytes[offset..offset + slice.len()].copy_from_slice(slice);
+                                    offset += len;
+                                }
+                            });
                             Ok(())
                         })?
                         .into_any()
                         .into();
+                    let (module, is_numpy) = framework_module(py, &self.framework)?;
                     create_tensor(
+                        py,
                         &self.framework,
-                        self.info.dtype,
+                        get_pydtype(module, self.info.dtype, is_numpy)?,
                         &newshape,
                         array,
                         &self.device,
                     )
                 })
             }
-            Storage::TorchStorage(storage) => Python::with_gil(|py| -> PyResult<PyObject> {
+            Storage::TorchStorage(storage, _) => Python::with_gil(|py| -> PyResult<PyObject> {
                 let torch = get_module(py, &TORCH_MODULE)?;
                 let dtype: PyObject = get_pydtype(torch, self.info.dtype, false)?;
                 let torch_uint8: PyObject = get_pydtype(torch, Dtype::U8, false)?;
@@ -996,15 +2686,12 @@ impl PySafeSlice {
 
                 let slices = slices.into_pyobject(py)?;
 
-                let sys = PyModule::import(py, intern!(py, "sys"))?;
-                let byteorder: String = sys.getattr(intern!(py, "byteorder"))?.extract()?;
-
                 let mut tensor = torch
                     .getattr(intern!(py, "asarray"))?
                     .call((storage_slice,), Some(&kwargs))?
                     .getattr(intern!(py, "view"))?
                     .call((), Some(&view_kwargs))?;
-                if byteorder == "big" {
+                if BIG_ENDIAN {
                     // Important, do NOT use inplace otherwise the slice itself
                     // is byteswapped, meaning multiple calls will fails
                     let inplace_kwargs =
@@ -1066,111 +2753,113 @@ fn get_module<'a>(
     Ok(module)
 }
 
+/// The framework module tensors are built with, and whether it is numpy.
+fn framework_module<'py>(
+    py: Python<'py>,
+    framework: &Framework,
+) -> PyResult<(&'py PyBound<'py, PyModule>, bool)> {
+    let (cell, is_numpy) = match framework {
+        Framework::Pytorch => (&TORCH_MODULE, false),
+        _ => (&NUMPY_MODULE, true),
+    };
+    let module = cell
+        .get()
+        .ok_or_else(|| BinTensorError::new_err(format!("Could not find module {framework:?}",)))?
+        .bind(py);
+    Ok((module, is_numpy))
+}
+
 fn create_tensor<'a>(
+    py: Python<'_>,
     framework: &'a Framework,
-    dtype: Dtype,
+    dtype: PyObject,
     shape: &'a [usize],
     array: PyObject,
     device: &'a Device,
 ) -> PyResult<PyObject> {
-    Python::with_gil(|py| -> PyResult<PyObject> {
-        let (module, is_numpy): (&PyBound<'_, PyModule>, bool) = match framework {
-            Framework::Pytorch => (
-                TORCH_MODULE
-                    .get()
-                    .ok_or_else(|| {
-                        BinTensorError::new_err(format!("Could not find module {framework:?}",))
-                    })?
-                    .bind(py),
-                false,
-            ),
-            _ => (
-                NUMPY_MODULE
-                    .get()
-                    .ok_or_else(|| {
-                        BinTensorError::new_err(format!("Could not find module {framework:?}",))
-                    })?
-                    .bind(py),
-                true,
-            ),
-        };
-        let dtype: PyObject = get_pydtype(module, dtype, is_numpy)?;
-        let count: usize = shape.iter().product();
-        let shape = shape.to_vec();
-        let tensor = if count == 0 {
-            // Torch==1.10 does not allow frombuffer on empty buffers so we create
-            // the tensor manually.
-            // let zeros = module.getattr(intern!(py, "zeros"))?;
-            let shape: PyObject = shape.clone().into_pyobject(py)?.into();
-            let args = (shape,);
-            let kwargs = [(intern!(py, "dtype"), dtype)].into_py_dict(py)?;
-            module.call_method("zeros", args, Some(&kwargs))?
-        } else {
-            // let frombuffer = module.getattr(intern!(py, "frombuffer"))?;
-            let kwargs = [
-                (intern!(py, "buffer"), array),
-                (intern!(py, "dtype"), dtype),
-            ]
-            .into_py_dict(py)?;
-            let mut tensor = module.call_method("frombuffer", (), Some(&kwargs))?;
-            let sys = PyModule::import(py, intern!(py, "sys"))?;
-            let byteorder: String = sys.getattr(intern!(py, "byteorder"))?.extract()?;
-            if byteorder == "big" {
-                let inplace_kwargs =
-                    [(intern!(py, "inplace"), PyBool::new(py, false))].into_py_dict(py)?;
-                tensor = tensor
-                    .getattr("byteswap")?
-                    .call((), Some(&inplace_kwargs))?;
+    let (module, _) = framework_module(py, framework)?;
+    let count: usize = shape.iter().product();
+    let shape = shape.to_vec();
+    let tensor = if count == 0 {
+        // Torch==1.10 does not allow frombuffer on empty buffers so we create
+        // the tensor manually.
+        // let zeros = module.getattr(intern!(py, "zeros"))?;
+        let shape: PyObject = shape.clone().into_pyobject(py)?.into();
+        let args = (shape,);
+        let kwargs = [(intern!(py, "dtype"), dtype)].into_py_dict(py)?;
+        module.call_method("zeros", args, Some(&kwargs))?
+    } else {
+        // let frombuffer = module.getattr(intern!(py, "frombuffer"))?;
+        let kwargs = [
+            (intern!(py, "buffer"), array),
+            (intern!(py, "dtype"), dtype),
+        ]
+        .into_py_dict(py)?;
+        let mut tensor = module.call_method("frombuffer", (), Some(&kwargs))?;
+        if BIG_ENDIAN {
+            let inplace_kwargs =
+                [(intern!(py, "inplace"), PyBool::new(py, false))].into_py_dict(py)?;
+            tensor = tensor
+                .getattr("byteswap")?
+                .call((), Some(&inplace_kwargs))?;
+        }
+        tensor
+    };
+    let tensor: PyBound<'_, PyAny> = tensor.call_method1("reshape", (shape,))?;
+    Ok(to_framework(py, framework, tensor, device)?.into())
+}
+
+/// Converts a numpy array, or a CPU torch tensor, into the framework and device asked for.
+fn to_framework<'py>(
+    py: Python<'py>,
+    framework: &Framework,
+    mut tensor: PyBound<'py, PyAny>,
+    device: &Device,
+) -> PyResult<PyBound<'py, PyAny>> {
+    let tensor = match framework {
+        Framework::Flax => {
+            let module = Python::with_gil(|py| -> PyResult<&Py<PyModule>> {
+                let module = PyModule::import(py, intern!(py, "jax"))?;
+                Ok(FLAX_MODULE.get_or_init_py_attached(py, || module.into()))
+            })?
+            .bind(py);
+            module
+                .getattr(intern!(py, "numpy"))?
+                .getattr(intern!(py, "array"))?
+                .call1((tensor,))?
+        }
+        Framework::Tensorflow => {
+            let module = Python::with_gil(|py| -> PyResult<&Py<PyModule>> {
+                let module = PyModule::import(py, intern!(py, "tensorflow"))?;
+                Ok(TENSORFLOW_MODULE.get_or_init_py_attached(py, || module.into()))
+            })?
+            .bind(py);
+            module
+                .getattr(intern!(py, "convert_to_tensor"))?
+                .call1((tensor,))?
+        }
+        Framework::Mlx => {
+            let module = Python::with_gil(|py| -> PyResult<&Py<PyModule>> {
+                let module = PyModule::import(py, intern!(py, "mlx"))?;
+                Ok(MLX_MODULE.get_or_init_py_attached(py, || module.into()))
+            })?
+            .bind(py);
+            module
+                .getattr(intern!(py, "core"))?
+                // .getattr(intern!(py, "array"))?
+                .call_method1("array", (tensor,))?
+        }
+        Framework::Pytorch => {
+            if device != &Device::Cpu {
+                let device: PyObject = device.clone().into_pyobject(py)?.into();
+                let kwargs = PyDict::new(py);
+                tensor = tensor.call_method("to", (device,), Some(&kwargs))?;
             }
             tensor
-        };
-        let mut tensor: PyBound<'_, PyAny> = tensor.call_method1("reshape", (shape,))?;
-        let tensor = match framework {
-            Framework::Flax => {
-                let module = Python::with_gil(|py| -> PyResult<&Py<PyModule>> {
-                    let module = PyModule::import(py, intern!(py, "jax"))?;
-                    Ok(FLAX_MODULE.get_or_init_py_attached(py, || module.into()))
-                })?
-                .bind(py);
-                module
-                    .getattr(intern!(py, "numpy"))?
-                    .getattr(intern!(py, "array"))?
-                    .call1((tensor,))?
-            }
-            Framework::Tensorflow => {
-                let module = Python::with_gil(|py| -> PyResult<&Py<PyModule>> {
-                    let module = PyModule::import(py, intern!(py, "tensorflow"))?;
-                    Ok(TENSORFLOW_MODULE.get_or_init_py_attached(py, || module.into()))
-                })?
-                .bind(py);
-                module
-                    .getattr(intern!(py, "convert_to_tensor"))?
-                    .call1((tensor,))?
-            }
-            Framework::Mlx => {
-                let module = Python::with_gil(|py| -> PyResult<&Py<PyModule>> {
-                    let module = PyModule::import(py, intern!(py, "mlx"))?;
-                    Ok(MLX_MODULE.get_or_init_py_attached(py, || module.into()))
-                })?
-                .bind(py);
-                module
-                    .getattr(intern!(py, "core"))?
-                    // .getattr(intern!(py, "array"))?
-                    .call_method1("array", (tensor,))?
-            }
-            Framework::Pytorch => {
-                if device != &Device::Cpu {
-                    let device: PyObject = device.clone().into_pyobject(py)?.into();
-                    let kwargs = PyDict::new(py);
-                    tensor = tensor.call_method("to", (device,), Some(&kwargs))?;
-                }
-                tensor
-            }
-            Framework::Numpy => tensor,
-        };
-        // let tensor = tensor.into_py_bound(py);
-        Ok(tensor.into())
-    })
+        }
+        Framework::Numpy => tensor,
+    };
+    Ok(tensor)
 }
 
 fn get_pydtype(module: &PyBound<'_, PyModule>, dtype: Dtype, is_numpy: bool) -> PyResult<PyObject> {
@@ -1228,8 +2917,16 @@ pyo3::create_exception!(
 fn _bintensors_rs(m: &PyBound<'_, PyModule>) -> PyResult<()> {
     m.add_function(wrap_pyfunction!(serialize, m)?)?;
     m.add_function(wrap_pyfunction!(serialize_file, m)?)?;
+    m.add_function(wrap_pyfunction!(serialize_file_with_checksum, m)?)?;
+    m.add_function(wrap_pyfunction!(checksum_file, m)?)?;
+    m.add_function(wrap_pyfunction!(verify_file, m)?)?;
+    m.add_function(wrap_pyfunction!(serialize_with_checksum, m)?)?;
+    m.add_function(wrap_pyfunction!(serialize_into, m)?)?;
+    m.add_function(wrap_pyfunction!(serialized_size, m)?)?;
     // m.add_function(wrap_pyfunction!(serialize_checksum, m)?)?;
     m.add_function(wrap_pyfunction!(deserialize, m)?)?;
+    m.add_function(wrap_pyfunction!(inspect, m)?)?;
+    m.add_function(wrap_pyfunction!(repack, m)?)?;
     m.add_class::<safe_open>()?;
     m.add("BintensorError", m.py().get_type::<BinTensorError>())?;
     m.add("__version__", env!("CARGO_PKG_VERSION"))?;
@@ -117,6 +117,18 @@ def test_save_file_and_load_file_consistency_jax():
                 assert _compare_jax_array(loaded_dict[key], value)
 
 
+def test_load_file_with_dtype_jax():
+    tensor_dict = {"weight": jax.ones((4, 3), dtype=jax.float16), "index": jax.arange(5, dtype=jax.int32)}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = f"{tmpdir}/dtype.bintensors"
+        save_file(tensor_dict, filename)
+        loaded_dict = load_file(filename, dtype=jax.float32)
+        assert loaded_dict["weight"].dtype == jax.float32
+        assert loaded_dict["index"].dtype == jax.int32
+        for key, value in tensor_dict.items():
+            assert _compare_jax_array(loaded_dict[key], value)
+
+
 def test_safe_open_access_and_metadata_jax():
     tensor_dict = create_gpt2_numpy_dict(1)
     with tempfile.NamedTemporaryFile(delete=False) as tmp:
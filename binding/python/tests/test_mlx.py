@@ -116,6 +116,18 @@ def test_save_file_and_load_file_consistency_mlx():
                 assert _compare_mlx_array(loaded_dict[key], value)
 
 
+def test_load_file_with_dtype_mlx():
+    tensor_dict = {"weight": mlx.ones((4, 3), dtype=mlx.float16), "index": mlx.arange(5, dtype=mlx.int32)}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = f"{tmpdir}/dtype.bintensors"
+        save_file(tensor_dict, filename)
+        loaded_dict = load_file(filename, dtype=mlx.float32)
+        assert loaded_dict["weight"].dtype == mlx.float32
+        assert loaded_dict["index"].dtype == mlx.int32
+        for key, value in tensor_dict.items():
+            assert _compare_mlx_array(loaded_dict[key], value)
+
+
 def test_safe_open_access_and_metadata_mlx():
     tensor_dict = create_gpt2_numpy_dict(1)
     with tempfile.NamedTemporaryFile(delete=False) as tmp:
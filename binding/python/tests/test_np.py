@@ -1,10 +1,31 @@
 import pytest
 
+import os
+import hashlib
 import tempfile
 import numpy as np
 
 from typing import Dict, Tuple
-from bintensors.numpy import load, load_file, save, save_file, safe_open, save_with_checksum
+from bintensors import (
+    checksum_file,
+    inspect,
+    repack,
+    serialize_into,
+    serialized_size,
+    sharded_open,
+    verify_file,
+)
+from bintensors.numpy import (
+    load,
+    load_file,
+    load_sharded,
+    save,
+    save_file,
+    save_file_with_checksum,
+    save_sharded,
+    safe_open,
+    save_with_checksum,
+)
 
 
 def _compare_np_array(lhs: np.ndarray, rhs: np.ndarray) -> bool:
@@ -160,6 +181,49 @@ def test_checksum_two_same_models():
         assert checksum1 == checksum2, "These checksum are equivilent"
 
 
+def test_checksum_matches_hashlib():
+    tensors = {"a": np.arange(1000, dtype=np.float32), "b": np.arange(3, dtype=np.uint8)}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = f"{tmpdir}/checksum.bintensors"
+        for hasher in [hashlib.sha1, hashlib.sha256, hashlib.sha3_512, hashlib.md5]:
+            checksum, buffer = save_with_checksum(tensors, metadata={"format": "np"}, hasher=hasher)
+            assert buffer == save(tensors, metadata={"format": "np"})
+            assert checksum == hasher(buffer).digest()
+            if hasher is hashlib.md5:
+                # md5 is not hashed natively, files cannot be checksummed with it.
+                with pytest.raises(Exception):
+                    save_file_with_checksum(tensors, filename, hasher=hasher)
+                continue
+            assert save_file_with_checksum(tensors, filename, metadata={"format": "np"}, hasher=hasher) == checksum
+            with open(filename, "rb") as f:
+                assert f.read() == buffer
+
+
+def test_checksum_lambda_hasher():
+    tensors = {"a": np.arange(1000, dtype=np.float32)}
+    checksum, buffer = save_with_checksum(tensors, hasher=lambda data: hashlib.sha256(data))
+    assert buffer == save(tensors)
+    assert checksum == hashlib.sha256(buffer).digest()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with pytest.raises(Exception):
+            save_file_with_checksum(tensors, f"{tmpdir}/checksum.bintensors", hasher=lambda data: hashlib.sha256(data))
+
+
+def test_tree_checksum_file():
+    # Larger than one 4 MiB chunk so several chunks are hashed in parallel.
+    tensors = {"a": np.arange(3 * 1024 * 1024, dtype=np.float32), "b": np.arange(3, dtype=np.uint8)}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = f"{tmpdir}/tree.bintensors"
+        checksum = save_file_with_checksum(tensors, filename, hasher=hashlib.sha256, tree=True)
+        with open(filename, "rb") as f:
+            assert checksum != hashlib.sha256(f.read()).digest()
+        assert checksum_file(filename, hasher=hashlib.sha256) == checksum
+        assert checksum_file(filename, hasher=hashlib.sha256, num_threads=1) == checksum
+        verify_file(filename, checksum, hasher=hashlib.sha256)
+        with pytest.raises(Exception):
+            verify_file(filename, checksum_file(filename), hasher=hashlib.sha256)
+
+
 def test_checksum_two_same_models_with_diffrent_framework():
     import torch
     from bintensors.torch import save_with_checksum as save_with_checksum_pt
@@ -174,3 +238,451 @@ def test_checksum_two_same_models_with_diffrent_framework():
         checksum1, _ = save_with_checksum(model_1)
         checksum2, _ = save_with_checksum_pt(model_2)
         assert checksum1 == checksum2, "These checksum are equivilent"
+
+
+def test_safe_open_zero_copy_tensors_outlive_handle():
+    tensor_dict = {"ln.weight": np.arange(16, dtype=np.float32).reshape(4, 4), "ln.bias": np.ones((4,))}
+    with tempfile.NamedTemporaryFile(delete=False) as tmp:
+        filename = tmp.name
+        save_file(tensor_dict, filename)
+
+        with safe_open(filename, "numpy") as model:
+            weight = model.get_tensor("ln.weight")
+            bias = model.get_tensor("ln.bias")
+
+        # arrays borrow the memory map, they are read-only and keep it alive
+        assert not weight.flags.writeable
+        assert _compare_np_array(weight, tensor_dict["ln.weight"])
+        assert _compare_np_array(bias, tensor_dict["ln.bias"])
+
+
+def test_save_file_with_threads_matches_sequential():
+    tensor_dict = create_gpt2_numpy_dict(1)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        sequential = f"{tmpdir}/sequential.bintensors"
+        parallel = f"{tmpdir}/parallel.bintensors"
+        save_file(tensor_dict, sequential)
+        save_file(tensor_dict, parallel, num_threads=4)
+
+        with open(sequential, "rb") as lhs, open(parallel, "rb") as rhs:
+            assert lhs.read() == rhs.read()
+
+        loaded_dict = load_file(parallel)
+        for key, value in tensor_dict.items():
+            assert _compare_np_array(loaded_dict[key], value)
+
+
+def test_serialize_reads_buffers_in_place():
+    from bintensors import serialize
+
+    array = np.arange(6, dtype=np.float32).reshape(2, 3)
+    expected = serialize({"a": {"dtype": "float32", "shape": [2, 3], "data": array.tobytes()}})
+
+    for data in (array, memoryview(array.tobytes()), bytearray(array.tobytes())):
+        out = serialize({"a": {"dtype": "float32", "shape": [2, 3], "data": data}})
+        assert out == expected
+
+    loaded = load(expected)
+    assert _compare_np_array(loaded["a"], array)
+
+    with pytest.raises(Exception):
+        serialize({"a": {"dtype": "float32", "shape": [3, 2], "data": array.T}})
+
+
+def test_serialize_file_with_lazy_tensors():
+    from bintensors import serialize, serialize_file
+
+    array = np.arange(6, dtype=np.float32).reshape(2, 3)
+    calls = []
+
+    def produce():
+        calls.append(1)
+        return array
+
+    expected = serialize({"a": {"dtype": "float32", "shape": [2, 3], "data": array}})
+    assert serialize({"a": {"dtype": "float32", "shape": [2, 3], "data": produce}}) == expected
+    assert len(calls) == 1
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = f"{tmpdir}/lazy.bintensors"
+        serialize_file(filename, {"a": {"dtype": "float32", "shape": [2, 3], "data": produce}})
+        with open(filename, "rb") as f:
+            assert f.read() == expected
+
+        def fail():
+            raise RuntimeError("device lost")
+
+        with pytest.raises(RuntimeError, match="device lost"):
+            serialize_file(filename, {"a": {"dtype": "float32", "shape": [2, 3], "data": fail}})
+        assert not os.path.exists(filename)
+
+
+def test_serialize_lazy_tensors_with_checksums():
+    from bintensors import serialize, serialized_size
+
+    array = np.arange(6, dtype=np.float32).reshape(2, 3)
+    calls = []
+
+    def produce():
+        calls.append(1)
+        return array
+
+    expected = serialize({"a": {"dtype": "float32", "shape": [2, 3], "data": array}}, checksums=True)
+    assert serialize({"a": {"dtype": "float32", "shape": [2, 3], "data": produce}}, checksums=True) == expected
+    assert len(calls) == 1
+    # Without checksums the size does not depend on the data, which is not produced.
+    packed = serialize({"a": {"dtype": "float32", "shape": [2, 3], "data": array}})
+    assert serialized_size({"a": {"dtype": "float32", "shape": [2, 3], "data": produce}}) == len(packed)
+    assert len(calls) == 1
+
+    def fail():
+        raise RuntimeError("device lost")
+
+    with pytest.raises(RuntimeError, match="device lost"):
+        serialized_size({"a": {"dtype": "float32", "shape": [2, 3], "data": fail}}, checksums=True)
+
+
+def test_get_slice_with_step():
+    tensor_dict = {"embedding": np.arange(48, dtype=np.float32).reshape(6, 8)}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = f"{tmpdir}/strided.bintensors"
+        save_file(tensor_dict, filename)
+
+        with safe_open(filename, "numpy") as model:
+            embedding = model.get_slice("embedding")
+            for index in [(slice(None), slice(None, None, 8)), (slice(None, None, 2),), (slice(1, 5, 3), slice(2, None, 4))]:
+                assert _compare_np_array(embedding[index], tensor_dict["embedding"][index])
+
+            with pytest.raises(Exception):
+                embedding[:, ::-1]
+
+
+def test_get_slice_gather_indices():
+    tensor_dict = {"embedding": np.arange(48, dtype=np.float32).reshape(6, 8)}
+    embedding = tensor_dict["embedding"]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = f"{tmpdir}/gather.bintensors"
+        save_file(tensor_dict, filename)
+
+        with safe_open(filename, "numpy") as model:
+            tslice = model.get_slice("embedding")
+            assert _compare_np_array(tslice[[4, 0, 4]], embedding[[4, 0, 4]])
+            assert _compare_np_array(tslice[np.array([5, -1, 2])], embedding[np.array([5, -1, 2])])
+            assert _compare_np_array(tslice[1:3, [7, 0]], embedding[1:3, [7, 0]])
+            assert _compare_np_array(tslice[2, [1, 3]], embedding[2, [1, 3]])
+            assert tslice[[]].shape == (0, 8)
+
+            with pytest.raises(Exception):
+                tslice[[6]]
+            with pytest.raises(Exception):
+                tslice[[0, 1], [0, 1]]
+
+
+def test_get_tensors_batched():
+    tensor_dict = create_gpt2_numpy_dict(1)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = f"{tmpdir}/batched.bintensors"
+        save_file(tensor_dict, filename)
+
+        with safe_open(filename, "numpy") as model:
+            tensors = model.get_tensors()
+            assert list(tensors) == model.offset_keys()
+            for key, value in tensor_dict.items():
+                assert _compare_np_array(tensors[key], value)
+
+            names = ["h.0.ln_1.bias", "wte"]
+            assert list(model.get_tensors(names)) == names
+
+            with pytest.raises(Exception):
+                model.get_tensors(["missing"])
+
+
+def test_load_file_with_threads():
+    tensor_dict = create_gpt2_numpy_dict(1)
+    tensor_dict["empty"] = np.zeros((0, 3), dtype=np.float32)
+    tensor_dict["mask"] = np.array([True, False, True])
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = f"{tmpdir}/threads.bintensors"
+        save_file(tensor_dict, filename)
+
+        loaded_dict = load_file(filename, num_threads=4)
+        assert set(loaded_dict) == set(tensor_dict)
+        for key, value in tensor_dict.items():
+            assert loaded_dict[key].dtype == value.dtype
+            assert _compare_np_array(loaded_dict[key], value)
+
+
+def test_load_file_with_dtype():
+    tensor_dict = {
+        "weight": np.random.randn(64, 33).astype(np.float16),
+        "wide": np.array([1e-8, 1.0 + 2**-11, 70000.0, -np.inf], dtype=np.float64),
+        "index": np.arange(10, dtype=np.int64),
+        "empty": np.zeros((0, 3), dtype=np.float16),
+    }
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = f"{tmpdir}/dtype.bintensors"
+        save_file(tensor_dict, filename)
+
+        for num_threads in [None, 2]:
+            loaded_dict = load_file(filename, num_threads=num_threads, dtype=np.float32)
+            assert loaded_dict["index"].dtype == np.int64
+            for key, value in tensor_dict.items():
+                expected = value if value.dtype == np.int64 else value.astype(np.float32)
+                assert loaded_dict[key].dtype == expected.dtype
+                assert loaded_dict[key].shape == expected.shape
+                assert _compare_np_array(loaded_dict[key], expected)
+
+        with safe_open(filename, "numpy") as f:
+            # Rounded like numpy, to nearest even, overflowing to infinity.
+            assert _compare_np_array(f.get_tensor("wide", dtype="float16"), tensor_dict["wide"].astype(np.float16))
+            assert f.get_tensor("weight", dtype=np.dtype("float64")).dtype == np.float64
+            with pytest.raises(Exception):
+                f.get_tensor("index", dtype=np.float32)
+
+        with pytest.raises(ValueError):
+            load_file(filename, lazy=True, dtype=np.float32)
+
+
+def test_safe_open_access_hints():
+    tensor_dict = create_gpt2_numpy_dict(1)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = f"{tmpdir}/hints.bintensors"
+        save_file(tensor_dict, filename)
+
+        with safe_open(filename, "numpy") as model:
+            model.advise("sequential")
+            model.advise("random")
+            model.prefetch(["wte", "h.0.ln_1.bias"])
+            wte = model.get_tensor("wte")
+            model.release(["wte"])
+            assert _compare_np_array(wte, tensor_dict["wte"])
+            assert _compare_np_array(model.get_tensor("wte"), tensor_dict["wte"])
+
+            with pytest.raises(Exception):
+                model.advise("backwards")
+            with pytest.raises(Exception):
+                model.prefetch(["missing"])
+
+
+def test_load_file_lazy_with_cache_budget():
+    tensor_dict = {f"layer.{i}": np.full((16, 16), i, dtype=np.float32) for i in range(4)}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = f"{tmpdir}/lazy.bintensors"
+        save_file(tensor_dict, filename)
+
+        # Room for two 1024 bytes tensors.
+        with load_file(filename, lazy=True, cache_bytes=2048) as state_dict:
+            assert len(state_dict) == 4
+            assert set(state_dict) == set(tensor_dict)
+            assert "layer.0" in state_dict and "missing" not in state_dict
+            assert state_dict.cached_bytes == 0
+
+            for key in ["layer.0", "layer.1", "layer.0", "layer.2"]:
+                assert _compare_np_array(state_dict[key], tensor_dict[key])
+            assert state_dict.cached_bytes == 2048
+            assert state_dict["layer.0"] is state_dict["layer.0"]
+
+            with pytest.raises(KeyError):
+                state_dict["missing"]
+
+
+def test_inspect_reads_header_only():
+    tensor_dict = {"b": np.zeros((2, 3), dtype=np.float32), "a": np.zeros((4,), dtype=np.int16)}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = f"{tmpdir}/inspect.bintensors"
+        save_file(tensor_dict, filename, metadata={"format": "np"})
+
+        header = inspect(filename)
+        assert header["metadata"] == {"format": "np"}
+        assert header["tensors"] == {
+            "b": {"dtype": "F32", "shape": [2, 3], "data_offsets": (0, 24)},
+            "a": {"dtype": "I16", "shape": [4], "data_offsets": (24, 32)},
+        }
+
+        with open(filename, "ab") as f:
+            f.write(b"\0")
+        with pytest.raises(Exception):
+            inspect(filename)
+
+
+def test_save_sharded_and_load_sharded():
+    tensor_dict = create_gpt2_numpy_dict(2)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        files = save_sharded(tensor_dict, tmpdir, max_shard_size="8MB", metadata={"format": "np"})
+        assert len(files) > 1
+        assert sorted(os.listdir(tmpdir)) == sorted(files + ["model.bintensors.index.json"])
+
+        loaded_dict = load_sharded(tmpdir)
+        assert set(loaded_dict) == set(tensor_dict)
+        for key, value in tensor_dict.items():
+            assert _compare_np_array(loaded_dict[key], value)
+
+        with sharded_open(tmpdir, "numpy") as model:
+            assert model.metadata()["format"] == "np"
+            assert model.keys() == sorted(tensor_dict)
+            assert _compare_np_array(model.get_tensor("h.1.ln_1.bias"), tensor_dict["h.1.ln_1.bias"])
+            assert _compare_np_array(model.get_slice("wpe")[:2], tensor_dict["wpe"][:2])
+            with pytest.raises(Exception):
+                model.get_tensor("missing")
+
+        with pytest.raises(ValueError):
+            save_sharded(tensor_dict, tmpdir, max_shard_size="8 parsecs")
+
+
+def test_save_file_with_order():
+    tensor_dict = {
+        "h.10.w": np.zeros((2,), dtype=np.float32),
+        "h.2.b": np.zeros((3,), dtype=np.uint8),
+        "h.2.w": np.zeros((2,), dtype=np.float32),
+        "h.1.w": np.zeros((1,), dtype=np.float64),
+    }
+    orders = [
+        (None, ["h.1.w", "h.10.w", "h.2.w", "h.2.b"]),
+        ("natural", ["h.1.w", "h.2.w", "h.10.w", "h.2.b"]),
+        ("insertion", ["h.10.w", "h.2.w", "h.1.w", "h.2.b"]),
+        # Tensors which are not a multiple of 8 bytes always come last.
+        (["h.2.b", "h.10.w"], ["h.10.w", "h.1.w", "h.2.w", "h.2.b"]),
+    ]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = f"{tmpdir}/ordered.bintensors"
+        for order, offset_keys in orders:
+            save_file(tensor_dict, filename, order=order)
+            with safe_open(filename, "numpy") as model:
+                assert model.offset_keys() == offset_keys
+            loaded = load(save(tensor_dict, order=order))
+            for key, value in tensor_dict.items():
+                assert _compare_np_array(loaded[key], value)
+
+        with pytest.raises(Exception):
+            save_file(tensor_dict, filename, order="random")
+
+
+def test_trace_and_repack():
+    tensor_dict = create_gpt2_numpy_dict(2)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = f"{tmpdir}/model.bintensors"
+        packed = f"{tmpdir}/model.packed.bintensors"
+        save_file(tensor_dict, filename, metadata={"format": "np"})
+
+        with safe_open(filename, "numpy", trace=True) as model:
+            model.get_tensor("h.1.attn.c_attn.weight")
+            model.get_slice("wpe")[:2]
+            model.get_tensors(["wte", "h.1.attn.c_attn.weight"])
+            trace = model.trace()
+        assert [name for name, _ in trace] == ["h.1.attn.c_attn.weight", "wpe", "wte", "h.1.attn.c_attn.weight"]
+        assert all(a[1] <= b[1] for a, b in zip(trace, trace[1:]))
+
+        repack(filename, packed, trace)
+        with safe_open(packed, "numpy") as model:
+            assert model.offset_keys()[:3] == ["h.1.attn.c_attn.weight", "wpe", "wte"]
+            assert model.metadata() == {"format": "np"}
+        loaded = load_file(packed)
+        for key, value in tensor_dict.items():
+            assert _compare_np_array(loaded[key], value)
+
+        with safe_open(filename, "numpy") as model:
+            with pytest.raises(Exception):
+                model.trace()
+        with pytest.raises(Exception):
+            repack(filename, packed, ["missing"])
+        with pytest.raises(Exception):
+            repack(filename, filename, trace)
+
+
+def test_save_file_with_alignment():
+    tensor_dict = {
+        "a": np.arange(30, dtype=np.float32),
+        "b": np.arange(7, dtype=np.int16),
+        "c": np.arange(3, dtype=np.uint8),
+    }
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = f"{tmpdir}/aligned.bintensors"
+        save_file(tensor_dict, filename, metadata={"format": "np"}, order="natural", alignment=64)
+
+        header = inspect(filename)
+        assert header["metadata"] == {"format": "np"}
+        assert header["alignment"] == 64
+        assert [t["data_offsets"] for t in header["tensors"].values()] == [(0, 120), (128, 142), (192, 195)]
+
+        loaded = load_file(filename)
+        for key, value in tensor_dict.items():
+            assert _compare_np_array(loaded[key], value)
+        assert loaded["b"].ctypes.data % 64 == 0
+        assert load(save(tensor_dict, alignment=4096))["a"].tolist() == tensor_dict["a"].tolist()
+
+        # Repacking keeps the alignment.
+        repack(filename, f"{tmpdir}/repacked.bintensors", ["c"])
+        header = inspect(f"{tmpdir}/repacked.bintensors")
+        assert header["alignment"] == 64
+        assert [t["data_offsets"] for t in header["tensors"].values()] == [(0, 3), (64, 184), (192, 206)]
+
+        with pytest.raises(Exception):
+            save_file(tensor_dict, filename, alignment=48)
+
+
+def test_serialize_into():
+    tensor_dict = {
+        "a": np.arange(30, dtype=np.float32),
+        "b": np.arange(7, dtype=np.int16),
+    }
+    flattened = {k: {"dtype": v.dtype.name, "shape": v.shape, "data": v} for k, v in tensor_dict.items()}
+    expected = save(tensor_dict, metadata={"format": "np"})
+    size = serialized_size(flattened, metadata={"format": "np"})
+    assert size == len(expected)
+
+    buffer = bytearray(b"\xff" * (size + 16))
+    assert serialize_into(buffer, flattened, metadata={"format": "np"}) == size
+    assert bytes(buffer[:size]) == expected
+    assert buffer[size:] == b"\xff" * 16
+
+    # Any writable buffer works, here a slice at an offset of a larger region.
+    region = bytearray(size + 64)
+    assert serialize_into(memoryview(region)[64:], flattened, metadata={"format": "np"}) == size
+    assert load(bytes(region[64:]))["b"].tolist() == tensor_dict["b"].tolist()
+
+    aligned = serialized_size(flattened, alignment=64)
+    assert aligned == len(save(tensor_dict, alignment=64))
+    buffer = bytearray(aligned)
+    serialize_into(buffer, flattened, alignment=64)
+    assert bytes(buffer) == save(tensor_dict, alignment=64)
+
+    with pytest.raises(Exception):
+        serialize_into(bytearray(size - 1), flattened, metadata={"format": "np"})
+    with pytest.raises(Exception):
+        serialize_into(bytes(size), flattened, metadata={"format": "np"})
+
+
+def test_verify_lazy():
+    tensor_dict = {
+        "a": np.arange(30, dtype=np.float32),
+        "b": np.arange(7, dtype=np.int16),
+    }
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = f"{tmpdir}/checksums.bintensors"
+        save_file(tensor_dict, filename, metadata={"format": "np"}, checksums=True)
+        with safe_open(filename, framework="numpy", verify="lazy") as f:
+            assert f.metadata() == {"format": "np"}
+            for key, value in tensor_dict.items():
+                assert _compare_np_array(f.get_tensor(key), value)
+
+        # Flip a bit of the last tensor, `b`.
+        with open(filename, "r+b") as f:
+            f.seek(-1, os.SEEK_END)
+            last = f.read(1)
+            f.seek(-1, os.SEEK_END)
+            f.write(bytes([last[0] ^ 1]))
+        with safe_open(filename, framework="numpy", verify="lazy") as f:
+            assert _compare_np_array(f.get_tensor("a"), tensor_dict["a"])
+            with pytest.raises(Exception):
+                f.get_tensor("b")
+            with pytest.raises(Exception):
+                f.get_tensors()
+        # Without verification the corrupted tensor is returned as is.
+        with safe_open(filename, framework="numpy") as f:
+            f.get_tensor("b")
+
+        save_file(tensor_dict, filename)
+        with pytest.raises(Exception):
+            safe_open(filename, framework="numpy", verify="lazy")
+        with pytest.raises(Exception):
+            safe_open(filename, framework="numpy", verify="eager")
@@ -1,11 +1,14 @@
 import pytest
 
 import os
+import functools
 import tempfile
 import torch
 
 from typing import Dict, Tuple
+from bintensors import serialize_file
 from bintensors.torch import load, save, save_file, load_file, safe_open, save_with_checksum
+from bintensors.torch import save_model, load_model, _tobuffer
 
 
 def _compare_torch_tensors(lhs: torch.Tensor, rhs: torch.Tensor) -> bool:
@@ -144,3 +147,126 @@ def test_checksum_two_same_models():
         checksum1, _ = save_with_checksum(model_1)
         checksum2, _ = save_with_checksum(model_2)
         assert checksum1 == checksum2, "These checksum are equivilent"
+
+
+def test_pt_load_file_with_threads():
+    tensor_dict = {
+        "weight": torch.randn((64, 33)),
+        "half": torch.randn((7,)).to(torch.bfloat16),
+        "index": torch.arange(10, dtype=torch.int64),
+        "empty": torch.zeros((0, 4)),
+    }
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = f"{tmpdir}/threads.bintensors"
+        save_file(tensor_dict, filename)
+
+        loaded_dict = load_file(filename, num_threads=3)
+        for key, value in tensor_dict.items():
+            assert _compare_torch_tensors(loaded_dict[key], value)
+
+
+def test_pt_load_file_with_dtype():
+    tensor_dict = {
+        "weight": torch.randn((64, 33)).to(torch.bfloat16),
+        "half": torch.randn((7,)).to(torch.float16),
+        "full": torch.randn((5, 3)),
+        "index": torch.arange(10, dtype=torch.int64),
+    }
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = f"{tmpdir}/dtype.bintensors"
+        save_file(tensor_dict, filename)
+
+        for num_threads in [None, 2]:
+            loaded_dict = load_file(filename, num_threads=num_threads, dtype=torch.float32)
+            assert loaded_dict["index"].dtype == torch.int64
+            for key in ["weight", "half", "full"]:
+                assert torch.equal(loaded_dict[key], tensor_dict[key].float())
+
+        with safe_open(filename, framework="pt") as f:
+            # Rounded like torch, to nearest even.
+            assert torch.equal(f.get_tensor("full", dtype=torch.bfloat16), tensor_dict["full"].to(torch.bfloat16))
+            assert torch.equal(f.get_tensor("weight", dtype="float16"), tensor_dict["weight"].to(torch.float16))
+
+
+def _deferred(tensors: Dict[str, torch.Tensor], calls: list) -> Dict[str, Dict]:
+    # The entries `_flatten` builds for tensors off the cpu or on big-endian hosts,
+    # recording the names of the tensors as they are produced.
+    def recorded(name: str, producer):
+        calls.append(name)
+        return producer()
+
+    return {
+        name: {
+            "dtype": str(t.dtype).split(".")[-1],
+            "shape": t.shape,
+            "data": functools.partial(recorded, name, functools.partial(_tobuffer, t, name)),
+        }
+        for name, t in tensors.items()
+    }
+
+
+def test_pt_serialize_file_deferred():
+    tensor_dict = {
+        "index": torch.arange(3, dtype=torch.int8),
+        "weight": torch.randn((4, 4)),
+        "wide": torch.randn((2,), dtype=torch.float64),
+        "half": torch.randn((5,)).to(torch.bfloat16),
+    }
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = f"{tmpdir}/deferred.bintensors"
+        calls = []
+        serialize_file(filename, _deferred(tensor_dict, calls))
+
+        with safe_open(filename, framework="pt") as f:
+            # Every producer is called once, as its tensor is written.
+            assert calls == f.offset_keys()
+        loaded_dict = load_file(filename)
+        for key, value in tensor_dict.items():
+            assert _compare_torch_tensors(loaded_dict[key], value)
+
+        with open(filename, "rb") as f:
+            expected = f.read()
+        save_file(tensor_dict, filename)
+        with open(filename, "rb") as f:
+            assert f.read() == expected
+
+
+def test_pt_serialize_file_deferred_error():
+    # A non contiguous tensor only fails in `_tobuffer`, once the file is being written.
+    tensor_dict = {"weight": torch.randn((4, 4)), "transposed": torch.randn((3, 4)).t()}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = f"{tmpdir}/deferred.bintensors"
+        calls = []
+        with pytest.raises(ValueError, match="non contiguous tensor: `transposed`"):
+            serialize_file(filename, _deferred(tensor_dict, calls))
+        assert calls.count("transposed") == 1
+        assert not os.path.exists(filename)
+
+
+@pytest.mark.skipif(not torch.cuda.is_available(), reason="requires CUDA")
+def test_pt_save_file_cuda():
+    tensor_dict = {
+        "weight": torch.randn((64, 33), device="cuda"),
+        "half": torch.randn((7,), device="cuda").to(torch.bfloat16),
+        "index": torch.arange(10, device="cuda"),
+    }
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = f"{tmpdir}/cuda.bintensors"
+        save_file(tensor_dict, filename)
+
+        loaded_dict = load_file(filename)
+        for key, value in tensor_dict.items():
+            assert _compare_torch_tensors(loaded_dict[key], value.cpu())
+
+
+@pytest.mark.skipif(not torch.cuda.is_available(), reason="requires CUDA")
+def test_pt_save_model_cuda():
+    model = ToyRegressionModel(8, 8).cuda()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = f"{tmpdir}/model.bintensors"
+        save_model(model, filename)
+
+        loaded = ToyRegressionModel(8, 8)
+        load_model(loaded, filename)
+        for key, value in model.state_dict().items():
+            assert _compare_torch_tensors(loaded.state_dict()[key], value.cpu())
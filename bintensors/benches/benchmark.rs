@@ -1,5 +1,6 @@
 use bintensors::tensor::*;
 use criterion::{Criterion, black_box, criterion_group, criterion_main};
+use sha2::{Digest, Sha256};
 use std::collections::HashMap;
 
 // Returns a sample data of size 2_MB
@@ -28,6 +29,14 @@ pub fn bench_serialize(c: &mut Criterion) {
             let _serialized = serialize(black_box(&metadata), black_box(&None)).unwrap();
         })
     });
+
+    #[cfg(feature = "parallel")]
+    c.bench_function("Serialize parallel 1000_MB", |b| {
+        b.iter(|| {
+            let _serialized =
+                bintensors::serialize_parallel(black_box(&metadata), black_box(&None), 0).unwrap();
+        })
+    });
 }
 
 pub fn bench_deserialize(c: &mut Criterion) {
@@ -50,6 +59,64 @@ pub fn bench_deserialize(c: &mut Criterion) {
     });
 }
 
+pub fn bench_checksum(c: &mut Criterion) {
+    let (data, shape, dtype) = get_sample_data();
+    let n_layers = 500;
+
+    let mut metadata: HashMap<String, TensorView> = HashMap::new();
+    // 2_MB x 500 = 1000_MB
+    for i in 0..n_layers {
+        let tensor = TensorView::new(dtype, shape.clone(), &data[..]).unwrap();
+        metadata.insert(format!("weight{i}"), tensor);
+    }
+
+    let out = serialize(&metadata, &None).unwrap();
+
+    let mut group = c.benchmark_group("Checksum 1000_MB");
+    group.sample_size(10);
+    group.bench_function("serialize_with_checksum", |b| {
+        b.iter(|| {
+            let _checksum =
+                serialize_with_checksum(black_box(&metadata), black_box(&None), Sha256::new())
+                    .unwrap();
+        })
+    });
+    group.bench_function("Sha256 of the buffer", |b| {
+        b.iter(|| {
+            let _checksum = Sha256::digest(black_box(&out));
+        })
+    });
+    group.bench_function("tree_hash", |b| {
+        b.iter(|| {
+            let _checksum = tree_hash::<Sha256>(black_box(&out), 0);
+        })
+    });
+    group.finish();
+}
+
+pub fn bench_convert(c: &mut Criterion) {
+    // 500M BF16 elements, 1000_MB
+    let data = vec![0x3fu8; 1000 * 1000 * 1000];
+    let mut out = vec![0u8; data.len() * 2];
+
+    let mut group = c.benchmark_group("Convert 1000_MB");
+    group.sample_size(10);
+    group.bench_function("BF16 to F32", |b| {
+        b.iter(|| {
+            bintensors::convert::convert_into(
+                black_box(&data),
+                Dtype::BF16,
+                black_box(&mut out),
+                Dtype::F32,
+            )
+            .unwrap();
+        })
+    });
+    group.finish();
+}
+
 criterion_group!(bench_ser, bench_serialize);
 criterion_group!(bench_de, bench_deserialize);
-criterion_main!(bench_ser, bench_de);
+criterion_group!(bench_hash, bench_checksum);
+criterion_group!(bench_conv, bench_convert);
+criterion_main!(bench_ser, bench_de, bench_hash, bench_conv);
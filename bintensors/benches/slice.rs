@@ -0,0 +1,70 @@
+use bintensors::slice::{IndexOp, TensorIndexer};
+use bintensors::tensor::*;
+use criterion::{Criterion, black_box, criterion_group, criterion_main};
+use std::ops::Bound;
+
+// Returns a sample 4-D tensor of size 64_MB
+fn get_sample_data() -> (Vec<u8>, Vec<usize>, Dtype) {
+    let shape = vec![64, 256, 256, 4];
+    let dtype = Dtype::F32;
+    let n: usize = shape.iter().product::<usize>() * dtype.size(); // 4
+    let data = vec![0; n];
+
+    (data, shape, dtype)
+}
+
+pub fn bench_slice_outer(c: &mut Criterion) {
+    let (data, shape, dtype) = get_sample_data();
+    let tensor = TensorView::new(dtype, shape, &data).unwrap();
+
+    // Outer axis plus a narrow inner slice: one small run per (i, j, k).
+    c.bench_function("Slice [8:56, :, :, 1:3] creation", |b| {
+        b.iter(|| {
+            let iterator = black_box(&tensor)
+                .sliced_data(&[
+                    TensorIndexer::Narrow(Bound::Included(8), Bound::Excluded(56)),
+                    TensorIndexer::Narrow(Bound::Unbounded, Bound::Unbounded),
+                    TensorIndexer::Narrow(Bound::Unbounded, Bound::Unbounded),
+                    TensorIndexer::Narrow(Bound::Included(1), Bound::Excluded(3)),
+                ])
+                .unwrap();
+            black_box(iterator.remaining_byte_len())
+        })
+    });
+
+    c.bench_function("Slice [8:56, :, :, 1:3] copy", |b| {
+        b.iter(|| {
+            let iterator = black_box(&tensor)
+                .sliced_data(&[
+                    TensorIndexer::Narrow(Bound::Included(8), Bound::Excluded(56)),
+                    TensorIndexer::Narrow(Bound::Unbounded, Bound::Unbounded),
+                    TensorIndexer::Narrow(Bound::Unbounded, Bound::Unbounded),
+                    TensorIndexer::Narrow(Bound::Included(1), Bound::Excluded(3)),
+                ])
+                .unwrap();
+            let mut out = Vec::with_capacity(iterator.remaining_byte_len());
+            for chunk in iterator {
+                out.extend_from_slice(chunk);
+            }
+            black_box(out)
+        })
+    });
+}
+
+pub fn bench_slice_contiguous(c: &mut Criterion) {
+    let (data, shape, dtype) = get_sample_data();
+    let tensor = TensorView::new(dtype, shape, &data).unwrap();
+
+    // Consecutive gathered rows collapse into a single chunk.
+    let rows: Vec<usize> = (16..48).collect();
+    c.bench_function("Slice [16:48] gathered by index", |b| {
+        b.iter(|| {
+            let iterator = black_box(&tensor).slice(rows.clone()).unwrap();
+            black_box(iterator.count())
+        })
+    });
+}
+
+criterion_group!(bench_outer, bench_slice_outer);
+criterion_group!(bench_contiguous, bench_slice_contiguous);
+criterion_main!(bench_outer, bench_contiguous);
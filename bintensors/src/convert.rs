@@ -0,0 +1,370 @@
+//! Module converting tensor data between floating point dtypes in a single pass.
+use crate::tensor::{BinTensorError, Dtype};
+
+/// Whether [`convert_into`] can convert data of dtype `from` to `to`.
+///
+/// F16, BF16, F32 and F64 convert into each other, the F8 dtypes convert to
+/// F16 and F32, and every dtype converts to itself.
+pub fn is_supported(from: Dtype, to: Dtype) -> bool {
+    use Dtype::*;
+    from == to
+        || matches!(
+            (from, to),
+            (F16 | BF16 | F32 | F64, F16 | BF16 | F32 | F64) | (F8_E5M2 | F8_E4M3, F16 | F32)
+        )
+}
+
+/// Converts `data`, little-endian elements of dtype `from` as stored in a file,
+/// into `out` as elements of dtype `to` in the native byte order.
+///
+/// Every element is read and written once, without an intermediate buffer.
+/// Narrowing conversions round to nearest, ties to even, overflow to infinity
+/// and keep NaN. `out` must hold exactly as many elements as `data`.
+///
+/// ```
+/// use bintensors::convert::convert_into;
+/// use bintensors::Dtype;
+///
+/// let data: Vec<u8> = [1.0f32, -2.5, 65520.0].iter().flat_map(|x| x.to_le_bytes()).collect();
+/// let mut out = vec![0u8; 3 * 2];
+/// convert_into(&data, Dtype::F32, &mut out, Dtype::F16).unwrap();
+/// let expected: Vec<u8> = [0x3c00u16, 0xc100, 0x7c00].iter().flat_map(|x| x.to_ne_bytes()).collect();
+/// assert_eq!(out, expected);
+/// ```
+pub fn convert_into(
+    data: &[u8],
+    from: Dtype,
+    out: &mut [u8],
+    to: Dtype,
+) -> Result<(), BinTensorError> {
+    use Dtype::*;
+
+    if !is_supported(from, to) {
+        return Err(BinTensorError::UnsupportedConversion(from, to));
+    }
+    if data.len() % from.size() != 0 || out.len() != data.len() / from.size() * to.size() {
+        return Err(BinTensorError::TensorInvalidInfo);
+    }
+    match (from, to) {
+        _ if from == to && cfg!(target_endian = "little") => out.copy_from_slice(data),
+        _ if from == to => match from.size() {
+            1 => out.copy_from_slice(data),
+            2 => map(data, out, |x| u16::from_le_bytes(x).to_ne_bytes()),
+            4 => map(data, out, |x| u32::from_le_bytes(x).to_ne_bytes()),
+            _ => map(data, out, |x| u64::from_le_bytes(x).to_ne_bytes()),
+        },
+
+        (F16, BF16) => map(data, out, |x| f32_to_bf16(f16_le(x)).to_ne_bytes()),
+        (F16, F32) => map(data, out, |x| f16_le(x).to_ne_bytes()),
+        (F16, F64) => map(data, out, |x| (f16_le(x) as f64).to_ne_bytes()),
+
+        (BF16, F16) => map(data, out, |x| f32_to_f16(bf16_le(x)).to_ne_bytes()),
+        (BF16, F32) => map(data, out, |x| bf16_le(x).to_ne_bytes()),
+        (BF16, F64) => map(data, out, |x| (bf16_le(x) as f64).to_ne_bytes()),
+
+        (F32, F16) => map(data, out, |x| {
+            f32_to_f16(f32::from_le_bytes(x)).to_ne_bytes()
+        }),
+        (F32, BF16) => map(data, out, |x| {
+            f32_to_bf16(f32::from_le_bytes(x)).to_ne_bytes()
+        }),
+        (F32, F64) => map(data, out, |x| (f32::from_le_bytes(x) as f64).to_ne_bytes()),
+
+        (F64, F16) => map(data, out, |x| {
+            f32_to_f16(f64_to_f32_odd(f64::from_le_bytes(x))).to_ne_bytes()
+        }),
+        (F64, BF16) => map(data, out, |x| {
+            f32_to_bf16(f64_to_f32_odd(f64::from_le_bytes(x))).to_ne_bytes()
+        }),
+        (F64, F32) => map(data, out, |x| (f64::from_le_bytes(x) as f32).to_ne_bytes()),
+
+        // F8_E5M2 is the upper byte of F16.
+        (F8_E5M2, F16) => map(data, out, |[x]: [u8; 1]| (u16::from(x) << 8).to_ne_bytes()),
+        (F8_E5M2, F32) => map(data, out, |[x]: [u8; 1]| {
+            f16_to_f32(u16::from(x) << 8).to_ne_bytes()
+        }),
+        (F8_E4M3, F16) => map(data, out, |[x]: [u8; 1]| {
+            E4M3_TO_F16[x as usize].to_ne_bytes()
+        }),
+        (F8_E4M3, F32) => map(data, out, |[x]: [u8; 1]| {
+            E4M3_TO_F32[x as usize].to_ne_bytes()
+        }),
+
+        _ => unreachable!("checked by is_supported"),
+    }
+    Ok(())
+}
+
+/// Applies `convert` to every `N` bytes element of `data`, writing `M` bytes
+/// elements to `out`. Written over fixed size arrays so the loop is unrolled
+/// and vectorized by the compiler.
+#[inline(always)]
+fn map<const N: usize, const M: usize>(
+    data: &[u8],
+    out: &mut [u8],
+    convert: impl Fn([u8; N]) -> [u8; M],
+) {
+    for (x, y) in data.chunks_exact(N).zip(out.chunks_exact_mut(M)) {
+        let x: [u8; N] = x.try_into().expect("chunks of N bytes");
+        y.copy_from_slice(&convert(x));
+    }
+}
+
+#[inline(always)]
+fn f16_le(x: [u8; 2]) -> f32 {
+    f16_to_f32(u16::from_le_bytes(x))
+}
+
+#[inline(always)]
+fn bf16_le(x: [u8; 2]) -> f32 {
+    f32::from_bits(u32::from(u16::from_le_bytes(x)) << 16)
+}
+
+/// Widens the bits of an IEEE half to `f32`, exactly.
+const fn f16_to_f32(half: u16) -> f32 {
+    // Smallest normal half, as an f32, used to renormalize subnormals.
+    const MAGIC: u32 = 113 << 23;
+    let half = half as u32;
+    let exponent = half & 0x7c00;
+    let bits = (half & 0x7fff) << 13;
+    let magnitude = if exponent == 0x7c00 {
+        // Infinity or NaN, keeping the payload.
+        f32::from_bits(bits | 0x7f80_0000)
+    } else if exponent == 0 {
+        // Zero or subnormal, the subtraction normalizes it.
+        f32::from_bits(bits + MAGIC) - f32::from_bits(MAGIC)
+    } else {
+        f32::from_bits(bits + ((127 - 15) << 23))
+    };
+    f32::from_bits(magnitude.to_bits() | (half & 0x8000) << 16)
+}
+
+/// Rounds an `f32` to the bits of the nearest IEEE half, ties to even.
+const fn f32_to_f16(x: f32) -> u16 {
+    // 0.5, its unit in the last place is the one of the smallest subnormal half.
+    const DENORM_MAGIC: u32 = 126 << 23;
+    let bits = x.to_bits();
+    let sign = ((bits >> 16) & 0x8000) as u16;
+    let abs = bits & 0x7fff_ffff;
+    let half = if abs >= 0x4780_0000 {
+        // 65536 and above, infinity or NaN.
+        if abs > 0x7f80_0000 { 0x7e00 } else { 0x7c00 }
+    } else if abs < 0x3880_0000 {
+        // Below the smallest normal half, the addition rounds to a subnormal.
+        ((f32::from_bits(abs) + f32::from_bits(DENORM_MAGIC)).to_bits() - DENORM_MAGIC) as u16
+    } else {
+        // Rebias the exponent and round the 13 dropped bits, ties to even.
+        // A carry out of the mantissa correctly bumps the exponent, up to infinity.
+        let odd = (abs >> 13) & 1;
+        ((abs - (112 << 23) + 0xfff + odd) >> 13) as u16
+    };
+    half | sign
+}
+
+/// Rounds an `f32` to the bits of the nearest bfloat16, ties to even.
+#[inline(always)]
+fn f32_to_bf16(x: f32) -> u16 {
+    let bits = x.to_bits();
+    if bits & 0x7fff_ffff > 0x7f80_0000 {
+        // Keep NaN quiet, the rounding could carry it into infinity.
+        ((bits >> 16) | 0x0040) as u16
+    } else {
+        ((bits + 0x7fff + ((bits >> 16) & 1)) >> 16) as u16
+    }
+}
+
+/// Narrows an `f64` to `f32` rounding to odd: the result is truncated and its
+/// last bit set when bits were lost. Rounding that again to a half or a
+/// bfloat16 gives the correctly rounded result, which rounding to nearest
+/// twice does not.
+#[inline(always)]
+fn f64_to_f32_odd(x: f64) -> f32 {
+    let y = x as f32;
+    if !x.is_finite() || y as f64 == x {
+        return y;
+    }
+    let mut bits = y.to_bits();
+    if (y as f64).abs() > x.abs() {
+        bits -= 1;
+    }
+    f32::from_bits(bits | 1)
+}
+
+/// Widens an F8_E4M3 (no infinities, a single NaN) to the bits of an `f32`.
+const fn e4m3_to_f32(x: u8) -> u32 {
+    let sign = ((x & 0x80) as u32) << 24;
+    let exponent = ((x >> 3) & 0xf) as u32;
+    let mantissa = (x & 0x7) as u32;
+    if exponent == 0xf && mantissa == 0x7 {
+        return sign | 0x7fc0_0000;
+    }
+    if exponent == 0 {
+        if mantissa == 0 {
+            return sign;
+        }
+        // Subnormal, `mantissa * 2^-9`, normalized on its leading bit.
+        let lead = 31 - mantissa.leading_zeros();
+        return sign | ((lead + 127 - 9) << 23) | ((mantissa << (23 - lead)) & 0x7f_ffff);
+    }
+    sign | ((exponent + 127 - 7) << 23) | (mantissa << 20)
+}
+
+static E4M3_TO_F32: [f32; 256] = {
+    let mut table = [0.0; 256];
+    let mut i = 0;
+    while i < 256 {
+        table[i] = f32::from_bits(e4m3_to_f32(i as u8));
+        i += 1;
+    }
+    table
+};
+
+static E4M3_TO_F16: [u16; 256] = {
+    let mut table = [0; 256];
+    let mut i = 0;
+    while i < 256 {
+        // Exact, every F8_E4M3 value is a normal half.
+        table[i] = f32_to_f16(f32::from_bits(e4m3_to_f32(i as u8)));
+        i += 1;
+    }
+    table
+};
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use crate::lib::Vec;
+
+    fn convert(data: &[u8], from: Dtype, to: Dtype) -> Vec<u8> {
+        let mut out = vec![0; data.len() / from.size() * to.size()];
+        convert_into(data, from, &mut out, to).unwrap();
+        out
+    }
+
+    #[test]
+    fn test_f16_round_trip() {
+        for half in 0..=u16::MAX {
+            let x = f16_to_f32(half);
+            if x.is_nan() {
+                assert_eq!(f32_to_f16(x) & 0x7c00, 0x7c00);
+                assert_ne!(f32_to_f16(x) & 0x03ff, 0);
+            } else {
+                assert_eq!(f32_to_f16(x), half, "{half:#06x} {x}");
+            }
+        }
+        assert_eq!(f16_to_f32(0x0001), 2f32.powi(-24));
+        assert_eq!(f16_to_f32(0x3c00), 1.0);
+        assert_eq!(f16_to_f32(0xfbff), -65504.0);
+    }
+
+    #[test]
+    fn test_rounding() {
+        // F16, ties to even, overflow to infinity.
+        assert_eq!(f32_to_f16(65519.0), 0x7bff);
+        assert_eq!(f32_to_f16(65520.0), 0x7c00);
+        assert_eq!(f32_to_f16(-1e10), 0xfc00);
+        assert_eq!(f32_to_f16(1.0 + 2f32.powi(-11)), 0x3c00);
+        assert_eq!(f32_to_f16(1.0 + 3.0 * 2f32.powi(-11)), 0x3c02);
+        assert_eq!(f32_to_f16(2f32.powi(-25)), 0x0000);
+        assert_eq!(f32_to_f16(1.5 * 2f32.powi(-24)), 0x0002);
+        assert_eq!(f32_to_f16(2f32.powi(-14)), 0x0400);
+
+        // BF16.
+        assert_eq!(f32_to_bf16(1.0), 0x3f80);
+        assert_eq!(f32_to_bf16(1.0 + 2f32.powi(-8)), 0x3f80);
+        assert_eq!(f32_to_bf16(1.0 + 3.0 * 2f32.powi(-8)), 0x3f82);
+        assert_eq!(f32_to_bf16(f32::MAX), 0x7f80);
+        assert_eq!(f32_to_bf16(f32::NEG_INFINITY), 0xff80);
+        assert!(f32::from_bits(u32::from(f32_to_bf16(f32::from_bits(0x7f80_0001))) << 16).is_nan());
+
+        // F64 is rounded once: just above a tie of F16, rounding to F32 first
+        // would land on the tie and round down to even.
+        let x = 1.0 + 2f64.powi(-11) + 2f64.powi(-40);
+        assert_eq!(f32_to_f16(x as f32), 0x3c00);
+        assert_eq!(f32_to_f16(f64_to_f32_odd(x)), 0x3c01);
+        assert_eq!(f32_to_f16(f64_to_f32_odd(1e300)), 0x7c00);
+        assert_eq!(f32_to_bf16(f64_to_f32_odd(-1e300)), 0xff80);
+        assert_eq!(f32_to_bf16(f64_to_f32_odd(1e-300)), 0x0000);
+    }
+
+    #[test]
+    fn test_f8() {
+        assert_eq!(E4M3_TO_F32[0x38], 1.0);
+        assert_eq!(E4M3_TO_F32[0x7e], 448.0);
+        assert_eq!(E4M3_TO_F32[0xfe], -448.0);
+        assert_eq!(E4M3_TO_F32[0x01], 2f32.powi(-9));
+        assert_eq!(E4M3_TO_F32[0x06], 6.0 * 2f32.powi(-9));
+        assert_eq!(E4M3_TO_F32[0x08], 2f32.powi(-6));
+        assert!(E4M3_TO_F32[0x7f].is_nan());
+        for x in 0..=u8::MAX {
+            let wide = E4M3_TO_F32[x as usize];
+            if !wide.is_nan() {
+                assert_eq!(f16_to_f32(E4M3_TO_F16[x as usize]), wide);
+            }
+        }
+
+        let data = [0x3c, 0xc0, 0x7b, 0x01];
+        let out = convert(&data, Dtype::F8_E5M2, Dtype::F32);
+        let out: Vec<f32> = out
+            .chunks_exact(4)
+            .map(|x| f32::from_ne_bytes(x.try_into().unwrap()))
+            .collect();
+        assert_eq!(out, [1.0, -2.0, 57344.0, 2f32.powi(-16)]);
+    }
+
+    #[test]
+    fn test_convert_into() {
+        let values = [0.0f32, -1.5, 3.140625, 1e-3, 65504.0, f32::INFINITY];
+        let data: Vec<u8> = values.iter().flat_map(|x| x.to_le_bytes()).collect();
+        let floats = [Dtype::F16, Dtype::BF16, Dtype::F32, Dtype::F64];
+        for from in floats {
+            let stored = convert(&data, Dtype::F32, from);
+            // Stored little-endian, as in a file.
+            let stored: Vec<u8> = match from.size() {
+                2 => stored
+                    .chunks_exact(2)
+                    .flat_map(|x| u16::from_ne_bytes(x.try_into().unwrap()).to_le_bytes())
+                    .collect(),
+                4 => stored
+                    .chunks_exact(4)
+                    .flat_map(|x| u32::from_ne_bytes(x.try_into().unwrap()).to_le_bytes())
+                    .collect(),
+                _ => stored
+                    .chunks_exact(8)
+                    .flat_map(|x| u64::from_ne_bytes(x.try_into().unwrap()).to_le_bytes())
+                    .collect(),
+            };
+            let wide = convert(&stored, from, Dtype::F64);
+            for to in floats {
+                // Converting directly matches going through F64, which is exact.
+                let direct = convert(&stored, from, to);
+                let le: Vec<u8> = wide
+                    .chunks_exact(8)
+                    .flat_map(|x| f64::from_ne_bytes(x.try_into().unwrap()).to_le_bytes())
+                    .collect();
+                assert_eq!(direct, convert(&le, Dtype::F64, to), "{from:?} -> {to:?}");
+            }
+        }
+
+        let mut out = vec![0; 8];
+        assert!(matches!(
+            convert_into(&[0; 8], Dtype::I64, &mut out, Dtype::F64),
+            Err(BinTensorError::UnsupportedConversion(
+                Dtype::I64,
+                Dtype::F64
+            ))
+        ));
+        assert!(matches!(
+            convert_into(&[0; 8], Dtype::F8_E4M3, &mut out, Dtype::BF16),
+            Err(BinTensorError::UnsupportedConversion(..))
+        ));
+        assert!(matches!(
+            convert_into(&[0; 6], Dtype::F32, &mut out, Dtype::F16),
+            Err(BinTensorError::TensorInvalidInfo)
+        ));
+        assert!(matches!(
+            convert_into(&[0; 8], Dtype::F32, &mut out, Dtype::F16),
+            Err(BinTensorError::TensorInvalidInfo)
+        ));
+    }
+}
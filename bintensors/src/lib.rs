@@ -8,11 +8,24 @@
 #[cfg(any(feature = "std", feature = "alloc"))]
 #[cfg(feature = "slice")]
 pub mod slice;
+pub mod convert;
 pub mod tensor;
 /// serialize_to_file only valid in std
 #[cfg(feature = "std")]
-pub use tensor::serialize_to_file;
-pub use tensor::{serialize, serialize_with_checksum, BinTensorError, BinTensors, Dtype, View};
+pub use tensor::{serialize_to_file, serialize_to_file_parallel};
+#[cfg(feature = "std")]
+pub use tensor::{serialize_to_file_parallel_with_layout, serialize_to_file_with_layout};
+#[cfg(feature = "std")]
+pub use tensor::{serialize_to_writer, serialize_to_writer_with_layout};
+#[cfg(feature = "std")]
+pub use tensor::{serialize_to_file_with_checksum, serialize_to_writer_with_checksum};
+#[cfg(feature = "std")]
+pub use tensor::{checksum_file, tree_hash, verify_file};
+pub use tensor::{serialize, serialize_with_checksum, serialize_with_layout, Layout, TensorOrder};
+pub use tensor::{serialize_into, serialized_size, PreparedTensors};
+#[cfg(feature = "parallel")]
+pub use tensor::{serialize_into_parallel, serialize_parallel, serialize_parallel_with_layout};
+pub use tensor::{BinTensorError, BinTensors, Dtype, View};
 
 // TODO: uncomment when all of no_std is ready
 #[cfg(feature = "alloc")]
@@ -20,6 +20,11 @@ pub enum InvalidSlice {
         /// The dimension size we shouldn't go over.
         dim_size: usize,
     },
+    /// When the client asked for a strided slice with a step of 0
+    ZeroStep {
+        /// The rank of the dimension that has the invalid step
+        dim_index: usize,
+    },
 }
 
 #[derive(Debug, Clone)]
@@ -29,7 +34,10 @@ pub enum TensorIndexer {
     Select(usize),
     /// This is a regular slice, purely indexing a chunk of the tensor
     Narrow(Bound<usize>, Bound<usize>),
-    //IndexSelect(Tensor),
+    /// This is a slice with a step, keeping one item every `step` within the chunk
+    Strided(Bound<usize>, Bound<usize>, usize),
+    /// This is gathering the listed items of a dimension, in the given order
+    IndexSelect(Vec<usize>),
 }
 
 fn display_bound(bound: &Bound<usize>) -> String {
@@ -50,6 +58,17 @@ impl core::fmt::Display for TensorIndexer {
             TensorIndexer::Narrow(left, right) => {
                 write!(f, "{}:{}", display_bound(left), display_bound(right))
             }
+            TensorIndexer::Strided(left, right, step) => {
+                write!(
+                    f,
+                    "{}:{}:{step}",
+                    display_bound(left),
+                    display_bound(right)
+                )
+            }
+            TensorIndexer::IndexSelect(list) => {
+                write!(f, "{list:?}")
+            }
         }
     }
 }
@@ -60,19 +79,17 @@ impl From<usize> for TensorIndexer {
     }
 }
 
-// impl From<&[usize]> for TensorIndexer {
-//     fn from(index: &[usize]) -> Self {
-//         let tensor = index.into();
-//         TensorIndexer::IndexSelect(tensor)
-//     }
-// }
-//
-// impl From<Vec<usize>> for TensorIndexer {
-//     fn from(index: Vec<usize>) -> Self {
-//         let tensor = Tensor::of_slice(&index);
-//         TensorIndexer::IndexSelect(tensor)
-//     }
-// }
+impl From<&[usize]> for TensorIndexer {
+    fn from(index: &[usize]) -> Self {
+        TensorIndexer::IndexSelect(index.to_vec())
+    }
+}
+
+impl From<Vec<usize>> for TensorIndexer {
+    fn from(index: Vec<usize>) -> Self {
+        TensorIndexer::IndexSelect(index)
+    }
+}
 
 macro_rules! impl_from_range {
     ($range_type:ty) => {
@@ -234,12 +251,74 @@ where
 //     }
 // }
 
+/// Resolve a pair of bounds into a `start..stop` range on a dimension of size `shape`.
+fn bounds(left: &Bound<usize>, right: &Bound<usize>, shape: usize) -> (usize, usize) {
+    let start = match left {
+        Bound::Unbounded => 0,
+        Bound::Included(s) => *s,
+        Bound::Excluded(s) => *s + 1,
+    };
+    let stop = match right {
+        Bound::Unbounded => shape,
+        Bound::Excluded(stop) => *stop,
+        Bound::Included(stop) => *stop + 1,
+    };
+    (start, stop)
+}
+
+/// The items kept along a single dimension of a slice.
+#[derive(Clone)]
+#[cfg_attr(test, derive(Debug, Eq, PartialEq))]
+enum Kept {
+    /// `start..stop` keeping one item every `step`
+    Range(usize, usize, usize),
+    /// An explicit list of items, in output order
+    List(Vec<usize>),
+}
+
+impl Kept {
+    /// Number of items kept along the dimension
+    fn len(&self) -> usize {
+        match self {
+            Kept::Range(start, stop, step) => stop.saturating_sub(*start).div_ceil(*step),
+            Kept::List(list) => list.len(),
+        }
+    }
+
+    /// Position in the original dimension of the `k`-th kept item
+    fn get(&self, k: usize) -> usize {
+        match self {
+            Kept::Range(start, _, step) => start + k * step,
+            Kept::List(list) => list[k],
+        }
+    }
+
+    /// Whether the whole dimension of size `dim` is kept, in order
+    fn is_full(&self, dim: usize) -> bool {
+        matches!(self, Kept::Range(0, stop, 1) if *stop == dim)
+    }
+}
+
 /// Iterator used to return the bits of the overall tensor buffer
 /// when client asks for a slice of the original tensor.
+///
+/// The chunks are generated lazily. Trailing dimensions kept whole, along
+/// with the first plain range before them, form one contiguous block, and
+/// the remaining dimensions are walked like an odometer. Blocks which end up
+/// adjacent in the buffer are yielded as a single chunk.
 #[cfg_attr(test, derive(Debug, Eq, PartialEq))]
 pub struct SliceIterator<'data> {
     view: &'data TensorView<'data>,
-    indices: Vec<(usize, usize)>,
+    /// Dimensions walked by the odometer, outermost first, with their byte stride
+    dims: Vec<(Kept, usize)>,
+    /// Current position of the odometer within each of `dims`
+    counters: Vec<usize>,
+    /// Byte offset shared by every block
+    base: usize,
+    /// Byte length of a single block
+    block: usize,
+    /// Number of blocks not yielded yet
+    remaining: usize,
     newshape: Vec<usize>,
 }
 
@@ -250,98 +329,137 @@ impl<'data> SliceIterator<'data> {
     ) -> Result<Self, InvalidSlice> {
         // Make sure n. axis does not exceed n. of dimensions
         let n_slice = slices.len();
-        let n_shape = view.shape().len();
+        let shape = view.shape();
+        let n_shape = shape.len();
         if n_slice > n_shape {
             return Err(InvalidSlice::TooManySlices);
         }
-        let mut newshape = Vec::with_capacity(view.shape().len());
-
-        // Minimum span is the span of 1 item;
-        let mut span = view.dtype().size();
-        let mut indices = vec![];
-        // Everything is row major.
-        for (i, &shape) in view.shape().iter().enumerate().rev() {
-            if i >= slices.len() {
-                // We are  not slicing yet, just increase the local span
-                newshape.push(shape);
-            } else {
-                let slice = &slices[i];
-                let (start, stop) = match slice {
-                    TensorIndexer::Narrow(Bound::Unbounded, Bound::Unbounded) => (0, shape),
-                    TensorIndexer::Narrow(Bound::Unbounded, Bound::Excluded(stop)) => (0, *stop),
-                    TensorIndexer::Narrow(Bound::Unbounded, Bound::Included(stop)) => {
-                        (0, *stop + 1)
-                    }
-                    TensorIndexer::Narrow(Bound::Included(s), Bound::Unbounded) => (*s, shape),
-                    TensorIndexer::Narrow(Bound::Included(s), Bound::Excluded(stop)) => (*s, *stop),
-                    TensorIndexer::Narrow(Bound::Included(s), Bound::Included(stop)) => {
-                        (*s, *stop + 1)
-                    }
-                    TensorIndexer::Narrow(Bound::Excluded(s), Bound::Unbounded) => (*s + 1, shape),
-                    TensorIndexer::Narrow(Bound::Excluded(s), Bound::Excluded(stop)) => {
-                        (*s + 1, *stop)
-                    }
-                    TensorIndexer::Narrow(Bound::Excluded(s), Bound::Included(stop)) => {
-                        (*s + 1, *stop + 1)
-                    }
-                    TensorIndexer::Select(s) => (*s, *s + 1),
-                };
-                if start >= shape || stop > shape {
-                    let asked = if start >= shape {
-                        start
+
+        let mut newshape = Vec::with_capacity(n_shape);
+        let mut kept = Vec::with_capacity(n_shape);
+        for (i, &dim) in shape.iter().enumerate() {
+            let Some(slice) = slices.get(i) else {
+                // We are not slicing this dimension, keep all of it
+                newshape.push(dim);
+                kept.push(Kept::Range(0, dim, 1));
+                continue;
+            };
+            let items = match slice {
+                TensorIndexer::Narrow(left, right) => {
+                    let (start, stop) = bounds(left, right, dim);
+                    Kept::Range(start, stop, 1)
+                }
+                TensorIndexer::Strided(_, _, 0) => {
+                    return Err(InvalidSlice::ZeroStep { dim_index: i });
+                }
+                TensorIndexer::Strided(left, right, step) => {
+                    let (start, stop) = bounds(left, right, dim);
+                    Kept::Range(start, stop, *step)
+                }
+                TensorIndexer::Select(s) => Kept::Range(*s, *s + 1, 1),
+                TensorIndexer::IndexSelect(list) => Kept::List(list.clone()),
+            };
+            match &items {
+                Kept::Range(start, stop, _) if *start >= dim || *stop > dim => {
+                    let asked = if *start >= dim {
+                        *start
                     } else {
                         stop.saturating_sub(1)
                     };
                     return Err(InvalidSlice::SliceOutOfRange {
                         dim_index: i,
                         asked,
-                        dim_size: shape,
+                        dim_size: dim,
                     });
                 }
-                if let TensorIndexer::Narrow(..) = slice {
-                    newshape.push(stop - start);
-                }
-                if indices.is_empty() {
-                    if start == 0 && stop == shape {
-                        // We haven't started to slice yet, just increase the span
-                    } else {
-                        let offset = start * span;
-                        let small_span = stop * span - offset;
-                        indices.push((offset, offset + small_span));
-                    }
-                } else {
-                    let capacity = (stop - start) * indices.len();
-                    let mut newindices = Vec::with_capacity(capacity);
-                    for n in start..stop {
-                        let offset = n * span;
-                        for (old_start, old_stop) in &indices {
-                            newindices.push((old_start + offset, old_stop + offset));
-                        }
+                Kept::List(list) => {
+                    if let Some(&asked) = list.iter().find(|&&n| n >= dim) {
+                        return Err(InvalidSlice::SliceOutOfRange {
+                            dim_index: i,
+                            asked,
+                            dim_size: dim,
+                        });
                     }
-                    indices = newindices;
                 }
+                Kept::Range(..) => {}
+            }
+            if !matches!(slice, TensorIndexer::Select(_)) {
+                newshape.push(items.len());
+            }
+            kept.push(items);
+        }
+
+        // Everything is row major, the trailing dimensions kept whole are
+        // contiguous in memory.
+        let mut block = view.dtype().size();
+        while let Some(items) = kept.last() {
+            let dim = shape[kept.len() - 1];
+            if !items.is_full(dim) {
+                break;
             }
-            span *= shape;
+            block *= dim;
+            kept.pop();
         }
-        if indices.is_empty() {
-            indices.push((0, view.data().len()));
+        // The next dimension sliced as a plain range stays contiguous too.
+        let mut base = 0;
+        if let Some(items @ Kept::Range(start, _, 1)) = kept.last() {
+            base = start * block;
+            block *= items.len();
+            kept.pop();
+        }
+
+        // Byte strides of the dimensions walked by the odometer.
+        let mut stride = view.dtype().size() * shape[kept.len()..].iter().product::<usize>();
+        let mut dims: Vec<(Kept, usize)> = Vec::with_capacity(kept.len());
+        let walked = kept.len();
+        for (items, &dim) in kept.into_iter().zip(&shape[..walked]).rev() {
+            dims.push((items, stride));
+            stride *= dim;
         }
-        // Reversing so we can pop faster while iterating on the slice
-        let indices = indices.into_iter().rev().collect();
-        let newshape = newshape.into_iter().rev().collect();
+        dims.reverse();
+
+        let remaining = if block == 0 {
+            0
+        } else {
+            dims.iter().map(|(items, _)| items.len()).product()
+        };
+        let counters = vec![0; dims.len()];
         Ok(Self {
             view,
-            indices,
+            dims,
+            counters,
+            base,
+            block,
+            remaining,
             newshape,
         })
     }
 
+    /// Byte offset of the block the odometer currently points to
+    fn offset(&self) -> usize {
+        self.dims
+            .iter()
+            .zip(&self.counters)
+            .map(|((items, stride), &k)| items.get(k) * stride)
+            .sum::<usize>()
+            + self.base
+    }
+
+    /// Move the odometer to the next block
+    fn advance(&mut self) {
+        self.remaining -= 1;
+        for ((items, _), counter) in self.dims.iter().zip(self.counters.iter_mut()).rev() {
+            *counter += 1;
+            if *counter < items.len() {
+                return;
+            }
+            *counter = 0;
+        }
+    }
+
     /// Gives back the amount of bytes still being in the iterator
     pub fn remaining_byte_len(&self) -> usize {
-        self.indices
-            .iter()
-            .map(|(start, stop)| (stop - start))
-            .sum()
+        self.remaining * self.block
     }
 
     /// Gives back the amount of bytes still being in the iterator
@@ -354,10 +472,17 @@ impl<'data> Iterator for SliceIterator<'data> {
     type Item = &'data [u8];
 
     fn next(&mut self) -> Option<Self::Item> {
-        // TODO We might want to move the logic from `new`
-        // here actually to remove the need to get all the indices
-        // upfront.
-        let (start, stop) = self.indices.pop()?;
+        if self.remaining == 0 {
+            return None;
+        }
+        let start = self.offset();
+        let mut stop = start + self.block;
+        self.advance();
+        // Merge the following blocks as long as they are adjacent
+        while self.remaining > 0 && self.offset() == stop {
+            stop += self.block;
+            self.advance();
+        }
         Some(&self.view.data()[start..stop])
     }
 }
@@ -581,6 +706,155 @@ mod tests {
         assert_eq!(iterator.next(), None);
     }
 
+    #[test]
+    fn test_slice_strided() {
+        let data: Vec<u8> = (0..12)
+            .map(|i| i as f32)
+            .flat_map(|f| f.to_le_bytes())
+            .collect();
+
+        let attn_0 = TensorView::new(Dtype::F32, vec![3, 4], &data).unwrap();
+
+        // [:, ::2]
+        let iterator = SliceIterator::new(
+            &attn_0,
+            &[
+                TensorIndexer::Narrow(Bound::Unbounded, Bound::Unbounded),
+                TensorIndexer::Strided(Bound::Unbounded, Bound::Unbounded, 2),
+            ],
+        )
+        .unwrap();
+        assert_eq!(iterator.newshape(), vec![3, 2]);
+        assert_eq!(iterator.remaining_byte_len(), 24);
+        let chunks: Vec<&[u8]> = iterator.collect();
+        assert_eq!(
+            chunks,
+            vec![
+                &data[0..4],
+                &data[8..12],
+                &data[16..20],
+                &data[24..28],
+                &data[32..36],
+                &data[40..44]
+            ]
+        );
+
+        // [::2] keeps whole rows
+        let mut iterator = SliceIterator::new(
+            &attn_0,
+            &[TensorIndexer::Strided(Bound::Unbounded, Bound::Unbounded, 2)],
+        )
+        .unwrap();
+        assert_eq!(iterator.newshape(), vec![2, 4]);
+        assert_eq!(iterator.next(), Some(&data[0..16]));
+        assert_eq!(iterator.next(), Some(&data[32..48]));
+        assert_eq!(iterator.next(), None);
+
+        // [1:, 1::3]
+        let iterator = SliceIterator::new(
+            &attn_0,
+            &[
+                TensorIndexer::Narrow(Bound::Included(1), Bound::Unbounded),
+                TensorIndexer::Strided(Bound::Included(1), Bound::Unbounded, 3),
+            ],
+        )
+        .unwrap();
+        assert_eq!(iterator.newshape(), vec![2, 1]);
+        let chunks: Vec<&[u8]> = iterator.collect();
+        assert_eq!(chunks, vec![&data[20..24], &data[36..40]]);
+
+        // [2:2:2] is empty
+        let mut iterator = SliceIterator::new(
+            &attn_0,
+            &[TensorIndexer::Strided(Bound::Included(2), Bound::Excluded(2), 2)],
+        )
+        .unwrap();
+        assert_eq!(iterator.newshape(), vec![0, 4]);
+        assert_eq!(iterator.remaining_byte_len(), 0);
+        assert_eq!(iterator.next(), None);
+
+        assert_eq!(
+            SliceIterator::new(
+                &attn_0,
+                &[TensorIndexer::Strided(Bound::Unbounded, Bound::Unbounded, 0)],
+            ),
+            Err(InvalidSlice::ZeroStep { dim_index: 0 })
+        );
+        assert_eq!(
+            TensorIndexer::Strided(Bound::Included(1), Bound::Unbounded, 8).to_string(),
+            "1::8"
+        );
+    }
+
+    #[test]
+    fn test_slice_index_select() {
+        let data: Vec<u8> = (0..12)
+            .map(|i| i as f32)
+            .flat_map(|f| f.to_le_bytes())
+            .collect();
+
+        let attn_0 = TensorView::new(Dtype::F32, vec![3, 4], &data).unwrap();
+
+        // [[2, 0]]
+        let mut iterator = attn_0.slice(vec![2usize, 0]).unwrap();
+        assert_eq!(iterator.newshape(), vec![2, 4]);
+        assert_eq!(iterator.next(), Some(&data[32..48]));
+        assert_eq!(iterator.next(), Some(&data[0..16]));
+        assert_eq!(iterator.next(), None);
+
+        // [1:, [3, 1]]
+        let iterator = attn_0.slice((1.., &[3usize, 1][..])).unwrap();
+        assert_eq!(iterator.newshape(), vec![2, 2]);
+        let chunks: Vec<&[u8]> = iterator.collect();
+        assert_eq!(
+            chunks,
+            vec![&data[28..32], &data[20..24], &data[44..48], &data[36..40]]
+        );
+
+        // [[]]
+        let mut iterator = attn_0.slice(Vec::<usize>::new()).unwrap();
+        assert_eq!(iterator.newshape(), vec![0, 4]);
+        assert_eq!(iterator.next(), None);
+
+        assert_eq!(
+            attn_0.slice((.., vec![0usize, 4])),
+            Err(InvalidSlice::SliceOutOfRange {
+                dim_index: 1,
+                asked: 4,
+                dim_size: 4,
+            })
+        );
+        assert_eq!(TensorIndexer::from(vec![0, 4]).to_string(), "[0, 4]");
+    }
+
+    #[test]
+    fn test_slice_coalesced() {
+        let data: Vec<u8> = (0..24)
+            .map(|i| i as f32)
+            .flat_map(|f| f.to_le_bytes())
+            .collect();
+
+        let attn_0 = TensorView::new(Dtype::F32, vec![2, 3, 4], &data).unwrap();
+
+        // Adjacent gathered rows are yielded as one chunk
+        let mut iterator = attn_0.slice((.., vec![1usize, 2, 0])).unwrap();
+        assert_eq!(iterator.newshape(), vec![2, 3, 4]);
+        assert_eq!(iterator.remaining_byte_len(), 96);
+        assert_eq!(iterator.next(), Some(&data[16..48]));
+        assert_eq!(iterator.remaining_byte_len(), 64);
+        assert_eq!(iterator.next(), Some(&data[0..16]));
+        assert_eq!(iterator.next(), Some(&data[64..96]));
+        assert_eq!(iterator.next(), Some(&data[48..64]));
+        assert_eq!(iterator.next(), None);
+        assert_eq!(iterator.remaining_byte_len(), 0);
+
+        // Only the outer dimensions are walked, the inner range is one block
+        let iterator = attn_0.slice((.., .., 1..3)).unwrap();
+        assert_eq!(iterator.dims.len(), 2);
+        assert_eq!(iterator.block, 8);
+        assert_eq!(iterator.count(), 6);
+    }
+
     #[test]
     fn test_invalid_range() {
         let data: Vec<u8> = vec![0.0f32, 1.0, 2.0, 3.0, 4.0, 5.0]
@@ -4,6 +4,7 @@ use crate::lib::{BTreeMap, Cow, HashMap, String, ToString, Vec};
 use crate::slice::{InvalidSlice, SliceIterator, TensorIndexer};
 use bincode::{Decode, Encode};
 use digest::Digest;
+use xxhash_rust::xxh3::xxh3_64;
 
 #[cfg(feature = "std")]
 use std::io::Write;
@@ -13,6 +14,12 @@ use std::path::Path;
 const MIN_HEADER_SIZE: usize = 8;
 const MAX_HEADER_SIZE: usize = 100_000_000;
 const OFFSET: usize = 8;
+/// Reserved key of the header metadata recording the data alignment.
+const ALIGNMENT_KEY: &str = "__alignment__";
+/// Reserved key of the header metadata recording the per tensor checksums.
+const CHECKSUMS_KEY: &str = "__checksums__";
+/// Prefix of the [`CHECKSUMS_KEY`] value, naming the hash function.
+const CHECKSUMS_PREFIX: &str = "xxh3:";
 
 /// Possible errors that could occur while reading
 /// A Bintensor file.
@@ -51,6 +58,16 @@ pub enum BinTensorError {
     /// The metadata contains a mismatch between the index map and tensor info,  
     /// leading to unnecessary memory allocation. This is likely due to file tampering.
     ValidationMismatch,
+    /// The data alignment is not a power of two, or the header is not padded to it.
+    InvalidAlignment(usize),
+    /// The user metadata uses a key reserved by the format.
+    ReservedMetadataKey(String),
+    /// The output buffer is smaller than the `usize` bytes of the serialized tensors.
+    BufferTooSmall(usize),
+    /// The data of the tensor, or the file, named `String` does not match its checksum.
+    ChecksumMismatch(String),
+    /// The data of the first dtype cannot be converted to the second one.
+    UnsupportedConversion(Dtype, Dtype),
 }
 
 #[cfg(feature = "std")]
@@ -88,6 +105,8 @@ struct PreparedData {
     n: u64,
     header_bytes: Vec<u8>,
     offset: usize,
+    /// Start of every tensor within the data region, in file order.
+    starts: Vec<usize>,
 }
 
 /// The trait necessary to enable bintensors to serialize a tensor
@@ -175,6 +194,14 @@ pub trait View {
     /// The shape of the tensor
     fn shape(&self) -> &[usize];
     /// The data of the tensor
+    ///
+    /// The sequential serializers, and the checksums of
+    /// [`Layout::checksums`], hold the data of at most one tensor at a time:
+    /// the result of `data` is dropped before `data` is called on the next
+    /// tensor. Implementations producing the data on demand may rely on it,
+    /// to release the previous tensor when the next one is produced. Only
+    /// the parallel serializers, which need `Self: Sync`, call `data`
+    /// concurrently, once per chunk of a tensor.
     fn data(&self) -> Cow<[u8]>;
     /// The length of the data, in bytes.
     /// This is necessary as this might be faster to get than `data().len()`
@@ -182,44 +209,193 @@ pub trait View {
     fn data_len(&self) -> usize;
 }
 
+/// Largest dtype alignment, the header is padded to a multiple of it.
+const MAX_ALIGNMENT: usize = 8;
+
+/// How the tensors are laid out in the data region of a file.
+#[derive(Debug, Clone, Default, PartialEq, Eq)]
+pub struct Layout {
+    /// The order of the tensors.
+    pub order: TensorOrder,
+    /// Starts every tensor at a multiple of this many bytes from the beginning
+    /// of the file, for instance 64 for SIMD loads or 4096 for page aligned
+    /// views. It must be a power of two, it is recorded in the header and the
+    /// gaps are filled with zeros. `None` packs the tensors next to each other.
+    pub alignment: Option<usize>,
+    /// Records an xxh3 checksum of every tensor in the header, see
+    /// [`Metadata::verify`]. The data of each tensor is read once more to
+    /// compute it, before the header is written.
+    pub checksums: bool,
+}
+
+/// The order tensors are laid out in the file, which is also the order of
+/// [`Metadata::offset_keys`].
+///
+/// Every tensor stays aligned on its dtype size whatever the order: with an
+/// order other than [`TensorOrder::Dtype`] and packed tensors, tensors whose
+/// byte length is not a multiple of 8 are moved after all the others, by
+/// descending alignment.
+#[derive(Debug, Clone, Default, PartialEq, Eq)]
+pub enum TensorOrder {
+    /// Descending dtype alignment, then name.
+    #[default]
+    Dtype,
+    /// Names with their runs of digits compared as numbers, `h.2` before `h.10`.
+    Natural,
+    /// The order in which the tensors are given.
+    Insertion,
+    /// The order of the listed names, tensors which are not listed come after
+    /// them in natural order.
+    Explicit(Vec<String>),
+}
+
+impl TensorOrder {
+    fn sort<S: AsRef<str> + Ord, V: View>(&self, data: &mut [(S, V)], packed: bool) {
+        match self {
+            TensorOrder::Dtype => {
+                data.sort_by(|(lname, left), (rname, right)| {
+                    right.dtype().cmp(&left.dtype()).then(lname.cmp(rname))
+                });
+                return;
+            }
+            TensorOrder::Natural => {
+                data.sort_by(|(lname, _), (rname, _)| natural_cmp(lname.as_ref(), rname.as_ref()))
+            }
+            TensorOrder::Insertion => {}
+            TensorOrder::Explicit(names) => {
+                let positions: HashMap<&str, usize> = names
+                    .iter()
+                    .enumerate()
+                    .map(|(position, name)| (name.as_str(), position))
+                    .collect();
+                data.sort_by(|(lname, _), (rname, _)| {
+                    let (lname, rname) = (lname.as_ref(), rname.as_ref());
+                    match (positions.get(lname), positions.get(rname)) {
+                        (Some(left), Some(right)) => left.cmp(right),
+                        (Some(_), None) => core::cmp::Ordering::Less,
+                        (None, Some(_)) => core::cmp::Ordering::Greater,
+                        (None, None) => natural_cmp(lname, rname),
+                    }
+                });
+            }
+        }
+        if !packed {
+            return;
+        }
+        // Tensors spanning a multiple of the largest alignment keep every offset
+        // aligned, the others go last by descending alignment (stable sort).
+        data.sort_by_key(|(_, tensor)| {
+            let unaligned = tensor.data_len() % MAX_ALIGNMENT != 0;
+            unaligned.then(|| core::cmp::Reverse(tensor.dtype()))
+        });
+    }
+}
+
+/// Compares names with their runs of ASCII digits compared as numbers.
+fn natural_cmp(left: &str, right: &str) -> core::cmp::Ordering {
+    use core::cmp::Ordering;
+
+    fn split_digits(bytes: &[u8]) -> (&[u8], &[u8]) {
+        let len = bytes.iter().take_while(|c| c.is_ascii_digit()).count();
+        bytes.split_at(len)
+    }
+    fn trim_zeros(digits: &[u8]) -> &[u8] {
+        let zeros = digits.iter().take_while(|&&c| c == b'0').count();
+        &digits[zeros..]
+    }
+
+    let (mut lrest, mut rrest) = (left.as_bytes(), right.as_bytes());
+    loop {
+        match (lrest.first(), rrest.first()) {
+            // Equal up to leading zeros, fall back to plain order.
+            (None, None) => return left.cmp(right),
+            (None, Some(_)) => return Ordering::Less,
+            (Some(_), None) => return Ordering::Greater,
+            (Some(l), Some(r)) if l.is_ascii_digit() && r.is_ascii_digit() => {
+                let (ldigits, lnext) = split_digits(lrest);
+                let (rdigits, rnext) = split_digits(rrest);
+                let (ldigits, rdigits) = (trim_zeros(ldigits), trim_zeros(rdigits));
+                let ordering = ldigits.len().cmp(&rdigits.len()).then(ldigits.cmp(rdigits));
+                if ordering != Ordering::Equal {
+                    return ordering;
+                }
+                (lrest, rrest) = (lnext, rnext);
+            }
+            (Some(l), Some(r)) => {
+                if l != r {
+                    return l.cmp(r);
+                }
+                (lrest, rrest) = (&lrest[1..], &rrest[1..]);
+            }
+        }
+    }
+}
+
 fn prepare<S: AsRef<str> + Ord + core::fmt::Display, V: View, I: IntoIterator<Item = (S, V)>>(
     data: I,
     data_info: &Option<HashMap<String, String>>,
+    layout: &Layout,
     // ) -> Result<(Metadata, Vec<&'hash TensorView<'data>>, usize), BinTensorError> {
 ) -> Result<(PreparedData, Vec<V>), BinTensorError> {
-    // Make sure we're sorting by descending dtype alignment
-    // Then by name
+    if let Some(alignment) = layout.alignment.filter(|a| !a.is_power_of_two()) {
+        return Err(BinTensorError::InvalidAlignment(alignment));
+    }
+    if let Some(key) = data_info.as_ref().and_then(|info| {
+        [ALIGNMENT_KEY, CHECKSUMS_KEY]
+            .into_iter()
+            .find(|key| info.contains_key(*key))
+    }) {
+        return Err(BinTensorError::ReservedMetadataKey(key.to_string()));
+    }
+    let alignment = layout.alignment.unwrap_or(1);
+
     let mut data: Vec<_> = data.into_iter().collect();
-    data.sort_by(|(lname, left), (rname, right)| {
-        right.dtype().cmp(&left.dtype()).then(lname.cmp(rname))
-    });
+    layout.order.sort(&mut data, alignment < MAX_ALIGNMENT);
 
     let mut tensors: Vec<V> = Vec::with_capacity(data.len());
     let mut hmetadata = Vec::with_capacity(data.len());
+    let mut starts = Vec::with_capacity(data.len());
     let mut offset = 0;
-    let data: Vec<_> = data.into_iter().collect();
     for (name, tensor) in data {
         let n = tensor.data_len();
+        let start = offset
+            .checked_next_multiple_of(alignment)
+            .ok_or(BinTensorError::ValidationOverflow)?;
         let tensor_info = TensorInfo {
             dtype: tensor.dtype(),
             shape: tensor.shape().to_vec(),
-            data_offsets: (offset, offset + n),
+            data_offsets: (start, start + n),
         };
-        offset += n;
+        offset = start + n;
         hmetadata.push((name.to_string(), tensor_info));
         tensors.push(tensor);
+        starts.push(start);
     }
 
+    // One tensor at a time, see `View::data`.
+    let checksums = layout.checksums.then(|| {
+        tensors
+            .iter()
+            .map(|tensor| xxh3_64(tensor.data().as_ref()))
+            .collect()
+    });
+
     // encode the metadata into byte buffer
-    let metadata: Metadata = Metadata::new(data_info.clone(), hmetadata)?;
+    let mut metadata: Metadata = Metadata::new(data_info.clone(), hmetadata, layout.alignment)?;
+    metadata.checksums = checksums;
     let mut metadata_buf = bincode::encode_to_vec(
         metadata,
         bincode::config::standard().with_limit::<{ MAX_HEADER_SIZE }>(),
     )?;
-    // Force alignment to 8 bytes with padding.
-    let extra = (8 - metadata_buf.len() % 8) % 8;
+    // Force alignment of the data region to 8 bytes, or to the data alignment, with padding.
+    let header_alignment = alignment.max(MAX_ALIGNMENT);
+    let extra =
+        (header_alignment - (OFFSET + metadata_buf.len()) % header_alignment) % header_alignment;
     let padding = vec![b' '; extra];
     metadata_buf.extend(padding);
+    if metadata_buf.len() > MAX_HEADER_SIZE {
+        return Err(BinTensorError::HeaderTooLarge);
+    }
 
     let n: u64 = metadata_buf.len() as u64;
     Ok((
@@ -227,6 +403,7 @@ fn prepare<S: AsRef<str> + Ord + core::fmt::Display, V: View, I: IntoIterator<It
             n,
             header_bytes: metadata_buf,
             offset,
+            starts,
         },
         tensors,
     ))
@@ -240,25 +417,331 @@ pub fn serialize<
 >(
     data: I,
     data_info: &Option<HashMap<String, String>>,
+) -> Result<Vec<u8>, BinTensorError> {
+    serialize_with_layout(data, data_info, &Layout::default())
+}
+
+/// Serialize to an owned byte buffer the dictionnary of tensors, laid out as `layout` says.
+pub fn serialize_with_layout<
+    S: AsRef<str> + Ord + core::fmt::Display,
+    V: View,
+    I: IntoIterator<Item = (S, V)>,
+>(
+    data: I,
+    data_info: &Option<HashMap<String, String>>,
+    layout: &Layout,
 ) -> Result<Vec<u8>, BinTensorError> {
     let (
         PreparedData {
             n,
             header_bytes,
             offset,
+            starts,
         },
         tensors,
-    ) = prepare(data, data_info)?;
-    let expected_size = OFFSET + header_bytes.len() + offset;
-    let mut buffer: Vec<u8> = Vec::with_capacity(expected_size);
+    ) = prepare(data, data_info, layout)?;
+    let data_start = OFFSET + header_bytes.len();
+    let mut buffer: Vec<u8> = Vec::with_capacity(data_start + offset);
     buffer.extend(&n.to_le_bytes().to_vec());
     buffer.extend(&header_bytes);
-    for tensor in tensors {
+    // The data of a tensor is dropped before the next one is asked for, see `View::data`.
+    for (tensor, start) in tensors.iter().zip(starts) {
+        buffer.resize(data_start + start, 0);
         buffer.extend(tensor.data().as_ref());
     }
     Ok(buffer)
 }
 
+/// Gives back the size in bytes of the dictionnary of tensors once serialized
+/// with `layout`, to size the buffer given to [`serialize_into`].
+pub fn serialized_size<
+    S: AsRef<str> + Ord + core::fmt::Display,
+    V: View,
+    I: IntoIterator<Item = (S, V)>,
+>(
+    data: I,
+    data_info: &Option<HashMap<String, String>>,
+    layout: &Layout,
+) -> Result<usize, BinTensorError> {
+    Ok(PreparedTensors::new(data, data_info, layout)?.size())
+}
+
+/// A dictionnary of tensors laid out with its header encoded, ready to be
+/// written. Knowing the [`size`](Self::size) before writing avoids laying the
+/// tensors out, and computing their checksums, a second time when the buffer
+/// is allocated by someone else.
+///
+/// ```
+/// use bintensors::tensor::{serialize, Layout, PreparedTensors, TensorView};
+/// use bintensors::Dtype;
+///
+/// let data = [0u8; 16];
+/// let tensors = [("weight", TensorView::new(Dtype::F32, vec![2, 2], &data).unwrap())];
+/// let prepared = PreparedTensors::new(tensors.clone(), &None, &Layout::default()).unwrap();
+/// let mut buffer = vec![0u8; prepared.size()];
+/// assert_eq!(prepared.write_into(&mut buffer).unwrap(), buffer.len());
+/// assert_eq!(buffer, serialize(tensors, &None).unwrap());
+/// ```
+pub struct PreparedTensors<V> {
+    prepared: PreparedData,
+    tensors: Vec<V>,
+}
+
+impl<V: View> PreparedTensors<V> {
+    /// Lays out the dictionnary of tensors as `layout` says.
+    pub fn new<S: AsRef<str> + Ord + core::fmt::Display, I: IntoIterator<Item = (S, V)>>(
+        data: I,
+        data_info: &Option<HashMap<String, String>>,
+        layout: &Layout,
+    ) -> Result<Self, BinTensorError> {
+        let (prepared, tensors) = prepare(data, data_info, layout)?;
+        Ok(Self { prepared, tensors })
+    }
+
+    /// The size in bytes of the serialized tensors.
+    pub fn size(&self) -> usize {
+        OFFSET + self.prepared.header_bytes.len() + self.prepared.offset
+    }
+
+    /// Writes the tensors into the start of `buffer`, as [`serialize_into`] does.
+    pub fn write_into(&self, buffer: &mut [u8]) -> Result<usize, BinTensorError> {
+        let PreparedData {
+            n,
+            header_bytes,
+            starts,
+            ..
+        } = &self.prepared;
+        let size = self.size();
+        let buffer = buffer
+            .get_mut(..size)
+            .ok_or(BinTensorError::BufferTooSmall(size))?;
+        let (header, body) = buffer.split_at_mut(OFFSET + header_bytes.len());
+        header[..OFFSET].copy_from_slice(&n.to_le_bytes());
+        header[OFFSET..].copy_from_slice(header_bytes);
+
+        let mut position = 0;
+        // The data of a tensor is dropped before the next one is asked for, see `View::data`.
+        for (tensor, &start) in self.tensors.iter().zip(starts) {
+            // The buffer may hold anything, the alignment gaps are zeroed.
+            body[position..start].fill(0);
+            let data = tensor.data();
+            let data = data.as_ref();
+            if data.len() != tensor.data_len() {
+                return Err(BinTensorError::TensorInvalidInfo);
+            }
+            body[start..start + data.len()].copy_from_slice(data);
+            position = start + data.len();
+        }
+        Ok(size)
+    }
+
+    /// Writes the tensors into the start of `buffer` with a pool of
+    /// `num_threads` workers, as [`serialize_into_parallel`] does.
+    #[cfg(feature = "parallel")]
+    pub fn write_into_parallel(
+        &self,
+        buffer: &mut [u8],
+        num_threads: usize,
+    ) -> Result<usize, BinTensorError>
+    where
+        V: Sync,
+    {
+        let size = self.size();
+        let buffer = buffer
+            .get_mut(..size)
+            .ok_or(BinTensorError::BufferTooSmall(size))?;
+        copy_prepared_parallel(
+            &self.prepared,
+            &self.tensors,
+            buffer,
+            num_threads,
+            PARALLEL_COPY_CHUNK_SIZE,
+        )?;
+        Ok(size)
+    }
+}
+
+/// Serialize the dictionnary of tensors into the start of `buffer`, without
+/// allocating for the tensor data. This allows writing straight into memory
+/// owned by someone else, like a shared memory segment.
+///
+/// `buffer` must hold at least [`serialized_size`] bytes, the number of bytes
+/// written is returned and the rest of `buffer` is left untouched.
+///
+/// ```
+/// use bintensors::tensor::{serialize_into, serialized_size, Layout, TensorView};
+/// use bintensors::{BinTensors, Dtype};
+///
+/// let data = [0u8; 16];
+/// let tensors = [("weight", TensorView::new(Dtype::F32, vec![2, 2], &data).unwrap())];
+/// let layout = Layout::default();
+/// let size = serialized_size(tensors.clone(), &None, &layout).unwrap();
+/// let mut buffer = vec![0xffu8; size + 100];
+/// assert_eq!(serialize_into(tensors, &None, &layout, &mut buffer).unwrap(), size);
+/// let loaded = BinTensors::deserialize(&buffer[..size]).unwrap();
+/// assert_eq!(loaded.tensor("weight").unwrap().data(), &data);
+/// ```
+pub fn serialize_into<
+    S: AsRef<str> + Ord + core::fmt::Display,
+    V: View,
+    I: IntoIterator<Item = (S, V)>,
+>(
+    data: I,
+    data_info: &Option<HashMap<String, String>>,
+    layout: &Layout,
+    buffer: &mut [u8],
+) -> Result<usize, BinTensorError> {
+    PreparedTensors::new(data, data_info, layout)?.write_into(buffer)
+}
+
+/// Size of the pieces large tensors are split into by [`serialize_parallel`]
+/// and [`serialize_into_parallel`]. Payloads smaller than this are copied on
+/// the calling thread, spawning workers would cost more than the copy.
+#[cfg(feature = "parallel")]
+const PARALLEL_COPY_CHUNK_SIZE: usize = 8 * 1024 * 1024;
+
+/// Serialize to an owned byte buffer the dictionnary of tensors, copying the
+/// tensors with a pool of `num_threads` workers.
+///
+/// The buffer is allocated to its exact final size up front, and every tensor
+/// (or chunk of a large tensor) is copied straight to its offset, so copying a
+/// large model is no longer bound by a single core's memory bandwidth. The
+/// result is identical to [`serialize`].
+///
+/// `num_threads == 0` uses [`std::thread::available_parallelism`]. As for
+/// [`serialize_to_file_parallel`], [`View::data`] may be called once per chunk
+/// of a tensor.
+#[cfg(feature = "parallel")]
+pub fn serialize_parallel<
+    S: AsRef<str> + Ord + core::fmt::Display,
+    V: View + Sync,
+    I: IntoIterator<Item = (S, V)>,
+>(
+    data: I,
+    data_info: &Option<HashMap<String, String>>,
+    num_threads: usize,
+) -> Result<Vec<u8>, BinTensorError> {
+    serialize_parallel_with_layout(data, data_info, num_threads, &Layout::default())
+}
+
+/// Same as [`serialize_parallel`], with the tensors laid out as `layout` says.
+#[cfg(feature = "parallel")]
+pub fn serialize_parallel_with_layout<
+    S: AsRef<str> + Ord + core::fmt::Display,
+    V: View + Sync,
+    I: IntoIterator<Item = (S, V)>,
+>(
+    data: I,
+    data_info: &Option<HashMap<String, String>>,
+    num_threads: usize,
+    layout: &Layout,
+) -> Result<Vec<u8>, BinTensorError> {
+    let prepared = PreparedTensors::new(data, data_info, layout)?;
+    // Zeroed memory comes fresh from the allocator, the pages are only
+    // touched by the workers copying into them.
+    let mut buffer = vec![0u8; prepared.size()];
+    prepared.write_into_parallel(&mut buffer, num_threads)?;
+    Ok(buffer)
+}
+
+/// Same as [`serialize_into`], copying the tensors with a pool of
+/// `num_threads` workers as [`serialize_parallel`] does.
+#[cfg(feature = "parallel")]
+pub fn serialize_into_parallel<
+    S: AsRef<str> + Ord + core::fmt::Display,
+    V: View + Sync,
+    I: IntoIterator<Item = (S, V)>,
+>(
+    data: I,
+    data_info: &Option<HashMap<String, String>>,
+    layout: &Layout,
+    buffer: &mut [u8],
+    num_threads: usize,
+) -> Result<usize, BinTensorError> {
+    PreparedTensors::new(data, data_info, layout)?.write_into_parallel(buffer, num_threads)
+}
+
+/// Writes the header and the tensors into `buffer`, which is exactly the
+/// serialized size, splitting the copies into pieces of at most `chunk_size`
+/// bytes over `num_threads` workers.
+#[cfg(feature = "parallel")]
+fn copy_prepared_parallel<V: View + Sync>(
+    prepared: &PreparedData,
+    tensors: &[V],
+    buffer: &mut [u8],
+    num_threads: usize,
+    chunk_size: usize,
+) -> Result<(), BinTensorError> {
+    use std::sync::Mutex;
+
+    let PreparedData {
+        n,
+        header_bytes,
+        offset,
+        starts,
+    } = prepared;
+    let (header, mut body) = buffer.split_at_mut(OFFSET + header_bytes.len());
+    header[..OFFSET].copy_from_slice(&n.to_le_bytes());
+    header[OFFSET..].copy_from_slice(header_bytes);
+
+    // Carve the data region into disjoint (tensor index, start within the
+    // tensor, destination) jobs. The buffer may hold anything, the alignment
+    // gaps are zeroed on the way.
+    let mut jobs = Vec::new();
+    let mut position = 0;
+    for (index, (tensor, &start)) in tensors.iter().zip(starts).enumerate() {
+        let (gap, rest) = core::mem::take(&mut body).split_at_mut(start - position);
+        gap.fill(0);
+        let (mut dest, rest) = rest.split_at_mut(tensor.data_len());
+        let mut chunk_start = 0;
+        while !dest.is_empty() {
+            let len = dest.len().min(chunk_size);
+            let (chunk, next) = core::mem::take(&mut dest).split_at_mut(len);
+            jobs.push((index, chunk_start, chunk));
+            chunk_start += len;
+            dest = next;
+        }
+        body = rest;
+        position = start + tensor.data_len();
+    }
+
+    let num_threads = match num_threads {
+        0 => std::thread::available_parallelism().map_or(1, |n| n.get()),
+        n => n,
+    }
+    .min(offset.div_ceil(chunk_size))
+    .max(1);
+
+    let jobs = Mutex::new(jobs.into_iter());
+    let worker = || -> Result<(), BinTensorError> {
+        loop {
+            let job = jobs.lock().unwrap_or_else(|e| e.into_inner()).next();
+            let Some((index, start, chunk)) = job else {
+                return Ok(());
+            };
+            let tensor = &tensors[index];
+            let data = tensor.data();
+            let data = data.as_ref();
+            if data.len() != tensor.data_len() {
+                return Err(BinTensorError::TensorInvalidInfo);
+            }
+            chunk.copy_from_slice(&data[start..start + chunk.len()]);
+        }
+    };
+
+    if num_threads == 1 {
+        return worker();
+    }
+    std::thread::scope(|scope| {
+        let handles: Vec<_> = (0..num_threads).map(|_| scope.spawn(worker)).collect();
+        handles.into_iter().try_for_each(|handle| {
+            handle
+                .join()
+                .unwrap_or_else(|panic| std::panic::resume_unwind(panic))
+        })
+    })
+}
+
 /// Serialize to a regular file the dictionnary of tensors.
 /// Writing directly to file reduces the need to allocate the whole amount to
 /// memory.
@@ -273,19 +756,476 @@ pub fn serialize_to_file<
     data_info: &Option<HashMap<String, String>>,
     filename: P,
 ) -> Result<(), BinTensorError> {
+    serialize_to_file_with_layout(data, data_info, filename, &Layout::default())
+}
+
+/// Serialize to a regular file the dictionnary of tensors, laid out as `layout` says.
+#[cfg(feature = "std")]
+pub fn serialize_to_file_with_layout<
+    S: AsRef<str> + Ord + core::fmt::Display,
+    V: View,
+    I: IntoIterator<Item = (S, V)>,
+    P: AsRef<Path>,
+>(
+    data: I,
+    data_info: &Option<HashMap<String, String>>,
+    filename: P,
+    layout: &Layout,
+) -> Result<(), BinTensorError> {
+    let f = std::fs::File::create(filename)?;
+    serialize_to_writer_with_layout(data, data_info, f, layout)
+}
+
+/// Tensors (and padding) smaller than this are copied into a staging buffer
+/// by [`serialize_to_writer`], larger ones are handed to the writer as is.
+#[cfg(feature = "std")]
+const VECTORED_THRESHOLD: usize = 64 * 1024;
+
+/// Serialize the dictionnary of tensors to any [`Write`] implementation, a
+/// socket, a pipe or a compression stream for instance.
+///
+/// Small tensors are gathered in a staging buffer, large tensors are passed
+/// along the staged bytes to [`Write::write_vectored`] without being copied,
+/// so there is no need to wrap `writer` in a [`std::io::BufWriter`]. The
+/// writer is flushed once everything is written. Large tensors are never
+/// batched together, the data of a tensor is dropped before the next one is
+/// asked for, as [`View::data`] documents.
+///
+/// ```
+/// use bintensors::tensor::{serialize, serialize_to_writer, Dtype, TensorView};
+/// use std::collections::HashMap;
+///
+/// let data = vec![0u8; 4 * 1024];
+/// let tensor = TensorView::new(Dtype::F32, vec![32, 32], &data).unwrap();
+/// let tensors = HashMap::from([("weight", tensor)]);
+///
+/// let mut out = Vec::new();
+/// serialize_to_writer(&tensors, &None, &mut out).unwrap();
+/// assert_eq!(out, serialize(&tensors, &None).unwrap());
+/// ```
+#[cfg(feature = "std")]
+pub fn serialize_to_writer<
+    S: AsRef<str> + Ord + core::fmt::Display,
+    V: View,
+    I: IntoIterator<Item = (S, V)>,
+    W: Write,
+>(
+    data: I,
+    data_info: &Option<HashMap<String, String>>,
+    writer: W,
+) -> Result<(), BinTensorError> {
+    serialize_to_writer_with_layout(data, data_info, writer, &Layout::default())
+}
+
+/// Same as [`serialize_to_writer`], with the tensors laid out as `layout` says.
+#[cfg(feature = "std")]
+pub fn serialize_to_writer_with_layout<
+    S: AsRef<str> + Ord + core::fmt::Display,
+    V: View,
+    I: IntoIterator<Item = (S, V)>,
+    W: Write,
+>(
+    data: I,
+    data_info: &Option<HashMap<String, String>>,
+    mut writer: W,
+    layout: &Layout,
+) -> Result<(), BinTensorError> {
+    let (
+        PreparedData {
+            n,
+            header_bytes,
+            starts,
+            ..
+        },
+        tensors,
+    ) = prepare(data, data_info, layout)?;
+    let mut staged = Vec::with_capacity(VECTORED_THRESHOLD);
+    staged.extend_from_slice(&n.to_le_bytes());
+    staged.extend_from_slice(&header_bytes);
+    let mut position = 0;
+    // The data of a tensor is dropped before the next one is asked for, see `View::data`.
+    for (tensor, start) in tensors.iter().zip(starts) {
+        let padding = start - position;
+        if padding < VECTORED_THRESHOLD {
+            make_room(&mut writer, &mut staged, padding)?;
+            staged.resize(staged.len() + padding, 0);
+        } else {
+            write_all_vectored(&mut writer, &mut [std::io::IoSlice::new(&staged)])?;
+            staged.clear();
+            write_zeros(&mut writer, padding)?;
+        }
+        let data = tensor.data();
+        let data = data.as_ref();
+        if data.len() < VECTORED_THRESHOLD {
+            make_room(&mut writer, &mut staged, data.len())?;
+            staged.extend_from_slice(data);
+        } else {
+            write_all_vectored(
+                &mut writer,
+                &mut [std::io::IoSlice::new(&staged), std::io::IoSlice::new(data)],
+            )?;
+            staged.clear();
+        }
+        position = start + data.len();
+    }
+    write_all_vectored(&mut writer, &mut [std::io::IoSlice::new(&staged)])?;
+    writer.flush()?;
+    Ok(())
+}
+
+/// Serialize the dictionnary of tensors to `writer`, computing their checksum
+/// on the way.
+///
+/// Every byte is fed to `hasher` right after the writer accepted it, so the
+/// data is read once and no serialized copy is kept in memory. The returned
+/// digest equals the one of [`serialize_with_checksum`].
+///
+/// ```
+/// use bintensors::tensor::{serialize_to_writer_with_checksum, serialize_with_checksum, Dtype, TensorView};
+/// use sha2::{Digest, Sha256};
+/// use std::collections::HashMap;
+///
+/// let data = vec![0u8; 4 * 1024];
+/// let tensor = TensorView::new(Dtype::F32, vec![32, 32], &data).unwrap();
+/// let tensors = HashMap::from([("weight", tensor)]);
+///
+/// let mut out = Vec::new();
+/// let checksum = serialize_to_writer_with_checksum(&tensors, &None, &mut out, Sha256::new()).unwrap();
+/// let expected = serialize_with_checksum(&tensors, &None, Sha256::new()).unwrap();
+/// assert_eq!(checksum, expected.checksum);
+/// assert_eq!(out, expected.buffer);
+/// ```
+#[cfg(feature = "std")]
+pub fn serialize_to_writer_with_checksum<
+    S: AsRef<str> + Ord + core::fmt::Display,
+    V: View,
+    I: IntoIterator<Item = (S, V)>,
+    W: Write,
+    H: Digest,
+>(
+    data: I,
+    data_info: &Option<HashMap<String, String>>,
+    writer: W,
+    hasher: H,
+) -> Result<Vec<u8>, BinTensorError> {
+    let mut writer = HashingWriter {
+        inner: writer,
+        hasher,
+    };
+    serialize_to_writer(data, data_info, &mut writer)?;
+    Ok(writer.hasher.finalize()[..].to_vec())
+}
+
+/// Serialize to a regular file the dictionnary of tensors and return their
+/// checksum, computed in the same pass, see [`serialize_to_writer_with_checksum`].
+#[cfg(feature = "std")]
+pub fn serialize_to_file_with_checksum<
+    S: AsRef<str> + Ord + core::fmt::Display,
+    V: View,
+    I: IntoIterator<Item = (S, V)>,
+    P: AsRef<Path>,
+    H: Digest,
+>(
+    data: I,
+    data_info: &Option<HashMap<String, String>>,
+    filename: P,
+    hasher: H,
+) -> Result<Vec<u8>, BinTensorError> {
+    let f = std::fs::File::create(filename)?;
+    serialize_to_writer_with_checksum(data, data_info, f, hasher)
+}
+
+/// Largest write forwarded at once by [`HashingWriter`], so the bytes are
+/// still in cache when they are hashed.
+#[cfg(feature = "std")]
+const CHECKSUM_CHUNK: usize = 1024 * 1024;
+
+/// A writer feeding every byte accepted by `inner` to `hasher`.
+#[cfg(feature = "std")]
+struct HashingWriter<W, H> {
+    inner: W,
+    hasher: H,
+}
+
+#[cfg(feature = "std")]
+impl<W: Write, H: Digest> Write for HashingWriter<W, H> {
+    fn write(&mut self, buf: &[u8]) -> std::io::Result<usize> {
+        let buf = &buf[..buf.len().min(CHECKSUM_CHUNK)];
+        let written = self.inner.write(buf)?;
+        self.hasher.update(&buf[..written]);
+        Ok(written)
+    }
+
+    fn write_vectored(&mut self, bufs: &[std::io::IoSlice<'_>]) -> std::io::Result<usize> {
+        let mut budget = CHECKSUM_CHUNK;
+        let bufs: Vec<std::io::IoSlice<'_>> = bufs
+            .iter()
+            .map(|buf| {
+                let len = buf.len().min(budget);
+                budget -= len;
+                std::io::IoSlice::new(&buf[..len])
+            })
+            .collect();
+        let written = self.inner.write_vectored(&bufs)?;
+        let mut left = written;
+        for buf in &bufs {
+            let len = buf.len().min(left);
+            self.hasher.update(&buf[..len]);
+            left -= len;
+        }
+        Ok(written)
+    }
+
+    fn flush(&mut self) -> std::io::Result<()> {
+        self.inner.flush()
+    }
+}
+
+/// Writes out the `staged` bytes if `len` more would grow them past
+/// [`VECTORED_THRESHOLD`].
+#[cfg(feature = "std")]
+fn make_room<W: Write>(writer: &mut W, staged: &mut Vec<u8>, len: usize) -> std::io::Result<()> {
+    if staged.len() + len > VECTORED_THRESHOLD {
+        write_all_vectored(writer, &mut [std::io::IoSlice::new(staged)])?;
+        staged.clear();
+    }
+    Ok(())
+}
+
+/// Writes all of `bufs`, retrying on short writes like [`Write::write_all`].
+#[cfg(feature = "std")]
+fn write_all_vectored<W: Write>(
+    writer: &mut W,
+    mut bufs: &mut [std::io::IoSlice<'_>],
+) -> std::io::Result<()> {
+    std::io::IoSlice::advance_slices(&mut bufs, 0);
+    while !bufs.is_empty() {
+        match writer.write_vectored(bufs) {
+            Ok(0) => return Err(std::io::ErrorKind::WriteZero.into()),
+            Ok(written) => std::io::IoSlice::advance_slices(&mut bufs, written),
+            Err(e) if e.kind() == std::io::ErrorKind::Interrupted => {}
+            Err(e) => return Err(e),
+        }
+    }
+    Ok(())
+}
+
+/// Writes `len` zero bytes, the padding between aligned tensors.
+#[cfg(feature = "std")]
+fn write_zeros<W: Write>(writer: &mut W, mut len: usize) -> std::io::Result<()> {
+    const ZEROS: [u8; 4096] = [0; 4096];
+    while len > 0 {
+        let chunk = len.min(ZEROS.len());
+        writer.write_all(&ZEROS[..chunk])?;
+        len -= chunk;
+    }
+    Ok(())
+}
+
+/// Size of the pieces large tensors are split into by
+/// [`serialize_to_file_parallel`], so a single huge tensor can still be
+/// spread over several workers.
+#[cfg(feature = "std")]
+const PARALLEL_CHUNK_SIZE: usize = 64 * 1024 * 1024;
+
+/// Serialize to a regular file the dictionnary of tensors, using a pool of
+/// `num_threads` workers.
+///
+/// Every tensor's final offset is known once the header has been built, so
+/// the file is preallocated to its final size and each worker writes its
+/// tensors (or chunks of large tensors) directly at their position. This
+/// helps saturating fast storage that a single writer cannot keep busy.
+///
+/// `num_threads == 0` uses [`std::thread::available_parallelism`]. Note that
+/// [`View::data`] may be called once per chunk of a tensor, so views which
+/// materialize their data on each call are better written with
+/// [`serialize_to_file`]. On platforms without positional writes this falls
+/// back to [`serialize_to_file`].
+#[cfg(feature = "std")]
+pub fn serialize_to_file_parallel<
+    S: AsRef<str> + Ord + core::fmt::Display,
+    V: View + Sync,
+    I: IntoIterator<Item = (S, V)>,
+    P: AsRef<Path>,
+>(
+    data: I,
+    data_info: &Option<HashMap<String, String>>,
+    filename: P,
+    num_threads: usize,
+) -> Result<(), BinTensorError> {
+    serialize_to_file_parallel_with_layout(
+        data,
+        data_info,
+        filename,
+        num_threads,
+        &Layout::default(),
+    )
+}
+
+/// Same as [`serialize_to_file_parallel`], with the tensors laid out as `layout` says.
+#[cfg(feature = "std")]
+pub fn serialize_to_file_parallel_with_layout<
+    S: AsRef<str> + Ord + core::fmt::Display,
+    V: View + Sync,
+    I: IntoIterator<Item = (S, V)>,
+    P: AsRef<Path>,
+>(
+    data: I,
+    data_info: &Option<HashMap<String, String>>,
+    filename: P,
+    num_threads: usize,
+    layout: &Layout,
+) -> Result<(), BinTensorError> {
+    #[cfg(any(unix, windows))]
+    {
+        serialize_to_file_chunked(
+            data,
+            data_info,
+            filename,
+            num_threads,
+            PARALLEL_CHUNK_SIZE,
+            layout,
+        )
+    }
+    #[cfg(not(any(unix, windows)))]
+    {
+        let _ = num_threads;
+        serialize_to_file_with_layout(data, data_info, filename, layout)
+    }
+}
+
+#[cfg(all(feature = "std", any(unix, windows)))]
+fn serialize_to_file_chunked<
+    S: AsRef<str> + Ord + core::fmt::Display,
+    V: View + Sync,
+    I: IntoIterator<Item = (S, V)>,
+    P: AsRef<Path>,
+>(
+    data: I,
+    data_info: &Option<HashMap<String, String>>,
+    filename: P,
+    num_threads: usize,
+    chunk_size: usize,
+    layout: &Layout,
+) -> Result<(), BinTensorError> {
+    use std::sync::atomic::{AtomicBool, AtomicUsize, Ordering};
+
     let (
         PreparedData {
-            n, header_bytes, ..
+            n,
+            header_bytes,
+            offset,
+            starts,
         },
         tensors,
-    ) = prepare(data, data_info)?;
-    let mut f = std::io::BufWriter::new(std::fs::File::create(filename)?);
-    f.write_all(n.to_le_bytes().as_ref())?;
-    f.write_all(&header_bytes)?;
-    for tensor in tensors {
-        f.write_all(tensor.data().as_ref())?;
-    }
-    f.flush()?;
+    ) = prepare(data, data_info, layout)?;
+    let data_start = OFFSET + header_bytes.len();
+
+    let file = std::fs::File::create(filename)?;
+    file.set_len((data_start + offset) as u64)?;
+    let mut header = Vec::with_capacity(data_start);
+    header.extend(n.to_le_bytes());
+    header.extend(&header_bytes);
+    write_all_at(&file, &header, 0)?;
+
+    // (tensor index, start within the tensor, end within the tensor, file position)
+    // The alignment gaps are already zeros in the preallocated file.
+    let mut jobs = Vec::new();
+    for (index, (tensor, tensor_start)) in tensors.iter().zip(starts).enumerate() {
+        let len = tensor.data_len();
+        let position = data_start + tensor_start;
+        let mut start = 0;
+        while start < len {
+            let end = (start + chunk_size).min(len);
+            jobs.push((index, start, end, position + start));
+            start = end;
+        }
+    }
+
+    let num_threads = match num_threads {
+        0 => std::thread::available_parallelism().map_or(1, |n| n.get()),
+        n => n,
+    }
+    .min(jobs.len())
+    .max(1);
+
+    let next = AtomicUsize::new(0);
+    let failed = AtomicBool::new(false);
+    let worker = || -> Result<(), BinTensorError> {
+        while !failed.load(Ordering::Relaxed) {
+            let Some(&(index, start, end, position)) =
+                jobs.get(next.fetch_add(1, Ordering::Relaxed))
+            else {
+                break;
+            };
+            let data = tensors[index].data();
+            let result = match data.get(start..end) {
+                Some(chunk) => {
+                    write_all_at(&file, chunk, position as u64).map_err(BinTensorError::from)
+                }
+                None => Err(BinTensorError::TensorInvalidInfo),
+            };
+            if result.is_err() {
+                failed.store(true, Ordering::Relaxed);
+                return result;
+            }
+        }
+        Ok(())
+    };
+
+    std::thread::scope(|scope| {
+        let handles: Vec<_> = (0..num_threads).map(|_| scope.spawn(worker)).collect();
+        handles.into_iter().try_for_each(|handle| {
+            handle
+                .join()
+                .unwrap_or_else(|panic| std::panic::resume_unwind(panic))
+        })
+    })
+}
+
+#[cfg(all(feature = "std", unix))]
+fn write_all_at(file: &std::fs::File, buf: &[u8], offset: u64) -> std::io::Result<()> {
+    use std::os::unix::fs::FileExt;
+    file.write_all_at(buf, offset)
+}
+
+#[cfg(all(feature = "std", windows))]
+fn write_all_at(file: &std::fs::File, mut buf: &[u8], mut offset: u64) -> std::io::Result<()> {
+    use std::os::windows::fs::FileExt;
+    while !buf.is_empty() {
+        match file.seek_write(buf, offset) {
+            Ok(0) => return Err(std::io::ErrorKind::WriteZero.into()),
+            Ok(written) => {
+                buf = &buf[written..];
+                offset += written as u64;
+            }
+            Err(e) if e.kind() == std::io::ErrorKind::Interrupted => {}
+            Err(e) => return Err(e),
+        }
+    }
+    Ok(())
+}
+
+#[cfg(all(feature = "std", unix))]
+fn read_exact_at(file: &std::fs::File, buf: &mut [u8], offset: u64) -> std::io::Result<()> {
+    use std::os::unix::fs::FileExt;
+    file.read_exact_at(buf, offset)
+}
+
+#[cfg(all(feature = "std", windows))]
+fn read_exact_at(file: &std::fs::File, mut buf: &mut [u8], mut offset: u64) -> std::io::Result<()> {
+    use std::os::windows::fs::FileExt;
+    while !buf.is_empty() {
+        match file.seek_read(buf, offset) {
+            Ok(0) => return Err(std::io::ErrorKind::UnexpectedEof.into()),
+            Ok(read) => {
+                buf = &mut buf[read..];
+                offset += read as u64;
+            }
+            Err(e) if e.kind() == std::io::ErrorKind::Interrupted => {}
+            Err(e) => return Err(e),
+        }
+    }
     Ok(())
 }
 
@@ -377,30 +1317,228 @@ pub fn serialize_with_checksum<
     data_info: &Option<HashMap<String, String>>,
     mut hasher: H,
 ) -> Result<DigestBuffer, BinTensorError> {
-    let (
-        PreparedData {
-            n,
-            header_bytes,
-            offset,
-        },
-        tensors,
-    ) = prepare(data, data_info)?;
-    let expected_size = OFFSET + header_bytes.len() + offset;
-    let mut buffer: Vec<u8> = Vec::with_capacity(expected_size);
+    let buffer = serialize(data, data_info)?;
+    hasher.update(&buffer);
+    Ok(DigestBuffer {
+        checksum: hasher.finalize()[..].to_vec(),
+        buffer,
+    })
+}
+
+/// Size of the chunks hashed independently by [`TreeHash`].
+const TREE_CHUNK_SIZE: usize = 4 * 1024 * 1024;
+/// Prefix of the hash of every chunk in [`TreeHash`].
+const TREE_LEAF: u8 = 0;
+/// Prefix of the root hash in [`TreeHash`].
+const TREE_NODE: u8 = 1;
+
+/// A two level hash tree over any [`Digest`], so that large inputs can be
+/// hashed on several cores, see [`tree_hash`] and [`checksum_file`].
+///
+/// The input is cut into chunks of 4 MiB, each hashed as `H(0x00 || chunk)`,
+/// and the root is `H(0x01 || digest_0 || digest_1 || ...)`. The result
+/// differs from the plain `H(input)`. `TreeHash` itself is a sequential
+/// [`Digest`], it can be given to [`serialize_to_file_with_checksum`] to get
+/// the tree hash of a file while writing it.
+///
+/// ```
+/// use bintensors::tensor::{tree_hash, TreeHash};
+/// use sha2::{Digest, Sha256};
+///
+/// let data = vec![7u8; 10 * 1024 * 1024];
+/// let sequential = TreeHash::<Sha256>::digest(&data);
+/// assert_eq!(tree_hash::<Sha256>(&data, 4), &sequential[..]);
+/// ```
+pub struct TreeHash<H> {
+    /// Hash of the current chunk.
+    chunk: H,
+    /// Number of bytes in the current chunk.
+    filled: usize,
+    /// Hash of the chunk digests.
+    root: H,
+}
+
+impl<H: Digest> TreeHash<H> {
+    /// Closes the current chunk and adds its digest to the root.
+    fn end_chunk(&mut self) {
+        let chunk = core::mem::replace(&mut self.chunk, H::new_with_prefix([TREE_LEAF]));
+        Digest::update(&mut self.root, chunk.finalize());
+        self.filled = 0;
+    }
+}
+
+impl<H: Digest> Default for TreeHash<H> {
+    fn default() -> Self {
+        Self {
+            chunk: H::new_with_prefix([TREE_LEAF]),
+            filled: 0,
+            root: H::new_with_prefix([TREE_NODE]),
+        }
+    }
+}
+
+impl<H: Digest> digest::HashMarker for TreeHash<H> {}
 
-    buffer.extend(&n.to_le_bytes().to_vec());
-    buffer.extend(&header_bytes);
+impl<H: Digest> digest::OutputSizeUser for TreeHash<H> {
+    type OutputSize = H::OutputSize;
+}
 
-    for tensor in tensors {
-        let data = tensor.data();
-        buffer.extend(data.as_ref());
+impl<H: Digest> digest::Update for TreeHash<H> {
+    fn update(&mut self, mut data: &[u8]) {
+        while !data.is_empty() {
+            if self.filled == TREE_CHUNK_SIZE {
+                self.end_chunk();
+            }
+            let len = (TREE_CHUNK_SIZE - self.filled).min(data.len());
+            Digest::update(&mut self.chunk, &data[..len]);
+            self.filled += len;
+            data = &data[len..];
+        }
     }
+}
 
-    hasher.update(&buffer);
-    Ok(DigestBuffer {
-        checksum: hasher.finalize()[..].to_vec(),
-        buffer,
+impl<H: Digest> digest::FixedOutput for TreeHash<H> {
+    fn finalize_into(mut self, out: &mut digest::Output<Self>) {
+        if self.filled > 0 {
+            self.end_chunk();
+        }
+        *out = self.root.finalize();
+    }
+}
+
+/// Computes the [`TreeHash`] of `data` with `num_threads` workers,
+/// `0` using [`std::thread::available_parallelism`].
+#[cfg(feature = "std")]
+pub fn tree_hash<H: Digest>(data: &[u8], num_threads: usize) -> Vec<u8> {
+    tree_hash_chunks::<H, _>(data.len(), num_threads, |range, _| {
+        Ok(H::new_with_prefix([TREE_LEAF])
+            .chain_update(&data[range])
+            .finalize())
     })
+    .expect("hashing a buffer does not fail")
+}
+
+/// Computes the [`TreeHash`] of a file with `num_threads` workers, `0` using
+/// [`std::thread::available_parallelism`].
+///
+/// Every worker reads its chunks with positional reads into its own 4 MiB
+/// buffer, so the memory used does not depend on the size of the file. On
+/// platforms without positional reads the file is hashed sequentially.
+#[cfg(feature = "std")]
+pub fn checksum_file<H: Digest, P: AsRef<Path>>(
+    filename: P,
+    num_threads: usize,
+) -> Result<Vec<u8>, BinTensorError> {
+    let file = std::fs::File::open(filename)?;
+    #[cfg(any(unix, windows))]
+    {
+        let len = usize::try_from(file.metadata()?.len())
+            .map_err(|_| BinTensorError::ValidationOverflow)?;
+        tree_hash_chunks::<H, _>(len, num_threads, |range, buffer| {
+            buffer.resize(range.len(), 0);
+            read_exact_at(&file, buffer, range.start as u64)?;
+            Ok(H::new_with_prefix([TREE_LEAF])
+                .chain_update(&buffer)
+                .finalize())
+        })
+    }
+    #[cfg(not(any(unix, windows)))]
+    {
+        let _ = num_threads;
+        let mut hasher = HashingWriter {
+            inner: std::io::sink(),
+            hasher: TreeHash::<H>::new(),
+        };
+        std::io::copy(&mut std::io::BufReader::new(file), &mut hasher)?;
+        Ok(hasher.hasher.finalize()[..].to_vec())
+    }
+}
+
+/// Checks the [`TreeHash`] of a file against `expected`, see [`checksum_file`].
+///
+/// ```no_run
+/// use bintensors::tensor::{checksum_file, verify_file};
+/// use sha2::Sha256;
+///
+/// let expected = checksum_file::<Sha256, _>("model.bt", 0).unwrap();
+/// // ... later on, after copying the file around
+/// verify_file::<Sha256, _>("model.bt", &expected, 0).unwrap();
+/// ```
+#[cfg(feature = "std")]
+pub fn verify_file<H: Digest, P: AsRef<Path>>(
+    filename: P,
+    expected: &[u8],
+    num_threads: usize,
+) -> Result<(), BinTensorError> {
+    let filename = filename.as_ref();
+    if checksum_file::<H, _>(filename, num_threads)? != expected {
+        return Err(BinTensorError::ChecksumMismatch(
+            filename.display().to_string(),
+        ));
+    }
+    Ok(())
+}
+
+/// Hashes the `len` bytes of the input chunk by chunk on a pool of workers
+/// and combines the digests into the [`TreeHash`] root. `hash_chunk` hashes
+/// the given byte range, with a scratch buffer owned by the worker.
+#[cfg(feature = "std")]
+fn tree_hash_chunks<H, F>(
+    len: usize,
+    num_threads: usize,
+    hash_chunk: F,
+) -> Result<Vec<u8>, BinTensorError>
+where
+    H: Digest,
+    F: Fn(core::ops::Range<usize>, &mut Vec<u8>) -> Result<digest::Output<H>, BinTensorError>
+        + Sync,
+{
+    use std::sync::atomic::{AtomicBool, AtomicUsize, Ordering};
+
+    let num_chunks = len.div_ceil(TREE_CHUNK_SIZE);
+    let num_threads = match num_threads {
+        0 => std::thread::available_parallelism().map_or(1, |n| n.get()),
+        n => n,
+    }
+    .min(num_chunks)
+    .max(1);
+
+    let digests = std::sync::Mutex::new(vec![digest::Output::<H>::default(); num_chunks]);
+    let next = AtomicUsize::new(0);
+    let failed = AtomicBool::new(false);
+    let worker = || -> Result<(), BinTensorError> {
+        let mut buffer = Vec::new();
+        while !failed.load(Ordering::Relaxed) {
+            let index = next.fetch_add(1, Ordering::Relaxed);
+            if index >= num_chunks {
+                break;
+            }
+            let start = index * TREE_CHUNK_SIZE;
+            match hash_chunk(start..(start + TREE_CHUNK_SIZE).min(len), &mut buffer) {
+                Ok(digest) => digests.lock().unwrap_or_else(|e| e.into_inner())[index] = digest,
+                Err(e) => {
+                    failed.store(true, Ordering::Relaxed);
+                    return Err(e);
+                }
+            }
+        }
+        Ok(())
+    };
+
+    std::thread::scope(|scope| {
+        let handles: Vec<_> = (0..num_threads).map(|_| scope.spawn(worker)).collect();
+        handles.into_iter().try_for_each(|handle| {
+            handle
+                .join()
+                .unwrap_or_else(|panic| std::panic::resume_unwind(panic))
+        })
+    })?;
+
+    let mut root = H::new_with_prefix([TREE_NODE]);
+    for digest in digests.into_inner().unwrap_or_else(|e| e.into_inner()) {
+        Digest::update(&mut root, digest);
+    }
+    Ok(root.finalize()[..].to_vec())
 }
 
 /// A structure owning some metadata to lookup tensors on a shared `data`
@@ -416,6 +1554,43 @@ impl core::fmt::Debug for BinTensors<'_> {
     }
 }
 
+/// Reads the header size from the 8-byte prefix of a file of `buffer_len` bytes.
+fn header_length(prefix: [u8; 8], buffer_len: usize) -> Result<usize, BinTensorError> {
+    let n: usize = u64::from_le_bytes(prefix)
+        .try_into()
+        .map_err(|_| BinTensorError::HeaderTooLarge)?;
+    if n > MAX_HEADER_SIZE {
+        return Err(BinTensorError::HeaderTooLarge);
+    }
+
+    let stop = n
+        .checked_add(OFFSET)
+        .ok_or(BinTensorError::InvalidHeaderLength)?;
+    if stop > buffer_len {
+        return Err(BinTensorError::InvalidHeaderLength);
+    }
+    Ok(n)
+}
+
+/// Decodes the header and checks the tensors exactly cover the rest of a file of `buffer_len` bytes.
+fn decode_metadata(header: &[u8], buffer_len: usize) -> Result<Metadata, BinTensorError> {
+    let (metadata, _): (Metadata, _) = bincode::decode_from_slice(
+        header,
+        bincode::config::standard().with_limit::<{ MAX_HEADER_SIZE }>(),
+    )?;
+    let buffer_end = metadata.validate()?;
+    if let Some(alignment) = metadata.alignment() {
+        // Tensor offsets are relative to the data region, which starts aligned.
+        if (OFFSET + header.len()) % alignment != 0 {
+            return Err(BinTensorError::InvalidAlignment(alignment));
+        }
+    }
+    if buffer_end + OFFSET + header.len() != buffer_len {
+        return Err(BinTensorError::MetadataIncompleteBuffer);
+    }
+    Ok(metadata)
+}
+
 impl<'data> BinTensors<'data> {
     /// Given a byte-buffer representing the whole bintensor file
     /// parses the header, and returns the size of the header + the parsed data.
@@ -433,29 +1608,50 @@ impl<'data> BinTensors<'data> {
         let arr: [u8; 8] = [
             buffer[0], buffer[1], buffer[2], buffer[3], buffer[4], buffer[5], buffer[6], buffer[7],
         ];
+        let n = header_length(arr, buffer_len)?;
+        let metadata = decode_metadata(&buffer[OFFSET..OFFSET + n], buffer_len)?;
+        Ok((n, metadata))
+    }
 
-        let n: usize = u64::from_le_bytes(arr)
-            .try_into()
-            .map_err(|_| BinTensorError::HeaderTooLarge)?;
-        if n > MAX_HEADER_SIZE {
-            return Err(BinTensorError::HeaderTooLarge);
-        }
+    /// Reads the header of a bintensors file from `reader`, without reading the
+    /// tensor data. Returns the size of the header and the parsed header.
+    ///
+    /// Only the 8-byte length prefix and the header itself are read, the size of
+    /// the data region is checked against the length of the whole stream.
+    ///
+    /// ```
+    /// use bintensors::BinTensors;
+    /// use std::fs::File;
+    ///
+    /// let filename = "model_header.bt";
+    /// use std::io::Write;
+    /// let serialized = b"\x18\x00\x00\x00\x00\x00\x00\x00\x00\x01\x08weight_1\x00\x02\x02\x02\x00\x04       \x00\x00\x00\x00";
+    /// File::create(filename).unwrap().write(serialized).unwrap();
+    /// let mut file = File::open(filename).unwrap();
+    /// let (_, metadata) = BinTensors::read_metadata_from(&mut file).unwrap();
+    /// assert_eq!(metadata.info("weight_1").unwrap().shape, vec![2, 2]);
+    /// ```
+    #[cfg(feature = "std")]
+    pub fn read_metadata_from<R: std::io::Read + std::io::Seek>(
+        reader: &mut R,
+    ) -> Result<(usize, Metadata), BinTensorError> {
+        use std::io::SeekFrom;
 
-        let stop = n
-            .checked_add(OFFSET)
-            .ok_or(BinTensorError::InvalidHeaderLength)?;
-        if stop > buffer_len {
-            return Err(BinTensorError::InvalidHeaderLength);
+        let buffer_len: usize = reader
+            .seek(SeekFrom::End(0))?
+            .try_into()
+            .map_err(|_| BinTensorError::MetadataIncompleteBuffer)?;
+        if buffer_len < MIN_HEADER_SIZE {
+            return Err(BinTensorError::HeaderTooSmall);
         }
 
-        let (metadata, _): (Metadata, _) = bincode::decode_from_slice(
-            &buffer[OFFSET..stop],
-            bincode::config::standard().with_limit::<{ MAX_HEADER_SIZE }>(),
-        )?;
-        let buffer_end = metadata.validate()?;
-        if buffer_end + OFFSET + n != buffer_len {
-            return Err(BinTensorError::MetadataIncompleteBuffer);
-        }
+        reader.seek(SeekFrom::Start(0))?;
+        let mut arr = [0u8; 8];
+        reader.read_exact(&mut arr)?;
+        let n = header_length(arr, buffer_len)?;
+        let mut header = vec![0u8; n];
+        reader.read_exact(&mut header)?;
+        let metadata = decode_metadata(&header, buffer_len)?;
         Ok((n, metadata))
     }
     /// Given a byte-buffer representing the whole bintensor file
@@ -538,6 +1734,12 @@ impl<'data> BinTensors<'data> {
         }
     }
 
+    /// Checks the data of the tensor against its checksum, see [`Metadata::verify`].
+    pub fn verify(&self, tensor_name: &str) -> Result<(), BinTensorError> {
+        let tensor = self.tensor(tensor_name)?;
+        self.metadata.verify(tensor_name, tensor.data())
+    }
+
     /// Return the names of the tensors within the BinTensors.
     /// These are used as keys to access to the actual tensors, that can be
     /// retrieved using the tensor method.
@@ -571,6 +1773,15 @@ pub struct Metadata {
     metadata: Option<HashMap<String, String>>,
     tensors: Vec<TensorInfo>,
     index_map: HashMap<String, usize>,
+    /// Tensor names in offset order, `names[i]` describes `tensors[i]`.
+    names: Vec<String>,
+    /// Indices into `names`, in lexicographic order of the names.
+    sorted: Vec<usize>,
+    /// Alignment of the tensor offsets, stored in the header under `__alignment__`.
+    alignment: Option<usize>,
+    /// xxh3 checksums of the tensors in offset order, stored in the header
+    /// under `__checksums__`.
+    checksums: Option<Vec<u64>>,
 }
 
 impl Encode for Metadata {
@@ -578,20 +1789,27 @@ impl Encode for Metadata {
         &self,
         encoder: &mut E,
     ) -> Result<(), bincode::error::EncodeError> {
-        let mut buffer = vec![None; self.tensors.len()];
-
-        for (key, &index) in &self.index_map {
-            buffer[index] = Some((key, &self.tensors[index]));
+        let header: Vec<(&String, &TensorInfo)> = self.names.iter().zip(&self.tensors).collect();
+
+        let mut metadata: Option<BTreeMap<&str, &str>> = self
+            .metadata
+            .as_ref()
+            .map(|map| map.iter().map(|(k, v)| (k.as_str(), v.as_str())).collect());
+        let alignment = self.alignment.map(|alignment| alignment.to_string());
+        if let Some(alignment) = &alignment {
+            metadata
+                .get_or_insert_with(BTreeMap::new)
+                .insert(ALIGNMENT_KEY, alignment.as_str());
         }
-
-        let header: Vec<(&String, &TensorInfo)> =
-            buffer.into_iter().map(|item| item.unwrap()).collect();
-
-        let metadata: Option<BTreeMap<&String, &String>> = self.metadata.as_ref().map(|map| {
-            let mut entries: Vec<_> = map.iter().collect();
-            entries.sort_by_key(|(k, _)| *k);
-            entries.into_iter().collect::<BTreeMap<_, _>>()
+        let checksums = self.checksums.as_ref().map(|checksums| {
+            let checksums: Vec<String> = checksums.iter().map(|c| format!("{c:016x}")).collect();
+            format!("{CHECKSUMS_PREFIX}{}", checksums.join(","))
         });
+        if let Some(checksums) = &checksums {
+            metadata
+                .get_or_insert_with(BTreeMap::new)
+                .insert(CHECKSUMS_KEY, checksums.as_str());
+        }
 
         bincode::Encode::encode(&(metadata, header), encoder)
     }
@@ -602,71 +1820,116 @@ impl<Context> Decode<Context> for Metadata {
         decoder: &mut D,
     ) -> Result<Self, bincode::error::DecodeError> {
         #[cfg(feature = "std")]
-        let metadata = bincode::Decode::decode(decoder)?;
+        let mut metadata: Option<HashMap<String, String>> = bincode::Decode::decode(decoder)?;
         #[cfg(not(feature = "std"))]
-        let metadata: Option<HashMap<String, String>> = bincode::serde::decode_from_reader(
+        let mut metadata: Option<HashMap<String, String>> = bincode::serde::decode_from_reader(
             decoder.reader(),
             bincode::config::standard().with_limit::<{ MAX_HEADER_SIZE / 2 }>(),
         )?;
+        let alignment = match metadata.as_mut().and_then(|map| map.remove(ALIGNMENT_KEY)) {
+            Some(alignment) => Some(alignment.parse::<usize>().map_err(|_| {
+                bincode::error::DecodeError::Other("invalid `__alignment__` in header")
+            })?),
+            None => None,
+        };
+        let checksums = match metadata.as_mut().and_then(|map| map.remove(CHECKSUMS_KEY)) {
+            Some(checksums) => Some(parse_checksums(&checksums).ok_or(
+                bincode::error::DecodeError::Other("invalid `__checksums__` in header"),
+            )?),
+            None => None,
+        };
+        // The reserved keys may have been the only entries.
+        if (alignment.is_some() || checksums.is_some())
+            && metadata.as_ref().is_some_and(HashMap::is_empty)
+        {
+            metadata = None;
+        }
 
         let buffer: Vec<(String, TensorInfo)> = bincode::Decode::decode(decoder)?;
 
         // Reconstruct tensors vector directly from buffer
         // This ensures tensors are in the exact order they were encoded
-        let mut tensors = Vec::with_capacity(buffer.len());
-        let mut index_map = HashMap::with_capacity(buffer.len());
-
-        for (i, (key, tensor_info)) in buffer.into_iter().enumerate() {
-            tensors.push(tensor_info);
-            index_map.insert(key, i);
-        }
+        let (names, tensors) = buffer.into_iter().unzip();
+        let mut metadata = Metadata::from_parts(metadata, names, tensors);
+        metadata.alignment = alignment;
+        metadata.checksums = checksums;
+        Ok(metadata)
+    }
+}
 
-        Ok(Metadata {
-            metadata,
-            tensors,
-            index_map,
-        })
+/// Parses the value of [`CHECKSUMS_KEY`], `None` if it is malformed.
+fn parse_checksums(value: &str) -> Option<Vec<u64>> {
+    let checksums = value.strip_prefix(CHECKSUMS_PREFIX)?;
+    if checksums.is_empty() {
+        return Some(Vec::new());
     }
+    checksums
+        .split(',')
+        .map(|checksum| u64::from_str_radix(checksum, 16).ok())
+        .collect()
 }
 
 impl Metadata {
     fn new(
         metadata: Option<HashMap<String, String>>,
         tensors: Vec<(String, TensorInfo)>,
+        alignment: Option<usize>,
     ) -> Result<Self, BinTensorError> {
-        let mut index_map = HashMap::with_capacity(tensors.len());
+        let (names, tensors) = tensors.into_iter().unzip();
+        let mut metadata = Self::from_parts(metadata, names, tensors);
+        metadata.alignment = alignment;
+        metadata.validate()?;
+        Ok(metadata)
+    }
 
-        let tensors: Vec<_> = tensors
-            .into_iter()
+    /// Builds the lookup tables from tensors listed in offset order.
+    fn from_parts(
+        metadata: Option<HashMap<String, String>>,
+        names: Vec<String>,
+        tensors: Vec<TensorInfo>,
+    ) -> Self {
+        let index_map = names
+            .iter()
             .enumerate()
-            .map(|(index, (k, tensor))| {
-                index_map.insert(k, index);
-                tensor
-            })
+            .map(|(index, name)| (name.clone(), index))
             .collect();
-
-        let metadata = Self {
+        let mut sorted: Vec<usize> = (0..names.len()).collect();
+        sorted.sort_unstable_by(|&a, &b| names[a].cmp(&names[b]));
+        Self {
             metadata,
             tensors,
             index_map,
-        };
-        metadata.validate()?;
-        Ok(metadata)
+            names,
+            sorted,
+            alignment: None,
+            checksums: None,
+        }
     }
 
     fn validate(&self) -> Result<usize, BinTensorError> {
         if self.index_map.len() != self.tensors.len() {
             return Err(BinTensorError::ValidationMismatch);
         }
+        let alignment = self.alignment.unwrap_or(1);
+        if !alignment.is_power_of_two() {
+            return Err(BinTensorError::InvalidAlignment(alignment));
+        }
+        if self
+            .checksums
+            .as_ref()
+            .is_some_and(|checksums| checksums.len() != self.tensors.len())
+        {
+            return Err(BinTensorError::ValidationMismatch);
+        }
         let mut start = 0;
         for (i, info) in self.tensors.iter().enumerate() {
             let (s, e) = info.data_offsets;
-            if s != start || e < s {
-                let tensor_name = self
-                    .index_map
-                    .iter()
-                    .find_map(|(name, &index)| if index == i { Some(&name[..]) } else { None })
-                    .unwrap_or("no_tensor");
+            // Aligned files leave a gap up to the next multiple of the alignment.
+            let start_aligned = start
+                .checked_next_multiple_of(alignment)
+                .ok_or(BinTensorError::ValidationOverflow)?;
+            if s != start_aligned || e < s {
+                let tensor_name = self.names.get(i).map_or("no_tensor", |name| &name[..]);
                 return Err(BinTensorError::InvalidOffset(tensor_name.to_string()));
             }
             start = e;
@@ -702,15 +1965,57 @@ impl Metadata {
 
     /// Gives back the tensor names ordered by offset
     pub fn offset_keys(&self) -> Vec<String> {
-        let mut index_vec: Vec<_> = self.index_map.iter().collect();
-        index_vec.sort_by_key(|a| a.1);
-        index_vec.into_iter().map(|a| a.0.clone()).collect()
+        self.names.clone()
+    }
+
+    /// Gives back the tensor names ordered by offset, without copying them
+    pub fn offset_names(&self) -> &[String] {
+        &self.names
+    }
+
+    /// Gives back the tensor names in lexicographic order
+    pub fn sorted_names(&self) -> impl ExactSizeIterator<Item = &String> + '_ {
+        self.sorted.iter().map(|&index| &self.names[index])
     }
 
     /// Gives back the tensor metadata
     pub fn metadata(&self) -> &Option<HashMap<String, String>> {
         &self.metadata
     }
+
+    /// Gives back the alignment of the tensor offsets, `None` when the tensors are packed
+    pub fn alignment(&self) -> Option<usize> {
+        self.alignment
+    }
+
+    /// Gives back the xxh3 checksum recorded for the tensor, `None` when the
+    /// file was written without checksums or has no such tensor
+    pub fn checksum(&self, name: &str) -> Option<u64> {
+        let index = self.index_map.get(name)?;
+        self.checksums.as_ref()?.get(*index).copied()
+    }
+
+    /// Whether the header records a checksum for every tensor
+    pub fn has_checksums(&self) -> bool {
+        self.checksums.is_some()
+    }
+
+    /// Checks `data`, the bytes of the tensor `name`, against the checksum
+    /// recorded in the header. This hashes a single tensor, so the tensors can
+    /// be verified lazily the first time they are read. Files written without
+    /// checksums have nothing to verify against and always pass.
+    pub fn verify(&self, name: &str, data: &[u8]) -> Result<(), BinTensorError> {
+        let index = self
+            .index_map
+            .get(name)
+            .ok_or_else(|| BinTensorError::TensorNotFound(name.to_string()))?;
+        match &self.checksums {
+            Some(checksums) if checksums[*index] != xxh3_64(data) => {
+                Err(BinTensorError::ChecksumMismatch(name.to_string()))
+            }
+            _ => Ok(()),
+        }
+    }
 }
 
 /// A view of a Tensor within the file.
@@ -954,14 +2259,10 @@ mod tests {
                         tensor
                     })
                     .collect();
-                let index_map = (0..tensors.len())
-                    .map(|index| (format!("t.{index}"), index))
+                let names = (0..tensors.len())
+                    .map(|index| format!("t.{index}"))
                     .collect();
-                Metadata {
-                    metadata: None,
-                    tensors,
-                    index_map,
-                }
+                Metadata::from_parts(None, names, tensors)
             })
     }
 
@@ -1029,6 +2330,375 @@ mod tests {
         let _ = BinTensors::deserialize(&out).unwrap();
     }
 
+    #[cfg(all(feature = "std", any(unix, windows)))]
+    #[test]
+    fn test_serialize_to_file_chunked() {
+        let data: Vec<u8> = (0..255u8).cycle().take(4 * 1000 + 2 * 37).collect();
+        let (left, right) = data.split_at(4 * 1000);
+        let mut tensors = HashMap::new();
+        tensors.insert(
+            "a",
+            TensorView::new(Dtype::F32, vec![10, 100], left).unwrap(),
+        );
+        tensors.insert("b", TensorView::new(Dtype::I16, vec![37], right).unwrap());
+        let metadata = Some(HashMap::from([("format".to_string(), "pt".to_string())]));
+        let expected = serialize(&tensors, &metadata).unwrap();
+
+        let filename = "./out_chunked.bintensors";
+        for (num_threads, chunk_size) in [(1, 7), (3, 64), (8, 1000), (0, 4096)] {
+            serialize_to_file_chunked(
+                &tensors,
+                &metadata,
+                filename,
+                num_threads,
+                chunk_size,
+                &Layout::default(),
+            )
+            .unwrap();
+            assert_eq!(std::fs::read(filename).unwrap(), expected);
+        }
+        std::fs::remove_file(filename).unwrap();
+    }
+
+    #[cfg(feature = "parallel")]
+    #[test]
+    fn test_serialize_parallel() {
+        let data: Vec<u8> = (0..255u8).cycle().take(4 * 1000 + 2 * 37 + 3).collect();
+        let mut tensors = HashMap::new();
+        tensors.insert(
+            "a",
+            TensorView::new(Dtype::F32, vec![10, 100], &data[..4000]).unwrap(),
+        );
+        tensors.insert(
+            "b",
+            TensorView::new(Dtype::I16, vec![37], &data[4000..4074]).unwrap(),
+        );
+        tensors.insert(
+            "c",
+            TensorView::new(Dtype::U8, vec![3], &data[4074..]).unwrap(),
+        );
+        let metadata = Some(HashMap::from([("format".to_string(), "pt".to_string())]));
+        for alignment in [None, Some(64)] {
+            let layout = Layout {
+                alignment,
+                ..Layout::default()
+            };
+            let expected = serialize_with_layout(&tensors, &metadata, &layout).unwrap();
+            assert_eq!(
+                serialize_parallel_with_layout(&tensors, &metadata, 4, &layout).unwrap(),
+                expected
+            );
+
+            for (num_threads, chunk_size) in [(1, 7), (3, 64), (8, 1000), (0, 4096)] {
+                // Leftovers in the buffer must not leak into the gaps.
+                let mut buffer = vec![0xff; expected.len()];
+                let (prepared, views) = prepare(&tensors, &metadata, &layout).unwrap();
+                copy_prepared_parallel(&prepared, &views, &mut buffer, num_threads, chunk_size)
+                    .unwrap();
+                assert_eq!(buffer, expected);
+            }
+
+            let mut buffer = vec![0xff; expected.len() + 10];
+            assert_eq!(
+                serialize_into_parallel(&tensors, &metadata, &layout, &mut buffer, 0).unwrap(),
+                expected.len()
+            );
+            assert_eq!(&buffer[..expected.len()], &expected[..]);
+            assert!(matches!(
+                serialize_into_parallel(&tensors, &metadata, &layout, &mut buffer[..10], 0),
+                Err(BinTensorError::BufferTooSmall(s)) if s == expected.len()
+            ));
+        }
+    }
+
+    #[cfg(feature = "std")]
+    #[test]
+    fn test_serialize_with_alignment() {
+        let data: Vec<u8> = (0..255u8).cycle().take(4 * 30 + 2 * 7 + 3).collect();
+        let mut tensors = HashMap::new();
+        tensors.insert(
+            "a",
+            TensorView::new(Dtype::F32, vec![30], &data[..120]).unwrap(),
+        );
+        tensors.insert(
+            "b",
+            TensorView::new(Dtype::I16, vec![7], &data[120..134]).unwrap(),
+        );
+        tensors.insert(
+            "c",
+            TensorView::new(Dtype::U8, vec![3], &data[134..]).unwrap(),
+        );
+        let metadata = Some(HashMap::from([("format".to_string(), "pt".to_string())]));
+        let layout = Layout {
+            order: TensorOrder::Natural,
+            alignment: Some(64),
+            ..Layout::default()
+        };
+        let out = serialize_with_layout(&tensors, &metadata, &layout).unwrap();
+
+        let (n, header) = BinTensors::read_metadata(&out).unwrap();
+        assert_eq!((n + 8) % 64, 0);
+        assert_eq!(header.alignment(), Some(64));
+        assert_eq!(header.metadata(), &metadata);
+        assert_eq!(header.offset_keys(), vec!["a", "b", "c"]);
+        for (name, offsets) in [("a", (0, 120)), ("b", (128, 142)), ("c", (192, 195))] {
+            assert_eq!(header.info(name).unwrap().data_offsets, offsets);
+        }
+        let loaded = BinTensors::deserialize(&out).unwrap();
+        for (name, view) in &tensors {
+            assert_eq!(loaded.tensor(name).unwrap().data(), view.data());
+        }
+        // The gaps are zeros.
+        assert!(out[n + 8 + 120..n + 8 + 128].iter().all(|&b| b == 0));
+
+        let filename = "./out_aligned.bintensors";
+        serialize_to_file_with_layout(&tensors, &metadata, filename, &layout).unwrap();
+        assert_eq!(std::fs::read(filename).unwrap(), out);
+        serialize_to_file_parallel_with_layout(&tensors, &metadata, filename, 2, &layout).unwrap();
+        assert_eq!(std::fs::read(filename).unwrap(), out);
+        std::fs::remove_file(filename).unwrap();
+
+        let packed = serialize_with_layout(&tensors, &None, &Layout::default()).unwrap();
+        assert_eq!(
+            BinTensors::read_metadata(&packed).unwrap().1.alignment(),
+            None
+        );
+
+        let layout = Layout {
+            alignment: Some(48),
+            ..Layout::default()
+        };
+        assert!(matches!(
+            serialize_with_layout(&tensors, &None, &layout),
+            Err(BinTensorError::InvalidAlignment(48))
+        ));
+        let reserved = Some(HashMap::from([(
+            ALIGNMENT_KEY.to_string(),
+            "8".to_string(),
+        )]));
+        assert!(matches!(
+            serialize(&tensors, &reserved),
+            Err(BinTensorError::ReservedMetadataKey(_))
+        ));
+    }
+
+    #[test]
+    fn test_serialize_into() {
+        let data: Vec<u8> = (0..255u8).cycle().take(4 * 6 + 3).collect();
+        let mut tensors = HashMap::new();
+        tensors.insert(
+            "a",
+            TensorView::new(Dtype::F32, vec![2, 3], &data[..24]).unwrap(),
+        );
+        tensors.insert(
+            "b",
+            TensorView::new(Dtype::U8, vec![3], &data[24..]).unwrap(),
+        );
+        for alignment in [None, Some(64)] {
+            let layout = Layout {
+                alignment,
+                ..Layout::default()
+            };
+            let expected = serialize_with_layout(&tensors, &None, &layout).unwrap();
+            let size = serialized_size(&tensors, &None, &layout).unwrap();
+            assert_eq!(size, expected.len());
+
+            // Leftovers in the buffer must not leak into the gaps.
+            let mut buffer = vec![0xff; size + 10];
+            assert_eq!(
+                serialize_into(&tensors, &None, &layout, &mut buffer).unwrap(),
+                size
+            );
+            assert_eq!(&buffer[..size], &expected[..]);
+            assert!(buffer[size..].iter().all(|&b| b == 0xff));
+
+            assert!(matches!(
+                serialize_into(&tensors, &None, &layout, &mut buffer[..size - 1]),
+                Err(BinTensorError::BufferTooSmall(s)) if s == size
+            ));
+        }
+    }
+
+    /// A writer accepting at most 1000 bytes per call, to exercise short writes.
+    #[cfg(feature = "std")]
+    struct ShortWriter(Vec<u8>);
+
+    #[cfg(feature = "std")]
+    impl Write for ShortWriter {
+        fn write(&mut self, buf: &[u8]) -> std::io::Result<usize> {
+            self.write_vectored(&[std::io::IoSlice::new(buf)])
+        }
+        fn write_vectored(&mut self, bufs: &[std::io::IoSlice<'_>]) -> std::io::Result<usize> {
+            let mut written = 0;
+            for buf in bufs {
+                let len = buf.len().min(1000 - written);
+                self.0.extend_from_slice(&buf[..len]);
+                written += len;
+            }
+            Ok(written)
+        }
+        fn flush(&mut self) -> std::io::Result<()> {
+            Ok(())
+        }
+    }
+
+    #[cfg(feature = "std")]
+    #[test]
+    fn test_serialize_to_writer() {
+        let data: Vec<u8> = (0..255u8).cycle().take(4 * 100_000 + 3).collect();
+        let mut tensors = HashMap::new();
+        tensors.insert(
+            "large",
+            TensorView::new(Dtype::F32, vec![100_000], &data[..400_000]).unwrap(),
+        );
+        tensors.insert(
+            "small",
+            TensorView::new(Dtype::U8, vec![3], &data[400_000..]).unwrap(),
+        );
+        for alignment in [None, Some(64), Some(1 << 20)] {
+            let layout = Layout {
+                alignment,
+                ..Layout::default()
+            };
+            let expected = serialize_with_layout(&tensors, &None, &layout).unwrap();
+
+            let mut out = Vec::new();
+            serialize_to_writer_with_layout(&tensors, &None, &mut out, &layout).unwrap();
+            assert_eq!(out, expected);
+
+            let mut out = ShortWriter(Vec::new());
+            serialize_to_writer_with_layout(&tensors, &None, &mut out, &layout).unwrap();
+            assert_eq!(out.0, expected);
+        }
+    }
+
+    #[cfg(feature = "std")]
+    #[test]
+    fn test_serialize_to_file_with_checksum() {
+        use sha2::{Digest, Sha256};
+
+        let data: Vec<u8> = (0..255u8).cycle().take(4 * 1_000_000).collect();
+        let mut tensors = HashMap::new();
+        tensors.insert(
+            "large",
+            TensorView::new(Dtype::F32, vec![1000, 999], &data[..3_996_000]).unwrap(),
+        );
+        tensors.insert(
+            "small",
+            TensorView::new(Dtype::U8, vec![7], &data[3_996_000..3_996_007]).unwrap(),
+        );
+        let expected = serialize_with_checksum(&tensors, &None, Sha256::new()).unwrap();
+
+        // Short writes must be hashed exactly once.
+        let mut out = ShortWriter(Vec::new());
+        let checksum =
+            serialize_to_writer_with_checksum(&tensors, &None, &mut out, Sha256::new()).unwrap();
+        assert_eq!(checksum, expected.checksum);
+        assert_eq!(out.0, expected.buffer);
+
+        let filename = "./out_checksum.bintensors";
+        let checksum =
+            serialize_to_file_with_checksum(&tensors, &None, filename, Sha256::new()).unwrap();
+        assert_eq!(checksum, expected.checksum);
+        assert_eq!(std::fs::read(filename).unwrap(), expected.buffer);
+        std::fs::remove_file(filename).unwrap();
+    }
+
+    #[test]
+    fn test_serialize_with_checksums() {
+        let data: Vec<u8> = (0..255u8).cycle().take(4 * 6 + 3).collect();
+        let mut tensors = HashMap::new();
+        tensors.insert(
+            "a",
+            TensorView::new(Dtype::F32, vec![2, 3], &data[..24]).unwrap(),
+        );
+        tensors.insert(
+            "b",
+            TensorView::new(Dtype::U8, vec![3], &data[24..]).unwrap(),
+        );
+        let metadata = Some(HashMap::from([("format".to_string(), "pt".to_string())]));
+        let layout = Layout {
+            checksums: true,
+            ..Layout::default()
+        };
+        let mut out = serialize_with_layout(&tensors, &metadata, &layout).unwrap();
+
+        let loaded = BinTensors::deserialize(&out).unwrap();
+        assert!(loaded.metadata().has_checksums());
+        assert_eq!(loaded.metadata().metadata(), &metadata);
+        assert_eq!(loaded.metadata().checksum("a"), Some(xxh3_64(&data[..24])));
+        assert_eq!(loaded.metadata().checksum("b"), Some(xxh3_64(&data[24..])));
+        loaded.verify("a").unwrap();
+        loaded.verify("b").unwrap();
+
+        // Corrupt the last byte, which belongs to `b`.
+        *out.last_mut().unwrap() ^= 1;
+        let loaded = BinTensors::deserialize(&out).unwrap();
+        loaded.verify("a").unwrap();
+        assert!(matches!(
+            loaded.verify("b"),
+            Err(BinTensorError::ChecksumMismatch(name)) if name == "b"
+        ));
+
+        // Files written without checksums have nothing to check.
+        let out = serialize(&tensors, &None).unwrap();
+        let loaded = BinTensors::deserialize(&out).unwrap();
+        assert!(!loaded.metadata().has_checksums());
+        assert_eq!(loaded.metadata().checksum("a"), None);
+        loaded.verify("a").unwrap();
+
+        let metadata = Some(HashMap::from([(CHECKSUMS_KEY.to_string(), String::new())]));
+        assert!(matches!(
+            serialize(&tensors, &metadata),
+            Err(BinTensorError::ReservedMetadataKey(key)) if key == CHECKSUMS_KEY
+        ));
+    }
+
+    #[cfg(feature = "std")]
+    #[test]
+    fn test_tree_hash() {
+        use sha2::{Digest, Sha256};
+
+        let data: Vec<u8> = (0..251u8)
+            .cycle()
+            .take(2 * TREE_CHUNK_SIZE + 1000)
+            .collect();
+        for len in [0, 1000, TREE_CHUNK_SIZE, TREE_CHUNK_SIZE + 1, data.len()] {
+            let data = &data[..len];
+            let expected = TreeHash::<Sha256>::digest(data);
+            for num_threads in [0, 1, 3] {
+                assert_eq!(tree_hash::<Sha256>(data, num_threads), &expected[..]);
+            }
+        }
+        // A single chunk is hashed once more, under the node prefix.
+        let chunk = Sha256::new_with_prefix([TREE_LEAF])
+            .chain_update(&data[..1000])
+            .finalize();
+        let root = Sha256::new_with_prefix([TREE_NODE])
+            .chain_update(chunk)
+            .finalize();
+        assert_eq!(tree_hash::<Sha256>(&data[..1000], 0), &root[..]);
+
+        let mut tensors = HashMap::new();
+        tensors.insert(
+            "a",
+            TensorView::new(Dtype::U8, vec![data.len()], &data).unwrap(),
+        );
+        let filename = "./out_tree_hash.bintensors";
+        let checksum =
+            serialize_to_file_with_checksum(&tensors, &None, filename, TreeHash::<Sha256>::new())
+                .unwrap();
+        assert_eq!(checksum_file::<Sha256, _>(filename, 0).unwrap(), checksum);
+        verify_file::<Sha256, _>(filename, &checksum, 2).unwrap();
+        let mut corrupted = checksum.clone();
+        corrupted[0] ^= 1;
+        assert!(matches!(
+            verify_file::<Sha256, _>(filename, &corrupted, 2),
+            Err(BinTensorError::ChecksumMismatch(_))
+        ));
+        std::fs::remove_file(filename).unwrap();
+    }
+
     #[test]
     fn test_empty() {
         let tensors: HashMap<String, TensorView> = HashMap::new();
@@ -1063,6 +2733,61 @@ mod tests {
         assert_eq!(tensor.data().as_ptr() as usize % tensor.dtype().size(), 0);
     }
 
+    #[test]
+    fn test_natural_cmp() {
+        use core::cmp::Ordering;
+        assert_eq!(natural_cmp("h.2.w", "h.10.w"), Ordering::Less);
+        assert_eq!(natural_cmp("h.10", "h.9.a"), Ordering::Greater);
+        assert_eq!(natural_cmp("layer", "layer.0"), Ordering::Less);
+        // Leading zeros only break ties.
+        assert_eq!(natural_cmp("a01", "a1"), Ordering::Less);
+        assert_eq!(natural_cmp("a1", "a1"), Ordering::Equal);
+    }
+
+    #[test]
+    fn test_serialize_with_layout_order() {
+        let data = [0u8; 16];
+        let tensors: Vec<(&str, TensorView)> = [
+            ("h.10.w", Dtype::F32, 8),
+            ("h.2.b", Dtype::U8, 3),
+            ("h.2.w", Dtype::F32, 8),
+            ("h.1.w", Dtype::F64, 8),
+        ]
+        .into_iter()
+        .map(|(name, dtype, len)| {
+            let view = TensorView::new(dtype, vec![len / dtype.size()], &data[..len]).unwrap();
+            (name, view)
+        })
+        .collect();
+
+        let orders = [
+            (TensorOrder::Dtype, ["h.1.w", "h.10.w", "h.2.w", "h.2.b"]),
+            (TensorOrder::Natural, ["h.1.w", "h.2.w", "h.10.w", "h.2.b"]),
+            (
+                TensorOrder::Insertion,
+                ["h.10.w", "h.2.w", "h.1.w", "h.2.b"],
+            ),
+            (
+                TensorOrder::Explicit(vec!["h.2.b".to_string(), "h.10.w".to_string()]),
+                ["h.10.w", "h.1.w", "h.2.w", "h.2.b"],
+            ),
+        ];
+        for (order, expected) in orders {
+            let layout = Layout {
+                order: order.clone(),
+                ..Layout::default()
+            };
+            let out = serialize_with_layout(tensors.clone(), &None, &layout).unwrap();
+            let loaded = BinTensors::deserialize(&out).unwrap();
+            let metadata = loaded.metadata();
+            assert_eq!(metadata.offset_keys(), expected, "{order:?}");
+            for name in expected {
+                let info = metadata.info(name).unwrap();
+                assert_eq!(info.data_offsets.0 % info.dtype.size(), 0, "{order:?}");
+            }
+        }
+    }
+
     #[cfg(feature = "slice")]
     #[test]
     fn test_slicing() {
@@ -1165,7 +2890,7 @@ mod tests {
         let filename = format!("./out_{model_id}.bintensors");
 
         let out = serialize(&metadata, &None).unwrap();
-        std::fs::write(&filename, out).unwrap();
+        std::fs::write(&filename, &out).unwrap();
         let raw = std::fs::read(&filename).unwrap();
         let _deserialized = BinTensors::deserialize(&raw).unwrap();
         std::fs::remove_file(&filename).unwrap();
@@ -1178,6 +2903,15 @@ mod tests {
             let _deserialized = BinTensors::deserialize(&raw).unwrap();
             std::fs::remove_file(&filename).unwrap();
         }
+
+        #[cfg(feature = "std")]
+        {
+            serialize_to_file_parallel(&metadata, &None, std::path::Path::new(&filename), 4)
+                .unwrap();
+            let raw = std::fs::read(&filename).unwrap();
+            assert_eq!(raw, out);
+            std::fs::remove_file(&filename).unwrap();
+        }
     }
 
     #[test]
@@ -1205,11 +2939,38 @@ mod tests {
         assert_eq!(tensor.data(), b"\0\0\0\0");
     }
 
+    #[cfg(feature = "std")]
+    #[test]
+    fn test_metadata_key_orders() {
+        let data = [0u8; 12];
+        let mut tensors = HashMap::new();
+        for (name, dtype, len) in [
+            ("b", Dtype::F32, 4),
+            ("c", Dtype::U8, 2),
+            ("a", Dtype::U8, 6),
+        ] {
+            let view = TensorView::new(dtype, vec![len / dtype.size()], &data[..len]).unwrap();
+            tensors.insert(name.to_string(), view);
+        }
+        let out = serialize(&tensors, &None).unwrap();
+        let loaded = BinTensors::deserialize(&out).unwrap();
+        let metadata = loaded.metadata();
+
+        // Sorted by descending dtype alignment then name
+        assert_eq!(metadata.offset_keys(), vec!["b", "a", "c"]);
+        assert_eq!(metadata.offset_names(), &["b", "a", "c"]);
+        assert_eq!(
+            metadata.sorted_names().collect::<Vec<_>>(),
+            vec!["a", "b", "c"]
+        );
+        assert_eq!(metadata.info("c").unwrap().data_offsets, (10, 12));
+    }
+
     #[cfg(feature = "std")]
     #[test]
     fn test_offset_attack() {
         let mut tensors = Vec::new();
-        let mut index_map = HashMap::new();
+        let mut names = Vec::new();
         let dtype = Dtype::F32;
         let shape = vec![2, 2];
         let data_offsets = (0, 16);
@@ -1220,14 +2981,10 @@ mod tests {
                 shape: shape.clone(),
                 data_offsets,
             });
-            index_map.insert(key, i);
+            names.push(key);
         }
 
-        let metadata = Metadata {
-            metadata: None,
-            tensors,
-            index_map,
-        };
+        let metadata = Metadata::from_parts(None, names, tensors);
 
         let serialized = bincode::encode_to_vec(metadata, bincode::config::standard()).unwrap();
         let n = serialized.len();
@@ -1250,6 +3007,42 @@ mod tests {
         }
     }
 
+    #[cfg(feature = "std")]
+    #[test]
+    fn test_read_metadata_from() {
+        let data: Vec<u8> = (0..24u8).collect();
+        let mut tensors = HashMap::new();
+        tensors.insert(
+            "a",
+            TensorView::new(Dtype::F32, vec![2, 2], &data[..16]).unwrap(),
+        );
+        tensors.insert(
+            "b",
+            TensorView::new(Dtype::I16, vec![4], &data[16..]).unwrap(),
+        );
+        let metadata = Some(HashMap::from([("format".to_string(), "pt".to_string())]));
+        let out = serialize(&tensors, &metadata).unwrap();
+
+        let (n, expected) = BinTensors::read_metadata(&out).unwrap();
+        let (header_n, header) =
+            BinTensors::read_metadata_from(&mut std::io::Cursor::new(&out)).unwrap();
+        assert_eq!(header_n, n);
+        assert_eq!(header.offset_keys(), expected.offset_keys());
+        assert_eq!(header.info("b").unwrap().data_offsets, (16, 24));
+        assert_eq!(header.metadata(), &metadata);
+
+        // Missing data is detected without reading it.
+        let truncated = &out[..out.len() - 1];
+        match BinTensors::read_metadata_from(&mut std::io::Cursor::new(truncated)) {
+            Err(BinTensorError::MetadataIncompleteBuffer) => {}
+            _ => panic!("This should not be able to be deserialized"),
+        }
+        match BinTensors::read_metadata_from(&mut std::io::Cursor::new(b"\x10\x00")) {
+            Err(BinTensorError::HeaderTooSmall) => {}
+            _ => panic!("This should not be able to be deserialized"),
+        }
+    }
+
     #[test]
     fn test_metadata_incomplete_buffer() {
         let serialized = b"\x10\x00\x00\x00\x00\x00\x00\x00\x00\x01\x09\x02\x01\x04\x00\x10\x01\x04\x74\x65\x73\x74\x00\x20\0\0\0\0\0\0\0\0\0\0\0\0\0\0\0\0hello_world";